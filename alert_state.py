@@ -0,0 +1,183 @@
+from config import ALERT_HYSTERESIS, ALERT_MIN_DURATION_S
+
+# Status de alerta de um quarto
+STATUS_OK = "ok"
+STATUS_ALERT = "alert"
+STATUS_NO_REFERENCE = "no_reference"
+STATUS_STALE = "stale"  # Sem leituras dentro do prazo (ver staleness.py); não faz parte da máquina de estados
+
+
+class AlertEvent:
+    """Transição no status de um quarto (ex.: OK→ALERT, ALERT→OK, OK→STALE)."""
+
+    __slots__ = ("room_id", "previous_status", "status", "value", "threshold", "timestamp")
+
+    def __init__(self, room_id, previous_status, status, value, threshold, timestamp):
+        self.room_id = room_id
+        self.previous_status = previous_status
+        self.status = status
+        self.value = value  # Última temperatura ambiente (ou None)
+        self.threshold = threshold  # Temperatura de referência atual (ou None)
+        self.timestamp = timestamp  # Timestamp da leitura que provocou a mudança (segundos desde a época)
+
+    def __repr__(self):
+        return (f"AlertEvent(room_id={self.room_id!r}, previous_status={self.previous_status!r}, "
+                f"status={self.status!r}, value={self.value!r}, threshold={self.threshold!r})")
+
+
+class RoomAlertState:
+    """Estado de alerta de um quarto, atualizado a cada leitura."""
+
+    __slots__ = ("status", "reference_value", "reference_timestamp",
+                 "last_value", "last_timestamp", "pending_since")
+
+    def __init__(self):
+        self.status = STATUS_OK
+        self.reference_value = None
+        self.reference_timestamp = None
+        self.last_value = None  # Última temperatura ambiente
+        self.last_timestamp = None
+        self.pending_since = None  # Início da condição que aguarda o tempo mínimo para mudar o status
+
+
+class AlertTracker:
+    """
+    Máquina de estados de alerta por quarto, com custo O(1) por leitura.
+
+    Cada quarto guarda a referência atual e a última temperatura ambiente. Um quarto entra em
+    alerta quando a temperatura ambiente passa da referência e só sai quando ela cai para
+    `referência - hysteresis` ou menos. Com `min_duration` > 0, a condição precisa persistir por
+    esse tempo (medido nos timestamps das leituras) antes da transição acontecer.
+    """
+
+    def __init__(self, hysteresis=ALERT_HYSTERESIS, min_duration=ALERT_MIN_DURATION_S):
+        """
+        Args:
+            hysteresis: Margem (°C) abaixo da referência necessária para sair do alerta
+            min_duration: Tempo mínimo (s) que a condição deve persistir antes de mudar o status
+        """
+        self.hysteresis = hysteresis
+        self.min_duration = min_duration
+        self._states = {}
+
+    def get(self, room_id):
+        """Retorna o RoomAlertState do quarto ou None."""
+        return self._states.get(room_id)
+
+    def status(self, room_id):
+        """Retorna o status atual do quarto (STATUS_OK se ainda não há estado)."""
+        state = self._states.get(room_id)
+        return state.status if state is not None else STATUS_OK
+
+    def export_state(self, room_id):
+        """
+        Retorna o estado do quarto como uma tupla simples (para envio entre processos) ou None.
+
+        Returns:
+            tuple or None: (room_id, status, reference_value, reference_timestamp, last_value,
+                last_timestamp, pending_since), no formato aceito por `restore_state`
+        """
+        state = self._states.get(room_id)
+        if state is None:
+            return None
+        return (room_id, state.status, state.reference_value, state.reference_timestamp,
+                state.last_value, state.last_timestamp, state.pending_since)
+
+    def export_states(self):
+        """Estados de todos os quartos (ver `export_state`)."""
+        return [self.export_state(room_id) for room_id in self._states]
+
+    def restore_state(self, room_id, status, reference_value, reference_timestamp, last_value,
+                      last_timestamp, pending_since):
+        """Substitui o estado do quarto por um estado calculado em outro lugar (ver `export_state`)."""
+        state = self._state(room_id)
+        state.status = status
+        state.reference_value = reference_value
+        state.reference_timestamp = reference_timestamp
+        state.last_value = last_value
+        state.last_timestamp = last_timestamp
+        state.pending_since = pending_since
+
+    def _state(self, room_id):
+        state = self._states.get(room_id)
+        if state is None:
+            state = self._states[room_id] = RoomAlertState()
+        return state
+
+    def on_environment(self, room_id, timestamp, value):
+        """
+        Processa uma temperatura ambiente.
+
+        Returns:
+            AlertEvent or None: Evento se o status do quarto mudou
+        """
+        state = self._state(room_id)
+        if state.last_timestamp is not None and timestamp < state.last_timestamp:
+            return None  # Leitura atrasada não altera o status atual
+
+        state.last_value = value
+        state.last_timestamp = timestamp
+        if state.reference_value is None:
+            return self._transition(room_id, state, STATUS_NO_REFERENCE)
+        if timestamp < state.reference_timestamp:
+            return None  # Só compara leituras posteriores à referência atual
+        return self._evaluate(room_id, state, timestamp)
+
+    def on_reference(self, room_id, timestamp, value):
+        """
+        Processa uma temperatura de referência e reavalia a última temperatura ambiente.
+
+        Returns:
+            AlertEvent or None: Evento se o status do quarto mudou
+        """
+        state = self._state(room_id)
+        if state.reference_timestamp is not None and timestamp < state.reference_timestamp:
+            return None  # Referência mais antiga que a atual
+
+        state.reference_value = value
+        state.reference_timestamp = timestamp
+        if state.last_value is None:
+            return None  # Sem temperatura ambiente ainda: permanece OK
+        return self._evaluate(room_id, state, state.last_timestamp)
+
+    def _evaluate(self, room_id, state, timestamp):
+        value = state.last_value
+        reference = state.reference_value
+
+        if state.status == STATUS_ALERT:
+            if value > reference - self.hysteresis:
+                state.pending_since = None
+                return None
+            if not self._persisted(state, timestamp):
+                return None
+            return self._transition(room_id, state, STATUS_OK)
+
+        if value > reference:
+            if self._persisted(state, timestamp):
+                return self._transition(room_id, state, STATUS_ALERT)
+            if state.status == STATUS_NO_REFERENCE:
+                # A referência chegou: sai de S/ REF enquanto o alerta aguarda o tempo mínimo
+                return self._transition(room_id, state, STATUS_OK)
+            return None
+
+        state.pending_since = None
+        return self._transition(room_id, state, STATUS_OK)
+
+    def _persisted(self, state, timestamp):
+        """Verifica se a condição de transição já persiste pelo tempo mínimo."""
+        if self.min_duration <= 0:
+            return True
+        if state.pending_since is None:
+            state.pending_since = timestamp
+        if timestamp - state.pending_since >= self.min_duration:
+            state.pending_since = None
+            return True
+        return False
+
+    def _transition(self, room_id, state, status):
+        previous_status = state.status
+        if previous_status == status:
+            return None
+        state.status = status
+        return AlertEvent(room_id, previous_status, status, state.last_value,
+                          state.reference_value, state.last_timestamp)
@@ -0,0 +1,348 @@
+import tkinter as tk
+import tkinter.font as tkfont
+from bisect import bisect_left, insort
+from tkinter import ttk
+
+
+class SortedRoomIndex:
+    """
+    Quartos ordenados por uma chave, mantidos com busca binária.
+
+    Guarda pares (chave, room_id) em uma lista ordenada; quando a chave de um quarto muda, a
+    entrada antiga é localizada por busca binária e substituída, sem reordenar a lista inteira.
+    """
+
+    def __init__(self, key, room_ids=()):
+        """
+        Args:
+            key: Função que recebe o ID do quarto e retorna a chave de ordenação
+            room_ids: Quartos iniciais
+        """
+        self.key = key
+        self._keys = {room_id: (key(room_id), room_id) for room_id in room_ids}
+        self._entries = sorted(self._keys.values())
+
+    def __len__(self):
+        return len(self._entries)
+
+    def update(self, room_id):
+        """
+        Insere o quarto ou reposiciona-o conforme a chave atual.
+
+        Returns:
+            tuple or None: (posição anterior ou None se o quarto é novo, posição nova); None se a
+                chave não mudou
+        """
+        entry = (self.key(room_id), room_id)
+        previous = self._keys.get(room_id)
+        if previous == entry:
+            return None
+        old_position = None
+        if previous is not None:
+            old_position = bisect_left(self._entries, previous)
+            del self._entries[old_position]
+        new_position = bisect_left(self._entries, entry)
+        self._entries.insert(new_position, entry)
+        self._keys[room_id] = entry
+        return old_position, new_position
+
+    def slice(self, start, stop):
+        """IDs dos quartos nas posições [start, stop) da ordem atual."""
+        return [room_id for _, room_id in self._entries[start:stop]]
+
+
+class AllRoomsView:
+    """
+    Visualização "Todos os Quartos" virtualizada, com filtro por prefixo e ordenação.
+
+    Apenas os blocos dos quartos que cabem na área visível são formatados e escritos no widget
+    de texto; a barra de rolagem percorre a lista em unidades de quartos. O filtro usa a lista
+    ordenada de IDs como índice de prefixos (duas buscas binárias por consulta). As ordenações
+    por status e por desvio da referência são mantidas de forma incremental: a cada atualização
+    apenas os quartos alterados são reposicionados.
+    """
+
+    HEADER = "=== MONITOR DE TEMPERATURA - TODOS OS QUARTOS ===\n\n"
+    WAITING_MESSAGE = "Aguardando dados de temperatura...\n"
+    NO_MATCH_MESSAGE = "Nenhum quarto corresponde ao filtro.\n"
+    SORT_BY_ID = "ID do quarto"
+
+    def __init__(self, master, format_room_block, sort_keys=None, on_room_activated=None, on_filter_changed=None):
+        """
+        Args:
+            master: Widget pai
+            format_room_block: Função que recebe o ID do quarto e retorna o texto do bloco
+            sort_keys: Dicionário {rótulo: função(room_id) -> chave} com as ordenações além do ID
+            on_room_activated: Função opcional chamada com o ID do quarto em um duplo clique no bloco
+            on_filter_changed: Função opcional chamada sem argumentos quando o filtro muda
+        """
+        self.format_room_block = format_room_block
+        self.sort_keys = dict(sort_keys or {})
+        self.on_room_activated = on_room_activated
+        self.on_filter_changed = on_filter_changed
+
+        self._room_ids = []  # IDs de todos os quartos, ordenados (índice de prefixos)
+        self._known_rooms = set()
+        self._dirty_rooms = set()
+        self._prefix = ""
+        self._sort = self.SORT_BY_ID
+        self._order = None  # SortedRoomIndex dos quartos filtrados, para ordenações além do ID
+        self._first = 0  # Posição do primeiro quarto visível na lista filtrada
+        self._visible = []  # (linha inicial, room_id) dos blocos desenhados
+        self._visible_lines = 0
+        self._needs_render = True
+
+        self.frame = ttk.Frame(master)
+        self._build_toolbar()
+
+        body = ttk.Frame(self.frame)
+        body.pack(fill="both", expand=True)
+        self.text = tk.Text(
+            body,
+            wrap="word",
+            state="disabled",
+            font=("Consolas", 11),
+            bg="#ffffff",
+            relief="solid",
+            borderwidth=1
+        )
+        self.scrollbar = ttk.Scrollbar(body, orient="vertical", command=self._on_scrollbar)
+        self.scrollbar.pack(side="right", fill="y")
+        self.text.pack(side="left", fill="both", expand=True)
+        self._line_height = tkfont.Font(font=self.text.cget("font")).metrics("linespace")
+
+        # A rolagem nativa do texto é substituída pela rolagem por quartos
+        for sequence in ("<MouseWheel>", "<Button-4>", "<Button-5>"):
+            self.text.bind(sequence, self._on_mouse_wheel)
+        for sequence, amount in (("<Prior>", "pages"), ("<Next>", "pages"), ("<Up>", "units"), ("<Down>", "units")):
+            step = -1 if sequence in ("<Prior>", "<Up>") else 1
+            self.text.bind(sequence, lambda event, step=step, amount=amount: self._scroll(step, amount) or "break")
+        self.text.bind("<Configure>", self._on_resize)
+        self.text.bind("<Double-Button-1>", self._on_double_click)
+
+    def _build_toolbar(self):
+        toolbar = ttk.Frame(self.frame)
+        toolbar.pack(fill="x", pady=(0, 8))
+
+        ttk.Label(toolbar, text="🔍 Filtrar:").pack(side="left")
+        self.filter_var = tk.StringVar(toolbar)
+        self.filter_entry = ttk.Entry(toolbar, textvariable=self.filter_var, width=20)
+        self.filter_entry.pack(side="left", padx=(5, 15))
+        self.filter_var.trace_add("write", lambda *args: self.set_filter(self.filter_var.get()))
+
+        ttk.Label(toolbar, text="Ordenar por:").pack(side="left")
+        self.sort_var = tk.StringVar(toolbar, value=self.SORT_BY_ID)
+        sort_selector = ttk.Combobox(
+            toolbar,
+            textvariable=self.sort_var,
+            state="readonly",
+            values=[self.SORT_BY_ID] + list(self.sort_keys),
+            width=24
+        )
+        sort_selector.pack(side="left", padx=(5, 15))
+        sort_selector.bind("<<ComboboxSelected>>", lambda event: self.set_sort(self.sort_var.get()))
+
+        self.count_label = ttk.Label(toolbar, text="")
+        self.count_label.pack(side="right")
+
+    # --- Modelo ---
+
+    def mark_dirty(self, room_ids):
+        """Marca quartos que receberam leituras; os visíveis são redesenhados na próxima atualização."""
+        self._dirty_rooms.update(room_ids)
+
+    def matching_rooms(self, limit=None):
+        """
+        IDs dos quartos que correspondem ao filtro atual, em ordem de ID.
+
+        Args:
+            limit: Número máximo de IDs retornados
+        """
+        if self._apply_dirty_rooms():
+            self._needs_render = True
+        start, stop = self._prefix_range()
+        if limit is not None:
+            stop = min(stop, start + limit)
+        return self._room_ids[start:stop]
+
+    def _prefix_range(self):
+        """Posições [início, fim) dos quartos com o prefixo do filtro na lista ordenada de IDs."""
+        if not self._prefix:
+            return 0, len(self._room_ids)
+        start = bisect_left(self._room_ids, self._prefix)
+        stop = bisect_left(self._room_ids, self._prefix + "\U0010ffff", start)
+        return start, stop
+
+    def _filtered_count(self):
+        if self._order is not None:
+            return len(self._order)
+        start, stop = self._prefix_range()
+        return stop - start
+
+    def _filtered_slice(self, first, count):
+        if self._order is not None:
+            return self._order.slice(first, first + count)
+        start, stop = self._prefix_range()
+        return self._room_ids[start + first:min(start + first + count, stop)]
+
+    def _rebuild_order(self):
+        """Recria a ordenação dos quartos filtrados (apenas quando o filtro ou a ordenação mudam)."""
+        key = self.sort_keys.get(self._sort)
+        self._order = SortedRoomIndex(key, self.matching_rooms()) if key is not None else None
+
+    def _apply_dirty_rooms(self):
+        """
+        Inclui os quartos novos no índice e reposiciona os alterados na ordenação.
+
+        Returns:
+            bool: True se algum quarto alterado pode estar (ou entrar) na área visível
+        """
+        dirty_rooms = self._dirty_rooms
+        if not dirty_rooms:
+            return False
+        self._dirty_rooms = set()
+
+        changed_view = False
+        prefix = self._prefix
+        # Posições [first, end) desenhadas: um quarto que sai ou entra antes de `end` desloca a área
+        # visível; um movimento inteiramente acima de `first` ou a partir de `end` não a altera
+        first = self._first
+        end = first + len(self._visible)
+        for room_id in dirty_rooms:
+            if room_id not in self._known_rooms:
+                self._known_rooms.add(room_id)
+                insort(self._room_ids, room_id)
+                changed_view = True
+            if self._order is not None and room_id.startswith(prefix):
+                moved = self._order.update(room_id)
+                if moved is not None:
+                    old_position, new_position = moved
+                    if old_position is None:
+                        changed_view = True
+                    elif not ((old_position < first and new_position < first)
+                              or (old_position >= end and new_position >= end)):
+                        changed_view = True
+        if not changed_view:
+            visible_rooms = {room_id for _, room_id in self._visible}
+            changed_view = not visible_rooms.isdisjoint(dirty_rooms)
+        return changed_view
+
+    # --- Controles ---
+
+    def set_filter(self, prefix):
+        """Mostra apenas os quartos cujo ID começa com `prefix`."""
+        prefix = prefix.strip()
+        if prefix == self._prefix:
+            return
+        self._prefix = prefix
+        self._first = 0
+        self._apply_dirty_rooms()
+        self._rebuild_order()
+        self._needs_render = True
+        self.refresh()
+        if self.on_filter_changed is not None:
+            self.on_filter_changed()
+
+    def set_sort(self, label):
+        """Ordena a lista por ID ou por uma das chaves em `sort_keys`."""
+        if label == self._sort:
+            return
+        self._sort = label
+        self._first = 0
+        self._apply_dirty_rooms()
+        self._rebuild_order()
+        self._needs_render = True
+        self.refresh()
+
+    def _scroll(self, step, what="units"):
+        if what == "pages":
+            step *= max(1, len(self._visible) - 1)
+        self._scroll_to(self._first + step)
+
+    def _scroll_to(self, first):
+        last_first = max(0, self._filtered_count() - max(1, len(self._visible) - 1))
+        first = min(max(0, first), last_first)
+        if first != self._first:
+            self._first = first
+            self._needs_render = True
+            self.refresh()
+
+    def _on_scrollbar(self, action, *args):
+        if action == "moveto":
+            self._scroll_to(int(float(args[0]) * self._filtered_count()))
+        elif action == "scroll":
+            self._scroll(int(args[0]), args[1])
+
+    def _on_mouse_wheel(self, event):
+        if event.num == 4 or getattr(event, "delta", 0) > 0:
+            self._scroll(-1)
+        else:
+            self._scroll(1)
+        return "break"
+
+    def _on_resize(self, event):
+        visible_lines = max(1, event.height // self._line_height)
+        if visible_lines != self._visible_lines:
+            self._visible_lines = visible_lines
+            self._needs_render = True
+            self.refresh()
+
+    def _on_double_click(self, event):
+        if self.on_room_activated is None:
+            return
+        line = int(self.text.index(f"@{event.x},{event.y}").split(".")[0])
+        for start_line, room_id in reversed(self._visible):
+            if line >= start_line:
+                self.on_room_activated(room_id)
+                return "break"
+
+    # --- Desenho ---
+
+    def refresh(self):
+        """Redesenha a área visível se ela mudou ou se algum quarto visível recebeu leituras."""
+        if self._apply_dirty_rooms():
+            self._needs_render = True
+        if not self._needs_render:
+            return
+        self._needs_render = False
+
+        total = self._filtered_count()
+        if self._first >= total:
+            self._first = max(0, total - 1)
+        visible_lines = self._visible_lines or int(self.text.cget("height"))
+
+        # Formata apenas os blocos que cabem na altura do widget (mais um parcialmente visível)
+        parts = [self.HEADER]
+        line = self.HEADER.count("\n") + 1
+        self._visible = []
+        first = self._first
+        batch = max(4, visible_lines // 4)
+        while line <= visible_lines:
+            room_ids = self._filtered_slice(first, batch)
+            if not room_ids:
+                break
+            for room_id in room_ids:
+                block = self.format_room_block(room_id)
+                self._visible.append((line, room_id))
+                parts.append(block)
+                line += block.count("\n")
+                if line > visible_lines:
+                    break
+            first += len(room_ids)
+        if not self._visible:
+            parts.append(self.NO_MATCH_MESSAGE if self._room_ids else self.WAITING_MESSAGE)
+
+        self.text.config(state="normal")
+        self.text.delete("1.0", tk.END)
+        self.text.insert("1.0", "".join(parts))
+        self.text.config(state="disabled")
+        self.text.yview_moveto(0)
+
+        shown = len(self._visible)
+        if total:
+            self.scrollbar.set(self._first / total, (self._first + shown) / total)
+            self.count_label.config(text=f"Quartos {self._first + 1}–{self._first + shown} de {total}"
+                                         + (f" ({len(self._room_ids)} no total)" if total != len(self._room_ids) else ""))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+            self.count_label.config(text=f"0 de {len(self._room_ids)} quartos")
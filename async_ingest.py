@@ -0,0 +1,470 @@
+"""
+Pipeline de ingestão em asyncio, com filas limitadas entre os estágios e controle de fluxo.
+
+    transporte ──> [decode] ──> [store] ──> [fanout]
+      (socket)    fila bruta   fila decodificada   fila de atualizações
+
+- transporte: entrega (tópico, payload) de cada mensagem. `PahoAsyncTransport` usa o paho
+  dirigido pelo laço do asyncio (sem a thread de rede do paho); `FakeTransport` entrega mensagens
+  em processo, para testes e benchmarks sem broker.
+- decode: tópico e payload → itens no formato da fila de ingestão do motor.
+- store: aplica os itens ao motor em lotes (`MonitorEngine.apply_items`) ou, no modo de repasse,
+  os entrega à fila de ingestão do motor, drenada pela thread do Tk.
+- fanout: entrega cada EngineUpdate aos assinantes do motor (`MonitorEngine.publish`).
+
+Cada fila tem tamanho máximo. Um estágio que não consegue entregar ao seguinte aguarda (`await
+put`), de modo que o atraso se propaga para trás até a fila bruta; com ela cheia, a política
+"pause" para de ler o socket (o TCP e o broker seguram as mensagens) até a fila baixar a
+`resume_ratio` do tamanho máximo, e a política "drop" descarta as mensagens novas.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+import paho.mqtt.client as mqtt
+
+from config import MQTT_BROKER, MQTT_PORT, MQTT_TOPIC, MQTT_PAYLOAD_CODEC, INGEST_MAX_BATCH
+from config import ASYNC_INGEST_QUEUE_SIZE, ASYNC_INGEST_BACKPRESSURE, ASYNC_INGEST_RESUME_RATIO
+from config import ASYNC_INGEST_HANDOFF_POLL_MS, INGEST_DRAIN_INTERVAL_MS
+from event_log import CategoryLogger
+from mqtt_client import PayloadDecoder
+
+logger = logging.getLogger("monitor.mqtt")
+errors_logger = CategoryLogger("monitor.mqtt.errors")
+
+BACKPRESSURE_POLICIES = ("pause", "drop")
+
+
+class PahoAsyncTransport:
+    """
+    Cliente paho dirigido pelo laço do asyncio: o socket é registrado com `add_reader`/`add_writer`
+    e `loop_misc` (keepalive) roda em uma tarefa. Pausar a leitura remove o socket do laço.
+
+    Se a conexão cai, a mesma tarefa reconecta com espera exponencial entre as tentativas (como
+    a thread de `loop_start` do paho); o tópico é assinado a cada conexão e a pausa de leitura
+    continua valendo para o novo socket.
+    """
+
+    RECONNECT_MIN_DELAY_S = 1
+    RECONNECT_MAX_DELAY_S = 120
+
+    def __init__(self, broker=MQTT_BROKER, port=MQTT_PORT, topic=MQTT_TOPIC, protocol=mqtt.MQTTv311, keepalive=60):
+        self.broker = broker
+        self.port = port
+        self.topic = topic
+        self.keepalive = keepalive
+        self.client = mqtt.Client(protocol=protocol)
+        self.client.on_connect = self._on_connect
+        self.client.on_message = self._on_message
+        self.client.on_socket_open = self._on_socket_open
+        self.client.on_socket_close = self._on_socket_close
+        self.client.on_socket_register_write = self._on_socket_register_write
+        self.client.on_socket_unregister_write = self._on_socket_unregister_write
+        self._loop = None
+        self._sock = None
+        self._deliver = None
+        self._paused = False
+        self._stopping = False
+        self._misc_task = None
+        self.reconnects = 0
+
+    async def start(self, deliver):
+        """Conecta ao broker e passa a chamar `deliver(tópico, payload)` a cada mensagem."""
+        self._loop = asyncio.get_running_loop()
+        self._deliver = deliver
+        self.client.connect(self.broker, self.port, self.keepalive)
+        self._misc_task = asyncio.create_task(self._misc_loop())
+
+    async def _misc_loop(self):
+        delay = self.RECONNECT_MIN_DELAY_S
+        while not self._stopping:
+            if self.client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+                delay = self.RECONNECT_MIN_DELAY_S
+                await asyncio.sleep(1)
+                continue
+            # Sem conexão: nova tentativa após a espera, dobrada a cada falha
+            await asyncio.sleep(delay)
+            if self._stopping:
+                return
+            try:
+                self.client.reconnect()
+            except OSError as e:
+                logger.warning("Falha ao reconectar ao broker MQTT %s:%s: %s", self.broker, self.port, e)
+                delay = min(delay * 2, self.RECONNECT_MAX_DELAY_S)
+            else:
+                self.reconnects += 1
+
+    def _on_connect(self, client, userdata, flags, rc, properties=None):
+        logger.info("Conectado ao broker MQTT com código: %s", rc)
+        # A cada conexão (inclusive reconexões sem sessão persistente) o tópico é assinado de novo
+        client.subscribe(self.topic)
+
+    def _on_message(self, client, userdata, msg):
+        self._deliver(msg.topic, msg.payload)
+
+    def _on_socket_open(self, client, userdata, sock):
+        self._sock = sock
+        if not self._paused:
+            self._loop.add_reader(sock, client.loop_read)
+
+    def _on_socket_close(self, client, userdata, sock):
+        self._loop.remove_reader(sock)
+        self._loop.remove_writer(sock)
+        self._sock = None
+
+    def _on_socket_register_write(self, client, userdata, sock):
+        self._loop.add_writer(sock, client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+        self._loop.remove_writer(sock)
+
+    def pause_reading(self):
+        if self._paused:
+            return
+        self._paused = True
+        if self._sock is not None:
+            self._loop.remove_reader(self._sock)
+
+    def resume_reading(self):
+        if not self._paused:
+            return
+        self._paused = False
+        if self._sock is not None:
+            self._loop.add_reader(self._sock, self.client.loop_read)
+
+    async def stop(self):
+        self._stopping = True
+        self.client.disconnect()
+        if self._misc_task is not None:
+            self._misc_task.cancel()
+
+
+class FakeTransport:
+    """
+    Transporte em processo: entrega as mensagens recebidas no construtor ou em `publish`,
+    respeitando a pausa de leitura como um socket faria. As mensagens são objetos com `topic`
+    e `payload` (como as do paho ou `load_generator.FakeMessage`).
+    """
+
+    # Mensagens entregues antes de devolver o controle ao laço
+    CHUNK = 256
+
+    def __init__(self, messages=()):
+        self._pending = deque(messages)
+        self._paused = False
+        self._wakeup = asyncio.Event()
+        self._deliver = None
+        self._task = None
+        self.delivered = 0
+
+    async def start(self, deliver):
+        self._deliver = deliver
+        self._task = asyncio.create_task(self._run())
+
+    def publish(self, message):
+        """Enfileira uma mensagem para entrega (deve ser chamado na thread do laço)."""
+        self._pending.append(message)
+        self._wakeup.set()
+
+    def pending(self):
+        return len(self._pending)
+
+    async def _run(self):
+        pending = self._pending
+        while True:
+            if self._paused or not pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            for _ in range(min(self.CHUNK, len(pending))):
+                message = pending.popleft()
+                self._deliver(message.topic, message.payload)
+                self.delivered += 1
+                if self._paused:
+                    break
+            await asyncio.sleep(0)
+
+    def pause_reading(self):
+        self._paused = True
+
+    def resume_reading(self):
+        self._paused = False
+        self._wakeup.set()
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+
+
+class AsyncIngestPipeline:
+    """
+    Estágios decode → store → fanout ligados por `asyncio.Queue`s limitadas.
+
+    Roda inteiramente no laço do asyncio; com `handoff=False` o motor é usado apenas a partir
+    deste laço (modo headless). Com `handoff=True` o estágio de armazenamento entrega os itens à
+    fila de ingestão do motor, aguardando enquanto ela estiver cheia, e o estágio de fanout fica
+    ocioso: a thread do Tk drena a fila e notifica as views como no cliente com thread.
+    """
+
+    STAGES = ("decode", "store", "fanout")
+
+    def __init__(self, engine, transport, codec=MQTT_PAYLOAD_CODEC, queue_size=ASYNC_INGEST_QUEUE_SIZE,
+                 backpressure=ASYNC_INGEST_BACKPRESSURE, resume_ratio=ASYNC_INGEST_RESUME_RATIO,
+                 store_batch=INGEST_MAX_BATCH, handoff=False, handoff_poll_ms=ASYNC_INGEST_HANDOFF_POLL_MS):
+        """
+        Args:
+            engine: MonitorEngine que recebe as leituras
+            transport: PahoAsyncTransport, FakeTransport ou objeto com a mesma interface
+            codec: Codec de payload (ver `create_codec`)
+            queue_size: Tamanho máximo da fila de entrada de cada estágio
+            backpressure: "pause" (para de ler o transporte com a fila bruta cheia) ou "drop"
+                (descarta as mensagens que chegam com a fila bruta cheia)
+            resume_ratio: Fração de `queue_size` abaixo da qual a leitura pausada é retomada
+            store_batch: Máximo de itens aplicados ao motor de uma vez
+            handoff: Se True, repassa os itens à fila de ingestão do motor em vez de aplicá-los
+            handoff_poll_ms: Espera entre tentativas de repasse com a fila do motor cheia
+        """
+        if backpressure not in BACKPRESSURE_POLICIES:
+            raise ValueError(f"Política de contrapressão desconhecida: {backpressure}")
+        self.engine = engine
+        self.transport = transport
+        self.decoder = PayloadDecoder(codec)
+        self.backpressure = backpressure
+        self.store_batch = store_batch
+        self.handoff = handoff
+        self.handoff_poll = handoff_poll_ms / 1000.0
+        self.queue_size = queue_size
+        self.resume_size = int(queue_size * resume_ratio)
+        self.queues = {stage: asyncio.Queue(queue_size) for stage in self.STAGES}
+        self.max_depths = dict.fromkeys(self.STAGES, 0)
+
+        self.reading_paused = False
+        self.read_pauses = 0
+        self.dropped = 0
+        self._tasks = []
+        self._stopped = None
+
+        metrics = engine.metrics
+        for stage in self.STAGES:
+            metrics.add_gauge(f"monitor_async_{stage}_queue_depth", f"Itens aguardando o estágio {stage}",
+                              self.queues[stage].qsize)
+        metrics.add_gauge("monitor_async_read_pauses_total", "Pausas de leitura do transporte por contrapressão",
+                          lambda: self.read_pauses, kind="counter")
+        metrics.add_gauge("monitor_async_dropped_total", "Mensagens descartadas com a fila bruta cheia",
+                          lambda: self.dropped, kind="counter")
+
+    # --- Transporte → fila bruta ---
+
+    def _on_transport_message(self, topic, payload):
+        queue = self.queues["decode"]
+        if self.engine.metrics.enabled:
+            self.engine.metrics.messages += 1
+            received_at = time.monotonic()
+        else:
+            received_at = None
+        try:
+            queue.put_nowait((topic, payload, received_at))
+        except asyncio.QueueFull:
+            # Só acontece com a política "drop" ou com pacotes já lidos do socket antes da pausa
+            self.dropped += 1
+            return
+        if queue.full() and self.backpressure == "pause" and not self.reading_paused:
+            self.reading_paused = True
+            self.read_pauses += 1
+            self.transport.pause_reading()
+
+    def _track_depth(self, stage):
+        depth = self.queues[stage].qsize()
+        if depth > self.max_depths[stage]:
+            self.max_depths[stage] = depth
+
+    # --- Estágios ---
+
+    async def _decode_stage(self):
+        queue = self.queues["decode"]
+        output = self.queues["store"]
+        decoder = self.decoder
+        metrics = self.engine.metrics
+        while True:
+            self._track_depth("decode")
+            topic, payload, received_at = await queue.get()
+            if self.reading_paused and queue.qsize() <= self.resume_size:
+                self.reading_paused = False
+                self.transport.resume_reading()
+            try:
+                # Ignora tópicos que não sejam /sensors/X/0 ou /sensors/X/1 (com ou sem /batch)
+                topic_info = decoder.parse_topic(topic)
+                if topic_info is None:
+                    continue
+                room_id, temp_type, is_batch = topic_info
+                if is_batch:
+                    timestamps, values = decoder.decode_batch(payload)
+                    item = (room_id, temp_type, timestamps, values, True) if len(timestamps) else None
+                else:
+                    timestamp, value = decoder.decode_payload(payload)
+                    item = (room_id, timestamp, value, temp_type)
+            except Exception as e:
+                metrics.parse_errors += 1
+                errors_logger.warning("Erro ao processar mensagem MQTT: %s", e)
+                continue
+            if received_at is not None:
+                metrics.decode.observe(time.monotonic() - received_at)
+            if item is not None:
+                await output.put((item, received_at))
+
+    async def _store_stage(self):
+        queue = self.queues["store"]
+        output = self.queues["fanout"]
+        engine = self.engine
+        metrics = engine.metrics
+        while True:
+            self._track_depth("store")
+            batch = [await queue.get()]
+            while len(batch) < self.store_batch and not queue.empty():
+                batch.append(queue.get_nowait())
+
+            if self.handoff:
+                await self._hand_off(batch)
+                continue
+
+            started_at = time.perf_counter()
+            update = engine.apply_items([item for item, _ in batch])
+            if metrics.enabled:
+                now = time.monotonic()
+                for _, received_at in batch:
+                    if received_at is not None:
+                        metrics.store.observe(now - received_at)
+                metrics.drain.observe(time.perf_counter() - started_at)
+            if update is not None:
+                await output.put(update)
+
+    async def _hand_off(self, batch):
+        """Entrega os itens à fila de ingestão do motor, aguardando (sem descartar) enquanto ela estiver cheia."""
+        ingest_queue = self.engine.ingest_queue
+        timed = self.engine.metrics.enabled
+        for item, _ in batch:
+            while ingest_queue.full():
+                await asyncio.sleep(self.handoff_poll)
+            ingest_queue.put(item, timed)
+
+    async def _fanout_stage(self):
+        queue = self.queues["fanout"]
+        while True:
+            self._track_depth("fanout")
+            self.engine.publish(await queue.get())
+
+    async def _staleness_stage(self):
+        """Verifica os prazos de sinal dos quartos mesmo sem mensagens chegando (modo sem repasse)."""
+        output = self.queues["fanout"]
+        while True:
+            await asyncio.sleep(INGEST_DRAIN_INTERVAL_MS / 1000.0)
+            update = self.engine.collect_stale()
+            if update is not None:
+                await output.put(update)
+
+    # --- Ciclo de vida ---
+
+    async def run(self):
+        """Inicia o transporte e os estágios e executa até `stop()`."""
+        self._stopped = asyncio.Event()
+        self._tasks = [
+            asyncio.create_task(self._decode_stage(), name="decode"),
+            asyncio.create_task(self._store_stage(), name="store"),
+            asyncio.create_task(self._fanout_stage(), name="fanout"),
+        ]
+        if not self.handoff:
+            self._tasks.append(asyncio.create_task(self._staleness_stage(), name="staleness"))
+        await self.transport.start(self._on_transport_message)
+        try:
+            await self._stopped.wait()
+        finally:
+            await self.transport.stop()
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stop(self):
+        """Encerra `run()` (deve ser chamado na thread do laço; de outra thread, use `call_soon_threadsafe`)."""
+        if self._stopped is not None:
+            self._stopped.set()
+
+    async def wait_idle(self):
+        """Aguarda até que o transporte e todas as filas estejam vazios (usado em testes e benchmarks)."""
+        pending = getattr(self.transport, "pending", lambda: 0)
+        while pending() or any(queue.qsize() for queue in self.queues.values()):
+            await asyncio.sleep(0.001)
+        await asyncio.sleep(0)
+
+    def stats(self):
+        """Profundidade atual e máxima de cada fila e contadores de contrapressão."""
+        return {
+            "queues": {stage: {"depth": queue.qsize(), "max_depth": self.max_depths[stage], "maxsize": queue.maxsize}
+                       for stage, queue in self.queues.items()},
+            "reading_paused": self.reading_paused,
+            "read_pauses": self.read_pauses,
+            "dropped": self.dropped,
+        }
+
+
+class AsyncIngestClient:
+    """
+    Executa um AsyncIngestPipeline com transporte paho em uma thread própria, com a mesma interface
+    de ciclo de vida de `MQTTTemperatureClient` (`connect_and_loop` e `disconnect`).
+    """
+
+    def __init__(self, engine, handoff=True, broker=MQTT_BROKER, port=MQTT_PORT, topic=MQTT_TOPIC,
+                 codec=MQTT_PAYLOAD_CODEC, **pipeline_options):
+        """
+        Args:
+            engine: MonitorEngine que recebe as leituras
+            handoff: True com a GUI (o motor é usado pela thread do Tk); False no modo headless
+            broker, port, topic, codec: Parâmetros de conexão e do codec de payload
+            pipeline_options: Demais argumentos de AsyncIngestPipeline
+        """
+        self.engine = engine
+        self.handoff = handoff
+        self._transport_args = (broker, port, topic)
+        self._codec = codec
+        self._pipeline_options = pipeline_options
+        self.pipeline = None
+        self._loop = None
+        self._thread = None
+
+    def connect_and_loop(self):
+        """Inicia o laço do asyncio em uma thread e aguarda a conexão (erros de conexão são propagados)."""
+        started = threading.Event()
+        errors = []
+
+        async def main():
+            self._loop = asyncio.get_running_loop()
+            self.pipeline = AsyncIngestPipeline(self.engine, PahoAsyncTransport(*self._transport_args),
+                                                codec=self._codec, handoff=self.handoff,
+                                                **self._pipeline_options)
+            run = asyncio.create_task(self.pipeline.run())
+            await asyncio.sleep(0)  # Deixa `run` iniciar o transporte
+            if run.done():
+                run.result()  # Propaga o erro de conexão
+            started.set()
+            await run
+
+        def target():
+            try:
+                asyncio.run(main())
+            except Exception as e:
+                errors.append(e)
+                started.set()
+
+        self._thread = threading.Thread(target=target, name="AsyncIngest", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+
+    def disconnect(self):
+        if self._loop is not None and self._thread.is_alive():
+            self._loop.call_soon_threadsafe(self.pipeline.stop)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
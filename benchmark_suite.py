@@ -0,0 +1,468 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks dos caminhos críticos do monitor de temperatura.
+
+Mede, de forma repetível, o parse de tópico e payload em `on_message`, a inserção de leituras
+com 10, 1.000 e 10.000 quartos, a visualização "Todos os Quartos" (`update_display`), o painel
+de resumo (`update_current_temps_display`) e o tempo de renderização do gráfico de um quarto
+(`_plot_room_temperatures`). Os resultados são gravados em JSON e podem ser comparados com uma
+linha de base, indicando a variação percentual de cada benchmark.
+
+Exemplos:
+    python benchmark_suite.py --save-baseline                 # grava benchmark_baseline.json
+    python benchmark_suite.py                                 # compara com a linha de base
+    python benchmark_suite.py -k on_message --rounds 15
+    python benchmark_suite.py --xvfb --fail-on-regression     # em CI, sem display
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+
+from config import TEMP_TYPE_ENVIRONMENT, TEMP_TYPE_REFERENCE
+from load_generator import LoadGenerator
+from metrics import Metrics
+from monitor_engine import MonitorEngine
+from mqtt_client import MQTTTemperatureClient
+
+DEFAULT_RESULTS_PATH = "benchmark_results.json"
+DEFAULT_BASELINE_PATH = "benchmark_baseline.json"
+ROOM_COUNTS = (10, 1000, 10000)
+
+# Registro dos benchmarks: (nome, precisa da GUI, função de preparação)
+BENCHMARKS = []
+
+
+def benchmark(name, gui=False):
+    """
+    Registra uma função de preparação como benchmark.
+
+    A função recebe o contexto (com `root` quando `gui=True`) e retorna a operação a ser
+    medida, sem argumentos; tudo o que ela faz antes do `return` fica fora da medição.
+    """
+    def register(setup):
+        BENCHMARKS.append((name, gui, setup))
+        return setup
+    return register
+
+
+class BenchContext:
+    """Recursos compartilhados entre os benchmarks (janela do Tk, quando disponível)."""
+
+    def __init__(self, root=None):
+        self.root = root
+
+
+def populated_engine(rooms, readings_per_room=None):
+    """
+    Cria um motor com `rooms` quartos, cada um com os buffers de ambiente cheios e uma
+    referência, como em regime permanente.
+    """
+    engine = MonitorEngine(log_readings=False)
+    readings = readings_per_room or engine.store.capacity
+    now = time.time()
+    timestamps = [now - readings + index for index in range(readings)]
+    for index in range(rooms):
+        room_id = str(100 + index)
+        values = [21.0 + (index % 7) * 0.5 + (step % 3) * 0.2 for step in range(readings)]
+        engine.enqueue_batch(room_id, TEMP_TYPE_REFERENCE, [now - readings - 1], [22.0])
+        engine.enqueue_batch(room_id, TEMP_TYPE_ENVIRONMENT, timestamps, values)
+        if engine.ingest_queue.stats()["depth"] >= engine.max_batch:
+            engine.process_pending()
+    while engine.process_pending() is not None:
+        pass
+    return engine
+
+
+def reading_stream(engine, rooms):
+    """Gera leituras de ambiente em rodízio pelos quartos, com timestamps sempre crescentes."""
+    room_ids = [str(100 + index) for index in range(rooms)]
+    clock = [time.time()]
+    position = [0]
+
+    def next_reading():
+        index = position[0]
+        position[0] = index + 1 if index + 1 < rooms else 0
+        clock[0] += 0.001
+        return room_ids[index], clock[0], 21.0 + (index % 11) * 0.3
+    return next_reading
+
+
+# --- Parse de mensagens ---
+
+def _on_message_benchmark(batch_size, codec, metrics=False):
+    def setup(context):
+        generator = LoadGenerator(rooms=1000, batch_size=batch_size, codec=codec, seed=1)
+        messages = [generator.make_message() for _ in range(4096)]
+        client = MQTTTemperatureClient(
+            broker=None, port=None, topic=None,
+            on_new_data_callback=lambda room_id, timestamp, value, temp_type: None,
+            on_new_batch_callback=lambda room_id, temp_type, timestamps, values: None,
+            metrics=Metrics(enabled=True) if metrics else None,
+        )
+        on_message = client.on_message
+        position = [0]
+
+        def run():
+            index = position[0]
+            position[0] = (index + 1) & 4095
+            on_message(None, None, messages[index])
+        return run
+    return setup
+
+
+for _codec in ("json", "struct"):
+    benchmark(f"on_message[{_codec}]")(_on_message_benchmark(1, _codec))
+    benchmark(f"on_message[{_codec},batch=10]")(_on_message_benchmark(10, _codec))
+    benchmark(f"on_message[{_codec},metrics]")(_on_message_benchmark(1, _codec, metrics=True))
+
+
+# --- Inserção de leituras ---
+
+def _add_reading_benchmark(rooms, gui):
+    def setup(context):
+        engine = populated_engine(rooms)
+        if gui:
+            from gui import TemperatureMonitorGUI
+
+            monitor = TemperatureMonitorGUI(context.root, engine)
+            add = monitor.add_temperature_data
+        else:
+            add = engine.add_reading
+        next_reading = reading_stream(engine, rooms)
+
+        def run():
+            room_id, timestamp, value = next_reading()
+            add(room_id, timestamp, value, TEMP_TYPE_ENVIRONMENT)
+        return run
+    return setup
+
+
+for _rooms in ROOM_COUNTS:
+    benchmark(f"engine.add_reading[rooms={_rooms}]")(_add_reading_benchmark(_rooms, gui=False))
+    benchmark(f"gui.add_temperature_data[rooms={_rooms}]", gui=True)(_add_reading_benchmark(_rooms, gui=True))
+
+
+@benchmark("engine.process_pending[rooms=1000,batch=5000]")
+def _process_pending(context):
+    engine = populated_engine(1000)
+    next_reading = reading_stream(engine, 1000)
+
+    def run():
+        for _ in range(engine.max_batch):
+            room_id, timestamp, value = next_reading()
+            engine.enqueue_reading(room_id, timestamp, value, TEMP_TYPE_ENVIRONMENT)
+        engine.process_pending()
+    return run
+
+
+# --- Views da GUI ---
+
+def _gui_with_rooms(context, rooms):
+    """Cria a GUI sobre um motor populado, já desenhada uma vez na janela."""
+    from gui import TemperatureMonitorGUI
+
+    engine = populated_engine(rooms)
+    monitor = TemperatureMonitorGUI(context.root, engine)
+    monitor._update_room_selector()
+    monitor.update_display()
+    context.root.update()
+    return monitor
+
+
+def _update_display_benchmark(rooms, changed):
+    def setup(context):
+        monitor = _gui_with_rooms(context, rooms)
+        next_reading = reading_stream(monitor.engine, rooms)
+        all_rooms = monitor.room_temperatures.room_ids()
+
+        def run():
+            if changed == "all":
+                monitor.all_rooms_view.mark_dirty(all_rooms)
+            else:
+                room_id, timestamp, value = next_reading()
+                monitor.engine.add_reading(room_id, timestamp, value, TEMP_TYPE_ENVIRONMENT)
+            monitor.update_display()
+        return run
+    return setup
+
+
+benchmark("gui.update_display[all_rooms,rooms=1000,changed=1]", gui=True)(_update_display_benchmark(1000, 1))
+benchmark("gui.update_display[all_rooms,rooms=1000,changed=all]", gui=True)(_update_display_benchmark(1000, "all"))
+
+
+def _current_temps_benchmark(rooms, changed):
+    def setup(context):
+        monitor = _gui_with_rooms(context, rooms)
+        all_rooms = list(monitor.room_temperatures.room_ids())
+        monitor.render_scheduler.offer(all_rooms)
+        while len(monitor.render_scheduler):
+            monitor._apply_current_temps_update()
+        next_reading = reading_stream(monitor.engine, rooms)
+
+        def run():
+            if changed == "all":
+                monitor.render_scheduler.offer(all_rooms)
+            else:
+                room_id, timestamp, value = next_reading()
+                monitor.engine.add_reading(room_id, timestamp, value, TEMP_TYPE_ENVIRONMENT)
+            # update_current_temps_display agenda este passo com `after`; aqui ele é medido diretamente
+            monitor._apply_current_temps_update()
+        return run
+    return setup
+
+
+benchmark("gui.update_current_temps_display[rooms=1000,changed=1]", gui=True)(_current_temps_benchmark(1000, 1))
+benchmark("gui.update_current_temps_display[rooms=1000,changed=all]", gui=True)(_current_temps_benchmark(1000, "all"))
+
+
+def _plot_benchmark(readings, create):
+    def setup(context):
+        from gui import TemperatureMonitorGUI
+
+        engine = MonitorEngine(capacity=readings, log_readings=False)
+        now = time.time()
+        timestamps = list(now - readings + np.arange(readings, dtype=np.float64))
+        values = list(21.0 + np.sin(np.arange(readings) / 50.0))
+        engine.enqueue_batch("101", TEMP_TYPE_REFERENCE, [now - readings - 1], [22.0])
+        engine.enqueue_batch("101", TEMP_TYPE_ENVIRONMENT, timestamps, values)
+        engine.process_pending()
+        monitor = TemperatureMonitorGUI(context.root, engine)
+        monitor.selected_room.set("101")
+        monitor._plot_room_temperatures("101")
+        context.root.update()
+        next_reading = reading_stream(engine, 1)
+
+        def run():
+            if create:
+                monitor._clear_display_frame()
+            else:
+                room_id, timestamp, value = next_reading()
+                engine.add_reading("101", timestamp, value, TEMP_TYPE_ENVIRONMENT)
+            monitor._plot_room_temperatures("101")
+            # Renderização síncrona no lugar do draw_idle, para medir o quadro completo
+            monitor.room_chart.canvas.draw()
+        return run
+    return setup
+
+
+for _readings in (10, 10000):
+    benchmark(f"gui._plot_room_temperatures[readings={_readings},update]", gui=True)(_plot_benchmark(_readings, False))
+benchmark("gui._plot_room_temperatures[readings=10000,create]", gui=True)(_plot_benchmark(10000, True))
+
+
+# --- Medição ---
+
+def calibrate(run, min_time):
+    """Número de execuções por rodada para que cada rodada dure ao menos `min_time` segundos."""
+    iterations = 1
+    while True:
+        started_at = time.perf_counter()
+        for _ in range(iterations):
+            run()
+        elapsed = time.perf_counter() - started_at
+        if elapsed >= min_time or iterations >= 1 << 20:
+            return iterations
+        iterations *= 2 if elapsed <= 0 else max(2, min(10, int(min_time / elapsed) + 1))
+
+
+def measure(run, rounds, min_time, warmup=1):
+    """
+    Mede `run` em `rounds` rodadas de duração mínima `min_time`, com o coletor de lixo desligado.
+
+    Returns:
+        dict: Estatísticas do tempo por execução, em microssegundos
+    """
+    for _ in range(warmup):
+        run()
+    iterations = calibrate(run, min_time)
+    samples = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            started_at = time.perf_counter()
+            for _ in range(iterations):
+                run()
+            samples.append((time.perf_counter() - started_at) / iterations * 1e6)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        "unit": "us",
+        "min": min(samples),
+        "median": statistics.median(samples),
+        "mean": statistics.fmean(samples),
+        "stdev": statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        "rounds": rounds,
+        "iterations": iterations,
+    }
+
+
+def open_tk_root(use_xvfb):
+    """Cria a janela do Tk usada pelos benchmarks da GUI, ou None se não houver display."""
+    if use_xvfb and not os.environ.get("DISPLAY"):
+        from benchmark_throughput import start_xvfb
+
+        start_xvfb()
+    import tkinter as tk
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        print(f"Benchmarks da GUI ignorados: {e}")
+        return None
+    root.geometry("1400x900")
+    return root
+
+
+def reset_tk_root(root):
+    """Remove os widgets do benchmark anterior e processa os eventos pendentes."""
+    for child in root.winfo_children():
+        child.destroy()
+    for after_id in root.tk.call("after", "info"):
+        root.after_cancel(after_id)
+    root.update()
+
+
+def run_suite(args):
+    selected = [entry for entry in BENCHMARKS if not args.filter or any(f in entry[0] for f in args.filter)]
+    if args.no_gui:
+        selected = [entry for entry in selected if not entry[1]]
+
+    root = open_tk_root(args.xvfb) if any(gui for _, gui, _ in selected) else None
+    context = BenchContext(root)
+    results = {}
+    for name, gui, setup in selected:
+        if gui and root is None:
+            continue
+        if gui:
+            reset_tk_root(root)
+        run = setup(context)
+        gc.collect()
+        results[name] = measure(run, args.rounds, args.min_time)
+        print(f"  {name:<60} {format_time(results[name]['median']):>12}  "
+              f"(±{results[name]['stdev'] / results[name]['median'] * 100:.1f}%)", flush=True)
+        del run
+    if root is not None:
+        root.destroy()
+    return results
+
+
+def environment_info():
+    import matplotlib
+
+    return {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "matplotlib": matplotlib.__version__,
+    }
+
+
+def format_time(microseconds):
+    if microseconds >= 1e6:
+        return f"{microseconds / 1e6:.2f} s"
+    if microseconds >= 1e3:
+        return f"{microseconds / 1e3:.2f} ms"
+    return f"{microseconds:.2f} µs"
+
+
+def compare(results, baseline, threshold):
+    """
+    Compara as medianas com as da linha de base.
+
+    Returns:
+        list: (nome, mediana da base, mediana atual, variação em %, situação) por benchmark em comum
+    """
+    rows = []
+    for name, current in results.items():
+        previous = baseline.get("benchmarks", {}).get(name)
+        if previous is None:
+            rows.append((name, None, current["median"], None, "novo"))
+            continue
+        change = (current["median"] - previous["median"]) / previous["median"] * 100.0
+        if change > threshold:
+            status = "REGRESSÃO"
+        elif change < -threshold:
+            status = "melhoria"
+        else:
+            status = "ok"
+        rows.append((name, previous["median"], current["median"], change, status))
+    return rows
+
+
+def print_comparison(rows, threshold):
+    print()
+    print(f"=== Comparação com a linha de base (limite ±{threshold:.0f}%) ===")
+    for name, previous, current, change, status in rows:
+        before = format_time(previous) if previous is not None else "-"
+        delta = f"{change:+.1f}%" if change is not None else "-"
+        print(f"  {name:<60} {before:>12} → {format_time(current):>12}  {delta:>8}  {status}")
+
+
+def parse_args():
+    """Lê as opções de linha de comando"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("-k", dest="filter", action="append", metavar="TEXTO",
+                        help="Executa apenas os benchmarks cujo nome contém TEXTO (pode repetir)")
+    parser.add_argument("--list", action="store_true", help="Lista os benchmarks e sai")
+    parser.add_argument("--rounds", type=int, default=7, help="Rodadas medidas por benchmark")
+    parser.add_argument("--min-time", type=float, default=0.05, help="Duração mínima de cada rodada (s)")
+    parser.add_argument("--output", default=DEFAULT_RESULTS_PATH, help="Arquivo JSON com os resultados")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE_PATH, help="Linha de base para a comparação")
+    parser.add_argument("--save-baseline", action="store_true", help="Grava os resultados também como linha de base")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Variação (%%) da mediana a partir da qual um benchmark é uma regressão")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Sai com código 1 se houver regressões")
+    parser.add_argument("--no-gui", action="store_true", help="Ignora os benchmarks que precisam do Tk")
+    parser.add_argument("--xvfb", action="store_true", help="Inicia um Xvfb se não houver DISPLAY")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    if args.list:
+        for name, gui, _ in BENCHMARKS:
+            print(f"{name}{'  (GUI)' if gui else ''}")
+        return 0
+
+    print(f"Executando benchmarks ({args.rounds} rodadas de no mínimo {args.min_time * 1000:.0f} ms)...")
+    report = {"environment": environment_info(), "benchmarks": run_suite(args)}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"Resultados gravados em {args.output}")
+
+    if args.save_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"Linha de base gravada em {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"Sem linha de base em {args.baseline}; use --save-baseline para criá-la.")
+        return 0
+    with open(args.baseline, encoding="utf-8") as f:
+        baseline = json.load(f)
+    rows = compare(report["benchmarks"], baseline, args.threshold)
+    print_comparison(rows, args.threshold)
+    regressions = [row for row in rows if row[4] == "REGRESSÃO"]
+    if regressions:
+        print(f"{len(regressions)} regressão(ões) acima de {args.threshold:.0f}%.")
+    return 1 if regressions and args.fail_on_regression else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
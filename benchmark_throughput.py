@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Benchmark de ponta a ponta do monitor de temperatura.
+
+Injeta a carga do `load_generator.py` diretamente no `MQTTTemperatureClient.on_message` (sem
+broker), a partir de uma thread própria como a thread de rede do MQTT, enquanto a
+`TemperatureMonitorGUI` (ou o motor em modo headless) processa as leituras. Ao final informa a
+taxa sustentada de mensagens, os percentis de latência da ingestão até a renderização, as
+mensagens descartadas e o pico de memória (RSS).
+
+Exemplos:
+    python benchmark_throughput.py --rooms 1000 --rate 5000 --duration 30
+    python benchmark_throughput.py --rooms 10000 --rate 20000 --pattern burst --xvfb
+    python benchmark_throughput.py --headless --rate 50000 --json resultado.json
+"""
+
+import argparse
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import numpy as np
+
+from load_generator import LoadGenerator
+from monitor_engine import MonitorEngine
+from mqtt_client import MQTTTemperatureClient
+
+
+class LatencyRecorder:
+    """
+    Mede a latência da ingestão até a renderização sem instrumentar cada mensagem.
+
+    O produtor registra marcos (instante, total de itens aceitos na fila) ao fim de cada rodada
+    de geração; o consumidor registra (instante, total de itens drenados) quando o lote
+    correspondente termina de ser renderizado. Como a fila é FIFO, cada mensagem de um marco do
+    produtor é atribuída ao primeiro marco do consumidor que a cobre.
+    """
+
+    def __init__(self):
+        self.produced = []  # (instante, total aceito na fila)
+        self.rendered = []  # (instante, total drenado)
+
+    def on_produced(self, when, total_put):
+        self.produced.append((when, total_put))
+
+    def on_rendered(self, when, total_drained):
+        self.rendered.append((when, total_drained))
+
+    def latencies(self):
+        """
+        Returns:
+            tuple: (latências em segundos, pesos em número de mensagens) como arrays do NumPy
+        """
+        latencies = []
+        weights = []
+        render_index = 0
+        previous_put = 0
+        for produced_at, total_put in self.produced:
+            remaining = total_put - previous_put
+            position = previous_put
+            previous_put = total_put
+            while remaining > 0 and render_index < len(self.rendered):
+                rendered_at, total_drained = self.rendered[render_index]
+                if total_drained <= position:
+                    render_index += 1
+                    continue
+                covered = min(remaining, total_drained - position)
+                latencies.append(max(rendered_at - produced_at, 0.0))
+                weights.append(covered)
+                remaining -= covered
+                position += covered
+        return np.array(latencies), np.array(weights)
+
+    def percentiles(self, points=(50, 90, 99, 99.9)):
+        """Percentis ponderados da latência, em milissegundos."""
+        latencies, weights = self.latencies()
+        if not len(latencies):
+            return {f"p{point:g}": None for point in points}
+        order = np.argsort(latencies)
+        latencies, weights = latencies[order], weights[order]
+        cumulative = np.cumsum(weights) / weights.sum()
+        return {
+            f"p{point:g}": float(latencies[min(np.searchsorted(cumulative, point / 100.0), len(latencies) - 1)] * 1000.0)
+            for point in points
+        }
+
+
+def start_xvfb(display=":99"):
+    """Inicia um servidor X virtual (Xvfb) e aponta DISPLAY para ele."""
+    if shutil.which("Xvfb") is None:
+        raise RuntimeError("Xvfb não encontrado; instale o pacote xvfb ou rode com um display real")
+    process = subprocess.Popen(["Xvfb", display, "-screen", "0", "1600x1000x24", "-nolisten", "tcp"],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    time.sleep(0.5)
+    if process.poll() is not None:
+        raise RuntimeError(f"Xvfb terminou ao iniciar no display {display}")
+    os.environ["DISPLAY"] = display
+    return process
+
+
+def peak_rss_bytes():
+    """Pico de memória residente do processo (ru_maxrss é em KiB no Linux, em bytes no macOS)."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def run_benchmark(args):
+    recorder = LatencyRecorder()
+    history_dir = None
+    history_writer = None
+    if args.history:
+        from history_db import HistoryWriter
+        from history_segments import SegmentWriter
+        history_dir = tempfile.mkdtemp(prefix="monitor-bench-")
+        history_writer = HistoryWriter(os.path.join(history_dir, "history.db"),
+                                       segment_writer=SegmentWriter(os.path.join(history_dir, "segments")))
+        history_writer.start()
+
+    event_log = None
+    if args.log_readings:
+        from event_log import EventLog
+
+        # Mesmo caminho de log da aplicação (fila e limites por categoria), sem auditoria em disco
+        event_log = EventLog(audit_path=None)
+        event_log.start()
+
+    engine = MonitorEngine(log_readings=args.log_readings, history_writer=history_writer)
+    generator = LoadGenerator(
+        rooms=args.rooms, rate=args.rate, pattern=args.pattern, burst_factor=args.burst_factor,
+        burst_period=args.burst_period, burst_duration=args.burst_duration,
+        batch_size=args.batch_size, codec=args.codec, seed=args.seed
+    )
+    client = MQTTTemperatureClient(
+        broker=None, port=None, topic=None,
+        on_new_data_callback=engine.enqueue_reading,
+        on_new_batch_callback=engine.enqueue_batch,
+        metrics=engine.metrics,
+    )
+    queue = engine.ingest_queue
+
+    def inject(message):
+        client.on_message(None, None, message)
+
+    stop_event = threading.Event()
+    producer = threading.Thread(
+        target=generator.run,
+        args=(inject, args.duration),
+        kwargs={"stop_event": stop_event, "on_tick": lambda now, sent: recorder.on_produced(now, queue.total_put)},
+        name="LoadGenerator",
+        daemon=True,
+    )
+
+    xvfb = None
+    started_at = time.monotonic()
+    try:
+        if args.headless:
+            from headless import HeadlessMonitor
+
+            monitor = HeadlessMonitor(engine=engine, alert_output=open(os.devnull, "w"))
+            engine.subscribe(lambda update: recorder.on_rendered(time.monotonic(), queue.total_drained))
+            stopper = threading.Timer(args.duration + args.grace, monitor.stop)
+            producer.start()
+            stopper.start()
+            monitor.run()
+        else:
+            if args.xvfb and not os.environ.get("DISPLAY"):
+                xvfb = start_xvfb()
+            import tkinter as tk
+            from gui import TemperatureMonitorGUI
+
+            root = tk.Tk()
+            gui = TemperatureMonitorGUI(root, engine)
+
+            def on_update(update):
+                # Inscrito depois da GUI: este after_idle roda após as atualizações agendadas por ela
+                drained = queue.total_drained
+                root.after_idle(lambda: recorder.on_rendered(time.monotonic(), drained))
+
+            engine.subscribe(on_update)
+            gui.update_display()
+            root.after(0, producer.start)
+            root.after(int((args.duration + args.grace) * 1000), root.quit)
+            root.mainloop()
+            root.destroy()
+    finally:
+        stop_event.set()
+        elapsed = min(time.monotonic() - started_at, args.duration)
+        if history_writer is not None:
+            history_writer.stop()
+            shutil.rmtree(history_dir, ignore_errors=True)
+        if xvfb is not None:
+            xvfb.terminate()
+        if event_log is not None:
+            event_log.stop()
+
+    stats = queue.stats()
+    rejected = generator.messages_sent - stats["total_put"] - stats["dropped"]
+    return {
+        "mode": "headless" if args.headless else "gui",
+        "rooms": args.rooms,
+        "target_rate": args.rate,
+        "pattern": args.pattern,
+        "batch_size": args.batch_size,
+        "codec": args.codec,
+        "duration_s": elapsed,
+        "messages_sent": generator.messages_sent,
+        "messages_processed": stats["total_drained"],
+        "sent_per_s": generator.messages_sent / elapsed if elapsed else 0.0,
+        "sustained_msgs_per_s": stats["total_drained"] / elapsed if elapsed else 0.0,
+        "readings_per_s": stats["total_drained"] * args.batch_size / elapsed if elapsed else 0.0,
+        "dropped_queue_full": stats["dropped"],
+        "rejected_by_decoder": rejected,
+        "backlog": stats["depth"],
+        "max_queue_depth": stats["max_depth"],
+        "avg_drain_ms": stats["avg_drain_ms"],
+        "max_drain_ms": stats["max_drain_ms"],
+        "latency_ms": recorder.percentiles(),
+        "peak_rss_mb": peak_rss_bytes() / (1024 * 1024),
+    }
+
+
+def print_report(result):
+    latency = result["latency_ms"]
+
+    def fmt_ms(value):
+        return f"{value:.1f} ms" if value is not None else "N/A"
+
+    print()
+    print(f"=== Benchmark de ponta a ponta ({result['mode']}) ===")
+    print(f"Quartos: {result['rooms']}  |  taxa pedida: {result['target_rate']:.0f} msg/s ({result['pattern']})  |  "
+          f"lote: {result['batch_size']}  |  codec: {result['codec']}")
+    print(f"Enviadas:            {result['messages_sent']} ({result['sent_per_s']:.0f} msg/s)")
+    print(f"Processadas:         {result['messages_processed']} ({result['sustained_msgs_per_s']:.0f} msg/s sustentadas, "
+          f"{result['readings_per_s']:.0f} leituras/s)")
+    print(f"Descartadas (fila):  {result['dropped_queue_full']}")
+    print(f"Rejeitadas (parser): {result['rejected_by_decoder']}")
+    print(f"Fila: pendentes {result['backlog']}, profundidade máx. {result['max_queue_depth']}; "
+          f"drenagem média {result['avg_drain_ms']:.1f} ms, máx. {result['max_drain_ms']:.1f} ms")
+    print("Latência ingestão→renderização: " + ", ".join(f"{name} {fmt_ms(value)}" for name, value in latency.items()))
+    print(f"Pico de RSS:         {result['peak_rss_mb']:.1f} MiB")
+
+
+def parse_args():
+    """Lê as opções de linha de comando"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=1000, help="Número de quartos simulados (até 10000 ou mais)")
+    parser.add_argument("--rate", type=float, default=5000.0, help="Mensagens por segundo")
+    parser.add_argument("--duration", type=float, default=20.0, help="Duração da geração em segundos")
+    parser.add_argument("--grace", type=float, default=2.0, help="Tempo extra para drenar a fila após a geração (s)")
+    parser.add_argument("--pattern", choices=("constant", "burst"), default="constant", help="Padrão de carga")
+    parser.add_argument("--burst-factor", type=float, default=10.0, help="Multiplicador da taxa nas rajadas")
+    parser.add_argument("--burst-period", type=float, default=10.0, help="Intervalo entre rajadas (s)")
+    parser.add_argument("--burst-duration", type=float, default=1.0, help="Duração de cada rajada (s)")
+    parser.add_argument("--batch-size", type=int, default=1, help="Leituras por mensagem (>1 usa /sensors/X/Y/batch)")
+    parser.add_argument("--codec", choices=("json", "struct"), default="json", help="Formato dos payloads")
+    parser.add_argument("--seed", type=int, default=1, help="Semente do gerador (execuções reproduzíveis)")
+    parser.add_argument("--headless", action="store_true", help="Mede apenas o motor, sem a interface gráfica")
+    parser.add_argument("--xvfb", action="store_true", help="Inicia um Xvfb se não houver DISPLAY")
+    parser.add_argument("--history", action="store_true", help="Grava o histórico (SQLite e segmentos) em um diretório temporário")
+    parser.add_argument("--log-readings", action="store_true", help="Registra cada leitura recebida no log de eventos (com os limites de LOG_RATE_LIMITS)")
+    parser.add_argument("--json", metavar="ARQUIVO", help="Grava o resultado em JSON")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_args()
+    result = run_benchmark(args)
+    print_report(result)
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
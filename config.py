@@ -2,6 +2,7 @@
 MQTT_BROKER = "localhost"
 MQTT_PORT = 1883
 MQTT_TOPIC = "/sensors/#"  # Escuta todos os sensores
+MQTT_PAYLOAD_CODEC = "auto"  # "json", "orjson", "struct" (binário) ou "auto" (orjson se instalado + detecção de binário)
 
 # --- Configurações de Dados de Temperatura ---
 MAX_TEMPS_PER_ROOM = 10  # Máximo de temperaturas de cada tipo a armazenar por quarto
@@ -10,3 +11,109 @@ ALARM_TEMP_THRESHOLD = 25.0  # Limite de alerta usado apenas quando não há tem
 # --- Configurações para Tipos de Temperatura ---
 TEMP_TYPE_ENVIRONMENT = "0"  # Y=0: Temperatura lida no ambiente
 TEMP_TYPE_REFERENCE = "1"    # Y=1: Temperatura de referência
+
+# --- Configurações da Fila de Ingestão (thread MQTT -> thread do Tk) ---
+INGEST_QUEUE_MAXSIZE = 50000    # Máximo de leituras aguardando processamento; excedentes são descartadas
+INGEST_DRAIN_INTERVAL_MS = 50   # Intervalo entre drenagens da fila na thread do Tk
+INGEST_MAX_BATCH = 5000         # Máximo de leituras aplicadas por drenagem
+
+# --- Configurações do Armazenamento em Memória (temperature_store.py) ---
+STORE_LATENESS_WINDOW_S = 3600  # Atraso máximo (s) de uma leitura em relação à mais recente do quarto; None: sem limite
+
+# --- Configurações da Ingestão em Vários Processos ---
+INGEST_WORKERS = 0                   # Processos worker de ingestão; 0 usa um único cliente MQTT no processo principal
+INGEST_SHARD_MODE = "hash"           # "hash" (quartos particionados por crc32) ou "shared" (assinatura compartilhada MQTT 5)
+INGEST_SHARED_GROUP = "temperature-monitor"  # Grupo da assinatura compartilhada ("$share/<grupo>/<tópico>")
+INGEST_WORKER_FLUSH_MS = 50          # Intervalo entre os lotes enviados por cada worker ao processo principal
+INGEST_WORKER_QUEUE_MAXSIZE = 64     # Máximo de lotes em trânsito; cheio, os workers aguardam
+
+# --- Configurações da Ingestão em asyncio (async_ingest.py) ---
+ASYNC_INGEST_QUEUE_SIZE = 10000      # Tamanho máximo da fila de entrada de cada estágio (decode, store, fanout)
+ASYNC_INGEST_BACKPRESSURE = "pause"  # Fila bruta cheia: "pause" para de ler o socket, "drop" descarta as mensagens novas
+ASYNC_INGEST_RESUME_RATIO = 0.5      # Fração da fila bruta abaixo da qual a leitura pausada é retomada
+ASYNC_INGEST_HANDOFF_POLL_MS = 5     # Espera entre tentativas de repasse com a fila de ingestão da GUI cheia
+
+# --- Configurações dos Agregados por Resolução (min, max, média, contagem, tempo acima da referência) ---
+ROLLUP_TIERS = (     # (resolução em segundos, número de intervalos retidos), da mais fina à mais grossa
+    (60, 360),       # 1 min por 6 horas
+    (900, 672),      # 15 min por 7 dias
+    (3600, 720),     # 1 h por 30 dias
+)
+ALL_ROOMS_SUMMARY_RANGE_S = 3600  # Período resumido no bloco de cada quarto em "Todos os Quartos"
+
+# --- Configurações da Política de Sobrecarga da Interface (render_policy.py) ---
+RENDER_POLICY = "coalesce"          # "coalesce" (último valor de cada quarto por quadro) ou "rate_limit" (idem, com intervalo mínimo por quarto)
+RENDER_MAX_ROOMS_PER_FRAME = 500    # Máximo de linhas do resumo recalculadas por quadro (0: sem limite)
+RENDER_ROOM_MIN_INTERVAL_S = 1.0    # Intervalo mínimo entre desenhos de um mesmo quarto ("rate_limit")
+RENDER_ALERT_PRIORITY = True        # Quartos em alerta são desenhados antes dos demais
+RENDER_FRAME_BUDGET_MS = 30         # Tempo máximo gasto em um quadro do resumo; o restante fica para o próximo
+RENDER_FRAME_INTERVAL_MS = 100      # Intervalo entre quadros do resumo
+
+# --- Configurações da Seleção de Quartos ---
+ROOM_SELECTOR_MAX_VALUES = 200  # Máximo de quartos listados no combobox (os que correspondem ao filtro)
+
+# --- Configurações do Gráfico ---
+CHART_DOWNSAMPLING = "minmax"     # "minmax" (mínimo/máximo por pixel, incremental) ou "lttb"
+CHART_MARKER_MAX_POINTS = 200     # Acima deste número de pontos as linhas são desenhadas sem marcadores
+CHART_PREWARM_DELAY_MS = 500      # Importa o Matplotlib em segundo plano após o primeiro desenho; None: só ao abrir um gráfico
+CHART_HISTORY_MAX_RANGE_S = 86400  # Períodos até este tamanho usam as leituras dos segmentos; maiores, os agregados
+CHART_RANGE_OPTIONS = (           # Períodos do seletor do gráfico (None: leituras em memória)
+    ("Leituras recentes", None),
+    ("Última hora", 3600),
+    ("Últimas 6 horas", 6 * 3600),
+    ("Último dia", 86400),
+    ("Última semana", 7 * 86400),
+    ("Últimos 30 dias", 30 * 86400),
+)
+
+# --- Configurações do Sistema de Alertas ---
+ALERT_HYSTERESIS = 0.0        # Margem (°C) abaixo da referência necessária para sair do alerta
+ALERT_MIN_DURATION_S = 0.0    # Tempo mínimo (s) que a condição deve persistir antes de mudar o status
+
+# --- Configurações da Detecção de Sensores sem Sinal ---
+STALE_TIMEOUT_ENVIRONMENT_S = 300   # Segundos sem temperatura ambiente até o quarto ficar sem sinal (None desativa)
+STALE_TIMEOUT_REFERENCE_S = 3600    # Idem para a temperatura de referência, enviada com menos frequência
+
+# --- Configurações do Histórico em Disco (SQLite em modo WAL) ---
+HISTORY_DB_PATH = "temperature_history.db"  # None desativa a gravação do histórico
+HISTORY_BATCH_SIZE = 2000        # Máximo de linhas por transação
+HISTORY_FLUSH_INTERVAL_MS = 200  # Intervalo máximo entre gravações
+HISTORY_QUEUE_MAXSIZE = 500000   # Máximo de linhas aguardando gravação; excedentes são descartadas
+HISTORY_RETRY_ATTEMPTS = 3       # Novas tentativas de um lote após erro transitório do SQLite (bloqueio, disco cheio)
+HISTORY_RETRY_DELAY_MS = 100     # Espera antes da primeira nova tentativa (dobra a cada tentativa)
+
+# --- Configurações dos Segmentos de Histórico (arquivos colunares mapeados em memória) ---
+HISTORY_SEGMENTS_DIR = "history_segments"   # Um arquivo por quarto/tipo/dia; None desativa
+HISTORY_SEGMENT_INITIAL_CAPACITY = 86400    # Leituras por arquivo antes de dobrar (arquivo esparso)
+HISTORY_SEGMENTS_MAX_OPEN = 256             # Segmentos mapeados ao mesmo tempo (mínimo do escritor, que cresce até um por quarto/tipo)
+HISTORY_SEGMENTS_FD_RESERVE = 512           # Descritores de arquivo deixados livres para sockets, SQLite e leitores
+HISTORY_SEGMENTS_BACKFILL_DAYS = 30         # Dias de histórico usados para reconstruir os agregados (em segundo plano)
+
+# --- Configurações do Log de Eventos (event_log.py) ---
+LOG_LEVEL = "INFO"            # Nível mínimo dos registros da hierarquia "monitor"
+LOG_FILE = None               # Arquivo de texto para os registros; None escreve no terminal
+LOG_QUEUE_MAXSIZE = 10000     # Máximo de registros aguardando a thread de escrita; excedentes são descartados
+LOG_RATE_LIMITS = {             # Registros por segundo aceitos em cada categoria (nome exato do logger)
+    "monitor.readings": 20,     # Cada leitura recebida (GUI)
+    "monitor.mqtt.errors": 5,   # Erros de decodificação das mensagens MQTT
+}
+LOG_SAMPLING = {}             # Fração dos registros mantida por categoria, ex.: {"monitor.readings": 0.01}
+ALERT_AUDIT_PATH = "alert_audit.jsonl"  # Mudanças de status de alerta em JSON lines; None desativa
+ALERT_AUDIT_MAX_BYTES = 10 * 1024 * 1024  # Tamanho do arquivo de auditoria antes da rotação
+ALERT_AUDIT_BACKUP_COUNT = 5            # Arquivos de auditoria antigos mantidos
+
+# --- Configurações dos Snapshots de Estado (snapshot.py) ---
+SNAPSHOT_PATH = "monitor_state.snap"  # Buffers, referências e alertas restaurados na inicialização; None desativa
+SNAPSHOT_INTERVAL_S = 60              # Intervalo mínimo entre snapshots (gravados apenas quando há leituras novas)
+SNAPSHOT_MAX_AGE_S = 86400            # Snapshots mais antigos que isto são ignorados na inicialização
+
+# --- Configurações de Métricas e Instrumentação ---
+METRICS_ENABLED = True            # Estado inicial da instrumentação de latência (alternável em tempo de execução)
+METRICS_HTTP_HOST = "127.0.0.1"   # O endpoint Prometheus só escuta localmente
+METRICS_HTTP_PORT = 9108          # Porta do endpoint /metrics; None desativa
+METRICS_PANEL_INTERVAL_MS = 1000  # Intervalo de atualização do painel de desempenho da GUI
+METRICS_LATENCY_BUCKETS = (       # Limites superiores (s) dos intervalos dos histogramas de latência
+    25e-6, 50e-6, 100e-6, 250e-6, 500e-6,
+    1e-3, 2.5e-3, 5e-3, 10e-3, 25e-3, 50e-3, 100e-3, 250e-3, 500e-3,
+    1.0, 2.5, 5.0, 10.0,
+)
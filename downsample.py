@@ -0,0 +1,180 @@
+import math
+
+import numpy as np
+
+
+def minmax_buckets(x, y, edges):
+    """
+    Reduz cada intervalo [edges[i], edges[i+1]) ao ponto de menor e ao de maior valor.
+
+    Args:
+        x: Array ordenado de coordenadas (timestamps)
+        y: Array de valores
+        edges: Limites internos dos intervalos, em ordem crescente
+
+    Returns:
+        numpy.ndarray: Índices dos pontos selecionados, em ordem crescente
+    """
+    n = len(x)
+    if n == 0:
+        return np.empty(0, dtype=np.intp)
+
+    # Início de cada intervalo não vazio
+    starts = np.unique(np.concatenate(([0], np.searchsorted(x, edges))))
+    starts = starts[starts < n]
+    counts = np.diff(np.append(starts, n))
+    bucket_of = np.repeat(np.arange(len(starts)), counts)
+
+    mins = np.minimum.reduceat(y, starts)
+    maxs = np.maximum.reduceat(y, starts)
+
+    # Primeiro índice de cada intervalo em que o mínimo/máximo ocorre
+    positions = np.arange(n)
+    min_idx = np.minimum.reduceat(np.where(y == mins[bucket_of], positions, n), starts)
+    max_idx = np.minimum.reduceat(np.where(y == maxs[bucket_of], positions, n), starts)
+
+    return np.unique(np.concatenate((min_idx, max_idx)))
+
+
+def minmax_downsample(x, y, max_points):
+    """
+    Reduz a série para no máximo `max_points` pontos mantendo o mínimo e o máximo de cada
+    intervalo de tempo (um intervalo por par de pixels), preservando picos e vales.
+
+    Returns:
+        tuple: (x, y) reduzidos
+    """
+    n = len(x)
+    if n <= max_points or n < 3:
+        return x, y
+    buckets = max(1, (max_points - 2) // 2)
+    edges = np.linspace(x[0], x[-1], buckets + 1)[1:-1]
+    selected = np.union1d(minmax_buckets(x, y, edges), (0, n - 1))
+    return x[selected], y[selected]
+
+
+def lttb(x, y, max_points):
+    """
+    Largest-Triangle-Three-Buckets: escolhe em cada intervalo o ponto que forma o maior
+    triângulo com o ponto escolhido no intervalo anterior e a média do intervalo seguinte.
+    O cálculo das áreas de cada intervalo é vetorizado.
+
+    Returns:
+        tuple: (x, y) reduzidos
+    """
+    n = len(x)
+    if n <= max_points or max_points < 3:
+        return x, y
+
+    bucket_size = (n - 2) / (max_points - 2)
+    selected = np.empty(max_points, dtype=np.intp)
+    selected[0] = 0
+    selected[-1] = n - 1
+
+    # Limites (em índices) de cada intervalo interno e médias dos intervalos
+    bounds = (np.arange(max_points - 1) * bucket_size).astype(np.intp) + 1
+    bounds[-1] = n - 1
+    sums_x = np.add.reduceat(x[1:n - 1], bounds[:-1] - 1)
+    sums_y = np.add.reduceat(y[1:n - 1], bounds[:-1] - 1)
+    sizes = np.diff(bounds)
+    avg_x = np.append(sums_x / sizes, x[n - 1])
+    avg_y = np.append(sums_y / sizes, y[n - 1])
+
+    previous = 0
+    for bucket in range(max_points - 2):
+        start, end = bounds[bucket], bounds[bucket + 1]
+        ax, ay = x[previous], y[previous]
+        cx, cy = avg_x[bucket + 1], avg_y[bucket + 1]
+        areas = np.abs((ax - cx) * (y[start:end] - ay) - (ax - x[start:end]) * (cy - ay))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+
+    return x[selected], y[selected]
+
+
+class MinMaxDownsampler:
+    """
+    Redução min/max incremental para séries que crescem no fim.
+
+    Os intervalos são alinhados a uma grade absoluta de largura potência de dois (em unidades
+    de x), escolhida para caber em `max_points`. Os pontos dos intervalos completos ficam em
+    cache; a cada chamada só são recalculados o primeiro intervalo (que pode ter perdido
+    amostras antigas) e os intervalos a partir do último completo. Se o número de amostras de
+    algum intervalo em cache mudou (leituras atrasadas), o cache é descartado.
+    """
+
+    def __init__(self, max_points):
+        self.max_points = max_points
+        self.invalidate()
+
+    def invalidate(self):
+        """Descarta os intervalos em cache."""
+        self._width = None
+        self._cached_end = None  # Limite superior (x) do trecho em cache
+        self._bucket_starts = np.empty(0)  # Início (x) de cada intervalo em cache
+        self._bucket_counts = np.empty(0, dtype=np.intp)  # Amostras de cada intervalo em cache
+        self._cached_x = np.empty(0)
+        self._cached_y = np.empty(0)
+
+    def __call__(self, x, y):
+        n = len(x)
+        if n <= self.max_points or n < 3:
+            self.invalidate()
+            return x, y
+
+        # Reserva espaço para o intervalo extra do alinhamento à grade e para as extremidades
+        buckets = max(1, (self.max_points - 2) // 2 - 1)
+        span = max(float(x[-1] - x[0]), 1e-9)
+        width = 2.0 ** math.ceil(math.log2(span / buckets))
+
+        # Trecho reaproveitável: do segundo intervalo até o último intervalo completo
+        reuse_start = (math.floor(x[0] / width) + 1) * width
+        last_bucket = math.floor(x[-1] / width)
+        reuse_end = last_bucket * width
+
+        if width != self._width or self._cached_end is None:
+            self.invalidate()
+            self._width = width
+        else:
+            keep = self._bucket_starts >= reuse_start
+            lo, hi = np.searchsorted(x, (reuse_start, self._cached_end))
+            if hi - lo != self._bucket_counts[keep].sum() or (
+                    len(self._bucket_starts) and self._bucket_starts[0] > reuse_start):
+                self.invalidate()
+                self._width = width
+            else:
+                # Mantém apenas os intervalos em cache que ainda estão dentro da janela
+                point_keep = self._cached_x >= reuse_start
+                self._cached_x = self._cached_x[point_keep]
+                self._cached_y = self._cached_y[point_keep]
+                self._bucket_starts = self._bucket_starts[keep]
+                self._bucket_counts = self._bucket_counts[keep]
+
+        cached_end = self._cached_end if self._cached_end is not None else reuse_start
+
+        # Primeiro intervalo (parcial) e intervalos novos a partir do fim do cache
+        head_end = np.searchsorted(x, reuse_start)
+        tail_start = np.searchsorted(x, cached_end)
+        head_x, head_y = x[:head_end], y[:head_end]
+        tail_x, tail_y = x[tail_start:], y[tail_start:]
+
+        head_sel = np.union1d(minmax_buckets(head_x, head_y, np.empty(0)), (0,))
+        first_tail_bucket = math.floor(cached_end / width)
+        tail_edges = np.arange(first_tail_bucket + 1, last_bucket + 1) * width
+        tail_sel = np.union1d(minmax_buckets(tail_x, tail_y, tail_edges), (len(tail_x) - 1,))
+        out_x = np.concatenate((head_x[head_sel], self._cached_x, tail_x[tail_sel]))
+        out_y = np.concatenate((head_y[head_sel], self._cached_y, tail_y[tail_sel]))
+
+        # Guarda os intervalos novos que já estão completos
+        if reuse_end > cached_end:
+            complete = tail_x[tail_sel] < reuse_end
+            self._cached_x = np.concatenate((self._cached_x, tail_x[tail_sel][complete]))
+            self._cached_y = np.concatenate((self._cached_y, tail_y[tail_sel][complete]))
+            new_starts = np.arange(first_tail_bucket, last_bucket) * width
+            new_counts = np.diff(np.searchsorted(tail_x, np.append(new_starts, reuse_end)))
+            self._bucket_starts = np.concatenate((self._bucket_starts, new_starts))
+            self._bucket_counts = np.concatenate((self._bucket_counts, new_counts))
+            self._cached_end = reuse_end
+        else:
+            self._cached_end = cached_end
+        return out_x, out_y
@@ -0,0 +1,286 @@
+"""
+Log de eventos fora do caminho crítico da ingestão.
+
+Os módulos registram mensagens em loggers da hierarquia "monitor" (`logging.getLogger("monitor.mqtt")`,
+etc.). Com `EventLog.start()`, esses registros passam por:
+
+- limites por categoria (`CategoryLogger`, para as mensagens de alto volume): amostragem de 1 a
+  cada N registros e taxa máxima por segundo (balde de fichas), verificados antes de o registro ser
+  criado; os suprimidos são contados e o próximo registro aceito informa quantos foram omitidos;
+- uma fila limitada (`QueueHandler`): a thread que registra nunca escreve em terminal ou arquivo, e
+  com a fila cheia o registro é descartado e contado em vez de bloquear;
+- uma thread de escrita (`QueueListener`), onde as mensagens são formatadas (os argumentos são
+  interpolados só aqui, inclusive a conversão de timestamps em texto) e escritas.
+
+As mudanças de status de alerta vão para um arquivo de auditoria em JSON lines com rotação por tamanho
+(`audit_alert_events`). Elas não passam pela fila limitada nem pelos limites por categoria: o logger
+de auditoria tem uma fila sem limite e uma thread de escrita próprias, então nenhum registro de
+auditoria é descartado, mesmo com a fila dos demais registros cheia.
+"""
+
+import json
+import logging
+import queue
+import sys
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+from config import LOG_LEVEL, LOG_FILE, LOG_QUEUE_MAXSIZE, LOG_RATE_LIMITS, LOG_SAMPLING
+from config import ALERT_AUDIT_PATH, ALERT_AUDIT_MAX_BYTES, ALERT_AUDIT_BACKUP_COUNT
+from temperature_store import from_epoch
+
+ROOT_LOGGER = "monitor"
+AUDIT_LOGGER = "monitor.audit"
+
+audit_logger = logging.getLogger(AUDIT_LOGGER)
+
+_limiters = {}  # categoria -> CategoryLimiter, preenchido por `EventLog.start()`
+
+
+class EpochTime:
+    """Timestamp (segundos desde a época) convertido em texto apenas quando a mensagem é formatada."""
+
+    __slots__ = ("epoch",)
+
+    def __init__(self, epoch):
+        self.epoch = epoch
+
+    def __str__(self):
+        return from_epoch(self.epoch).strftime("%Y-%m-%d %H:%M:%S")
+
+
+class CategoryLimiter:
+    """
+    Amostragem e limite de taxa dos registros de uma categoria.
+
+    Pode ser chamado por várias threads sem lock: no pior caso, um registro a mais ou a menos
+    passa pelo limite, nunca um estado inválido.
+    """
+
+    def __init__(self, rate=None, sampling=1.0):
+        """
+        Args:
+            rate: Máximo de registros por segundo (rajadas de até `rate` registros); None: sem limite
+            sampling: Fração dos registros mantida (1 a cada round(1 / sampling))
+        """
+        self.rate = rate
+        self.every = max(1, round(1.0 / sampling)) if sampling else 0
+        self.suppressed = 0
+        self._seen = 0
+        self._omitted = 0  # Suprimidos desde o último registro aceito
+        self._tokens = float(rate) if rate else 0.0
+        self._refilled_at = time.monotonic()
+
+    def allow(self):
+        """
+        Returns:
+            int or None: None se o registro deve ser omitido; senão, o número de registros omitidos
+                desde o último aceito
+        """
+        self._seen += 1
+        if not self.every or self._seen % self.every:
+            return self._suppress()
+        if self.rate:
+            now = time.monotonic()
+            self._tokens = min(float(self.rate), self._tokens + (now - self._refilled_at) * self.rate)
+            self._refilled_at = now
+            if self._tokens < 1.0:
+                return self._suppress()
+            self._tokens -= 1.0
+        omitted, self._omitted = self._omitted, 0
+        return omitted
+
+    def _suppress(self):
+        self.suppressed += 1
+        self._omitted += 1
+        return None
+
+
+class CategoryLogger:
+    """
+    Logger de uma categoria de alto volume (uma mensagem por leitura ou por mensagem MQTT).
+
+    O nível e os limites da categoria são verificados antes de o LogRecord ser criado, então uma
+    mensagem omitida custa apenas essa verificação.
+    """
+
+    __slots__ = ("name", "logger")
+
+    def __init__(self, name):
+        self.name = name
+        self.logger = logging.getLogger(name)
+
+    def log(self, level, msg, *args):
+        logger = self.logger
+        if not logger.isEnabledFor(level):
+            return
+        limiter = _limiters.get(self.name)
+        if limiter is None:
+            logger.log(level, msg, *args)
+            return
+        omitted = limiter.allow()
+        if omitted is None:
+            return
+        logger.log(level, msg, *args, extra={"suppressed": omitted} if omitted else None)
+
+    def info(self, msg, *args):
+        self.log(logging.INFO, msg, *args)
+
+    def warning(self, msg, *args):
+        self.log(logging.WARNING, msg, *args)
+
+
+class _NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler que descarta (e conta) registros com a fila cheia e não formata na thread que registra."""
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # A formatação fica para a thread de escrita; só registros com exceção são formatados aqui,
+        # pois o traceback não pode atravessar a fila
+        if record.exc_info:
+            return super().prepare(record)
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class _TextFormatter(logging.Formatter):
+    """Formato de texto do terminal, com a contagem de registros omitidos pelos limites."""
+
+    def format(self, record):
+        text = super().format(record)
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            text += f" (+{suppressed} mensagens semelhantes omitidas)"
+        return text
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Um objeto JSON por linha com os campos de `record.alert` (auditoria de alertas)."""
+
+    def format(self, record):
+        entry = {"logged_at": from_epoch(record.created).isoformat()}
+        entry.update(getattr(record, "alert", None) or {"message": record.getMessage()})
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class EventLog:
+    """Configura a hierarquia "monitor" com a fila de registros, os limites e a auditoria de alertas (fila própria)."""
+
+    def __init__(self, level=LOG_LEVEL, log_file=LOG_FILE, queue_maxsize=LOG_QUEUE_MAXSIZE,
+                 rate_limits=LOG_RATE_LIMITS, sampling=LOG_SAMPLING, audit_path=ALERT_AUDIT_PATH,
+                 audit_max_bytes=ALERT_AUDIT_MAX_BYTES, audit_backup_count=ALERT_AUDIT_BACKUP_COUNT,
+                 stream=None):
+        """
+        Args:
+            level: Nível mínimo dos registros ("DEBUG", "INFO", ...)
+            log_file: Arquivo de texto que recebe os registros em vez do terminal; None: `stream`
+            queue_maxsize: Máximo de registros aguardando a thread de escrita
+            rate_limits: {categoria (nome do CategoryLogger): registros por segundo}
+            sampling: {categoria: fração dos registros mantida}
+            audit_path: Arquivo JSON lines das mudanças de status de alerta; None desativa
+            audit_max_bytes, audit_backup_count: Rotação do arquivo de auditoria
+            stream: Fluxo de texto usado sem `log_file` (padrão: stdout)
+        """
+        self.level = level
+        self.log_file = log_file
+        self.audit_path = audit_path
+        self.audit_max_bytes = audit_max_bytes
+        self.audit_backup_count = audit_backup_count
+        self.stream = stream if stream is not None else sys.stdout
+
+        self.limiters = {}
+        for category in set(rate_limits) | set(sampling):
+            self.limiters[category] = CategoryLimiter(rate_limits.get(category), sampling.get(category, 1.0))
+
+        self._queue = queue.Queue(queue_maxsize)
+        self._queue_handler = _NonBlockingQueueHandler(self._queue)
+        self._listener = None
+        # Auditoria: fila sem limite, nunca descarta
+        self._audit_handler = _NonBlockingQueueHandler(queue.Queue())
+        self._audit_listener = None
+
+    @property
+    def dropped(self):
+        """Registros descartados com a fila cheia."""
+        return self._queue_handler.dropped
+
+    @property
+    def suppressed(self):
+        """Registros omitidos pela amostragem e pelos limites de taxa."""
+        return sum(limiter.suppressed for limiter in self.limiters.values())
+
+    def start(self):
+        """Instala os handlers na hierarquia "monitor" e inicia a thread de escrita."""
+        root = logging.getLogger(ROOT_LOGGER)
+        root.setLevel(self.level)
+        root.propagate = False
+        root.addHandler(self._queue_handler)
+        _limiters.update(self.limiters)
+
+        if self.log_file:
+            output = logging.FileHandler(self.log_file, encoding="utf-8")
+        else:
+            output = logging.StreamHandler(self.stream)
+        output.setFormatter(_TextFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+        self._listener = QueueListener(self._queue, output, respect_handler_level=True)
+        self._listener.start()
+
+        audit_logger.propagate = False
+        if self.audit_path:
+            audit = RotatingFileHandler(self.audit_path, maxBytes=self.audit_max_bytes,
+                                        backupCount=self.audit_backup_count, encoding="utf-8", delay=True)
+            audit.setFormatter(JsonLinesFormatter())
+            audit_logger.addHandler(self._audit_handler)
+            self._audit_listener = QueueListener(self._audit_handler.queue, audit)
+            self._audit_listener.start()
+        audit_logger.setLevel(logging.INFO if self.audit_path else logging.CRITICAL + 1)
+
+    def stop(self):
+        """Escreve os registros pendentes, encerra a thread de escrita e remove os handlers."""
+        if self._listener is None:
+            return
+        for listener in (self._listener, self._audit_listener):
+            if listener is None:
+                continue
+            listener.stop()
+            for handler in listener.handlers:
+                handler.close()
+        self._listener = self._audit_listener = None
+        logging.getLogger(ROOT_LOGGER).removeHandler(self._queue_handler)
+        audit_logger.removeHandler(self._audit_handler)
+        audit_logger.propagate = True
+        for category in self.limiters:
+            _limiters.pop(category, None)
+
+    def register_metrics(self, metrics):
+        """Exporta os registros descartados e omitidos nas métricas do motor."""
+        metrics.add_gauge("monitor_log_dropped_total", "Registros de log descartados com a fila cheia",
+                          lambda: self.dropped, kind="counter")
+        metrics.add_gauge("monitor_log_suppressed_total", "Registros de log omitidos por amostragem ou limite de taxa",
+                          lambda: self.suppressed, kind="counter")
+
+
+def audit_alert_events(update):
+    """
+    Grava as mudanças de status de alerta de um EngineUpdate no arquivo de auditoria.
+    Deve ser inscrito no motor com `engine.subscribe(audit_alert_events)`.
+    """
+    if not update.alert_events or not audit_logger.isEnabledFor(logging.INFO):
+        return
+    for event in update.alert_events:
+        audit_logger.info("alerta", extra={"alert": {
+            "room_id": event.room_id,
+            "previous_status": event.previous_status,
+            "status": event.status,
+            "value": event.value,
+            "threshold": event.threshold,
+            "timestamp": from_epoch(event.timestamp).isoformat() if event.timestamp is not None else None,
+        }})
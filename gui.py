@@ -1,30 +1,50 @@
+import importlib
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk
-from collections import deque
-from datetime import datetime
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-import matplotlib
 
 # Importa as configurações do arquivo config.py
-from config import MAX_TEMPS_PER_ROOM, ALARM_TEMP_THRESHOLD, TEMP_TYPE_ENVIRONMENT, TEMP_TYPE_REFERENCE
-
-# Define o backend do Matplotlib para 'TkAgg'
-matplotlib.use('TkAgg')
+from config import INGEST_DRAIN_INTERVAL_MS, ALL_ROOMS_SUMMARY_RANGE_S, TEMP_TYPE_ENVIRONMENT, ROOM_SELECTOR_MAX_VALUES
+from config import RENDER_FRAME_BUDGET_MS, RENDER_FRAME_INTERVAL_MS, CHART_PREWARM_DELAY_MS
+from alert_state import STATUS_ALERT, STATUS_NO_REFERENCE, STATUS_OK, STATUS_STALE
+from monitor_engine import MonitorEngine
+from temperature_store import from_epoch
+from rollups import format_resolution
+from all_rooms_view import AllRoomsView
+from summary_view import SummaryTableView
+from stats_panel import StatsPanel
+from render_policy import RenderScheduler
 
 class TemperatureMonitorGUI:
-    def __init__(self, master):
+    ALERT_SORT_RANK = {STATUS_ALERT: 0, STATUS_STALE: 1, STATUS_NO_REFERENCE: 2, STATUS_OK: 3}
+
+    def __init__(self, master, engine=None):
+        """
+        Args:
+            master: Janela raiz do Tk
+            engine: MonitorEngine com os dados e alertas; um novo é criado se omitido
+        """
         self.master = master
         master.title("🌡️ Monitor de Temperatura - Quartos")
         master.geometry("1400x900")
         master.configure(bg='#f0f0f0')
 
-        # Dicionário para armazenar as temperaturas de cada quarto
-        # Estrutura: {room_id: {"environment": deque(), "reference": deque()}}
-        self.room_temperatures = {}
-        
-        # Armazena o timestamp da última temperatura de referência por quarto
-        self.reference_timestamps = {}
+        # Ingestão, armazenamento e alertas ficam no motor; a GUI é apenas uma view inscrita nele
+        self.engine = engine if engine is not None else MonitorEngine()
+        self.engine.subscribe(self._on_engine_update)
+
+        # Séries de temperatura de cada quarto em buffers circulares compactos
+        # Estrutura: {room_id: RoomSeries(environment, reference)}
+        self.room_temperatures = self.engine.store
+
+        # Camada fria atrás dos buffers: histórico em segmentos mapeados em memória (ou None)
+        self.room_history = self.engine.cold_store
+
+        # Instrumentação do pipeline: a latência de renderização vai do lote aplicado até a view atualizada
+        self.metrics = self.engine.metrics
+        self._render_pending_since = None  # Instante do lote mais antigo ainda não exibido
+        self._chart_render_since = None  # Idem, aguardando o desenho do gráfico pelo Matplotlib
         
         # Controle de atualizações da GUI para evitar sobrecarga
         self._pending_updates = {
@@ -34,6 +54,17 @@ class TemperatureMonitorGUI:
         }
 
         self._setup_ui()
+        self.master.after(INGEST_DRAIN_INTERVAL_MS, self._drain_ingest_queue)
+        if CHART_PREWARM_DELAY_MS is not None:
+            self.master.after(CHART_PREWARM_DELAY_MS, self._prewarm_chart)
+
+    def _prewarm_chart(self):
+        """
+        Importa o módulo do gráfico (e o Matplotlib) em uma thread, depois do primeiro desenho da
+        janela, para que o primeiro gráfico de quarto abra sem esperar a importação.
+        """
+        threading.Thread(target=importlib.import_module, args=("room_chart",), name="ChartPrewarm",
+                         daemon=True).start()
 
     def _setup_ui(self):
         """Configura todos os elementos da interface do usuário."""
@@ -71,39 +102,70 @@ class TemperatureMonitorGUI:
         self.current_temps_frame = ttk.LabelFrame(self.master, text="📊 Resumo Atual", padding="15")
         self.current_temps_frame.pack(fill="x", padx=15, pady=10)
 
-        self.current_temps_text = tk.Text(
-            self.current_temps_frame,
-            wrap="word",
-            height=6,
-            state="disabled",
-            font=("Consolas", 10),
-            bg="#f8f9fa",
-            relief="solid",
-            borderwidth=1
+        # Tabela com uma linha por quarto; apenas as linhas alteradas são atualizadas, com no máximo
+        # RENDER_MAX_ROOMS_PER_FRAME linhas por quadro (quartos em alerta primeiro)
+        self.summary_view = SummaryTableView(self.current_temps_frame, height=6)
+        self.render_scheduler = RenderScheduler(
+            lambda room_id: self.engine.get_status(room_id) == STATUS_ALERT, self.metrics
         )
-        self.current_temps_text.pack(fill="both", expand=True)
+
+        # Painel de desempenho (contadores e latências), fixo na parte inferior da janela
+        self.stats_panel = StatsPanel(self.master, self.metrics, self.engine.ingest_queue)
+        self.stats_panel.frame.pack(side="bottom", fill="x", padx=15, pady=(0, 10))
 
         # Frame principal para exibir as informações (texto de todos ou gráfico de um)
         self.display_frame = ttk.Frame(self.master, padding="15")
         self.display_frame.pack(fill="both", expand=True)
 
-        self.temp_text_display = tk.Text(
+        # Visualização "Todos os Quartos": lista virtualizada (apenas os quartos visíveis são desenhados),
+        # com filtro por prefixo do ID e ordenações mantidas de forma incremental
+        self.all_rooms_view = AllRoomsView(
             self.display_frame,
-            wrap="word",
-            state="disabled",
-            font=("Consolas", 11),
-            bg="#ffffff",
-            relief="solid",
-            borderwidth=1
+            self._format_room_block,
+            sort_keys={
+                "Status de alerta": self._alert_sort_key,
+                "Desvio da referência": self._deviation_sort_key,
+            },
+            on_room_activated=self._select_room,
+            on_filter_changed=self._update_room_selector
         )
+        self.temp_text_display = self.all_rooms_view.text
+
+        self.room_chart = None # Gráfico persistente do quarto selecionado (RoomChart)
+        self.display_message_label = None # Mensagem exibida quando não há dados para mostrar
+
+    def enqueue_temperature_data(self, room_id, timestamp, temperature_value, temp_type):
+        """
+        Enfileira uma leitura para ser processada pela thread do Tk.
+        Este método é o callback chamado pelo cliente MQTT e pode ser usado a partir de qualquer thread,
+        pois não toca em widgets nem nas estruturas de dados da interface.
+        
+        Args:
+            room_id: ID do quarto
+            timestamp: Timestamp da leitura
+            temperature_value: Valor da temperatura
+            temp_type: "0" para ambiente, "1" para referência
+        """
+        self.engine.enqueue_reading(room_id, timestamp, temperature_value, temp_type)
 
-        self.canvas_widget_tk = None # Referência para o widget do canvas Matplotlib
-        self.fig_obj = None # Referência para o objeto Figure do Matplotlib
+    def enqueue_temperature_batch(self, room_id, temp_type, timestamps, values):
+        """
+        Enfileira um lote de leituras de um mesmo quarto e tipo como um único item da fila.
+        Este método é o callback de lotes do cliente MQTT e pode ser usado a partir de qualquer thread.
+        
+        Args:
+            room_id: ID do quarto
+            temp_type: "0" para ambiente, "1" para referência
+            timestamps: Sequência de timestamps em segundos desde a época
+            values: Sequência de valores de temperatura
+        """
+        self.engine.enqueue_batch(room_id, temp_type, timestamps, values)
 
     def add_temperature_data(self, room_id, timestamp, temperature_value, temp_type):
         """
         Adiciona novos dados de temperatura e dispara as atualizações da GUI.
-        Este método é o callback chamado pelo cliente MQTT.
+        Deve ser chamado apenas na thread do Tk; leituras vindas do MQTT passam por
+        `enqueue_temperature_data`.
         
         Args:
             room_id: ID do quarto
@@ -111,56 +173,66 @@ class TemperatureMonitorGUI:
             temperature_value: Valor da temperatura
             temp_type: "0" para ambiente, "1" para referência
         """
-        is_new_room = room_id not in self.room_temperatures
-        if is_new_room:
-            self.room_temperatures[room_id] = {
-                "environment": deque(maxlen=MAX_TEMPS_PER_ROOM),
-                "reference": deque(maxlen=MAX_TEMPS_PER_ROOM)
-            }
-
-        # Determina o tipo de temperatura e armazena no deque apropriado
-        if temp_type == TEMP_TYPE_ENVIRONMENT:
-            temp_category = "environment"
-            type_name = "ambiente"
-        elif temp_type == TEMP_TYPE_REFERENCE:
-            temp_category = "reference"
-            type_name = "referência"
-        else:
-            print(f"Tipo de temperatura desconhecido: {temp_type}")
-            return
+        self.engine.add_reading(room_id, timestamp, temperature_value, temp_type)
 
-        self.room_temperatures[room_id][temp_category].append({
-            "datetime": timestamp, 
-            "value": temperature_value
-        })
-        
-        # Se for uma nova temperatura de referência, marca o timestamp para futuras comparações
-        if temp_type == TEMP_TYPE_REFERENCE:
-            self.reference_timestamps[room_id] = timestamp
+    def _drain_ingest_queue(self):
+        """Aplica em lote as leituras enfileiradas; o motor notifica a GUI uma única vez por lote."""
+        try:
+            self.engine.process_pending()
+        finally:
+            self.master.after(INGEST_DRAIN_INTERVAL_MS, self._drain_ingest_queue)
+
+    def get_ingest_stats(self):
+        """Retorna os contadores da fila de ingestão (profundidade, descartes e tempos de drenagem)."""
+        return self.engine.ingest_queue.stats()
+
+    def _on_engine_update(self, update):
+        """Recebe o resumo de um lote processado pelo motor e agenda as atualizações da GUI."""
+        self._schedule_gui_updates(update.changed_rooms, bool(update.new_rooms))
+
+    def _schedule_gui_updates(self, changed_rooms, has_new_room):
+        """
+        Agenda as atualizações da GUI de forma eficiente (evita múltiplas atualizações simultâneas).
         
-        print(f"Temperatura {type_name} recebida para Quarto {room_id}: {temperature_value}°C em {timestamp.strftime('%Y-%m-%d %H:%M:%S')}")
+        Args:
+            changed_rooms: Conjunto de quartos que receberam novas leituras
+            has_new_room: True se algum dos quartos ainda não existia
+        """
+        self.all_rooms_view.mark_dirty(changed_rooms)
+        self.render_scheduler.offer(changed_rooms)
 
-        # Agenda as atualizações da GUI de forma eficiente (evita múltiplas atualizações simultâneas)
+        metrics = self.metrics
         if not self._pending_updates["current_temps"]:
             self._pending_updates["current_temps"] = True
             self.master.after_idle(self._update_current_temps_with_flag)
+        elif metrics.enabled:
+            metrics.coalesced_updates += 1
             
-        if is_new_room and not self._pending_updates["room_selector"]:
+        if has_new_room and not self._pending_updates["room_selector"]:
             self._pending_updates["room_selector"] = True
             self.master.after_idle(self._update_room_selector_with_flag)
             
-        if (self.selected_room.get() == room_id or self.selected_room.get() == "Todos os Quartos") and not self._pending_updates["display"]:
-            self._pending_updates["display"] = True
-            self.master.after_idle(self._update_display_with_flag)
+        current_selection = self.selected_room.get()
+        if current_selection == "Todos os Quartos" or current_selection in changed_rooms:
+            if not self._pending_updates["display"]:
+                self._pending_updates["display"] = True
+                self.master.after_idle(self._update_display_with_flag)
+                if metrics.enabled and self._render_pending_since is None:
+                    self._render_pending_since = time.monotonic()
+            elif metrics.enabled:
+                metrics.coalesced_updates += 1
 
     def _update_room_selector(self):
-        """Atualiza a lista de opções no combobox de seleção de quartos."""
-        rooms = sorted(self.room_temperatures.keys())
+        """
+        Atualiza a lista de opções no combobox de seleção de quartos.
+        A lista segue o filtro da visualização "Todos os Quartos" e é limitada a
+        ROOM_SELECTOR_MAX_VALUES quartos, para continuar utilizável com milhares deles.
+        """
         # Remove "Todos os Quartos" da lista do combobox - apenas quartos específicos
-        self.room_combobox['values'] = rooms
+        self.room_combobox['values'] = self.all_rooms_view.matching_rooms(ROOM_SELECTOR_MAX_VALUES)
 
         # Se o quarto selecionado não existe mais, volta para "Todos os Quartos"
-        if self.selected_room.get() not in rooms and self.selected_room.get() != "Todos os Quartos":
+        if self.selected_room.get() not in self.room_temperatures and self.selected_room.get() != "Todos os Quartos":
             self.selected_room.set("Todos os Quartos")
             self.back_button.pack_forget()
             # Reabilita o combobox ao voltar para todos os quartos
@@ -170,141 +242,140 @@ class TemperatureMonitorGUI:
 
     def _clear_display_frame(self):
         """Limpa o frame principal de exibição, removendo widgets anteriores."""
-        if self.canvas_widget_tk:
-            self.canvas_widget_tk.destroy()
-            self.canvas_widget_tk = None
-        
-        if self.fig_obj:
-            plt.close(self.fig_obj) # Fecha a figura do Matplotlib para liberar memória
-            self.fig_obj = None
+        if self.room_chart:
+            self.room_chart.destroy() # Remove o canvas e libera a figura do Matplotlib
+            self.room_chart = None
+            self._chart_render_since = None
+
+        if self.display_message_label:
+            self.display_message_label.destroy()
+            self.display_message_label = None
 
-        self.temp_text_display.pack_forget() # Esconde o widget de texto, se estiver visível
+        self.all_rooms_view.frame.pack_forget() # Esconde a lista de quartos, se estiver visível
+
+    def _show_display_message(self, text):
+        """Limpa o frame principal e exibe uma mensagem no lugar do conteúdo."""
+        self._clear_display_frame()
+        self.display_message_label = ttk.Label(self.display_frame, text=text, font=("Arial", 14))
+        self.display_message_label.pack(pady=20, padx=20)
 
     def _plot_room_temperatures(self, room_id):
-        """Plota os dados de temperatura para um quarto selecionado."""
-        if room_id not in self.room_temperatures:
-            self._clear_display_frame()
-            label = ttk.Label(self.display_frame, text=f"Nenhuma temperatura recebida ainda para o Quarto {room_id}.", font=("Arial", 14))
-            label.pack(pady=20, padx=20)
+        """
+        Plota os dados de temperatura para um quarto selecionado.
+        O gráfico é criado apenas quando o quarto muda; nas chamadas seguintes
+        as linhas existentes são atualizadas no lugar.
+        """
+        series = self.room_temperatures.get(room_id)
+        if series is None or (not series.environment and not series.reference):
+            self._show_display_message(f"Nenhuma temperatura recebida ainda para o Quarto {room_id}.")
             return
 
-        env_temps = self.room_temperatures[room_id]["environment"]
-        ref_temps = self.room_temperatures[room_id]["reference"]
+        if self.room_chart is None or self.room_chart.room_id != room_id:
+            # O Matplotlib só é carregado ao abrir o primeiro gráfico (ou antes, por `_prewarm_chart`)
+            from room_chart import RoomChart
 
-        if not env_temps and not ref_temps:
             self._clear_display_frame()
-            label = ttk.Label(self.display_frame, text=f"Nenhuma temperatura recebida ainda para o Quarto {room_id}.", font=("Arial", 14))
-            label.pack(pady=20, padx=20)
-            return
+            self.room_chart = RoomChart(self.display_frame, room_id)
+            self.room_chart.canvas.mpl_connect("draw_event", self._on_chart_drawn)
 
-        self._clear_display_frame()
-
-        self.fig_obj, ax = plt.subplots(figsize=(9, 5))
-        
-        # Plota temperaturas do ambiente (Y=0)
-        if env_temps:
-            env_times = [data['datetime'] for data in env_temps]
-            env_values = [data['value'] for data in env_temps]
-            ax.plot(env_times, env_values, marker='o', linestyle='-', color='#2E86AB', 
-                   linewidth=2, markersize=6, label='🌡️ Temperatura Ambiente')
-        
-        # Plota temperaturas de referência (Y=1)
-        if ref_temps:
-            ref_times = [data['datetime'] for data in ref_temps]
-            ref_values = [data['value'] for data in ref_temps]
-            ax.plot(ref_times, ref_values, marker='s', linestyle='--', color='#A23B72', 
-                   linewidth=2, markersize=6, label='🎯 Temperatura Referência')
-        
-        # Adiciona a linha de limite de alerta baseada na referência atual do quarto
-        current_threshold = self._get_current_threshold(room_id)
-        if current_threshold is not None:
-            ax.axhline(y=current_threshold, color='red', linestyle=':', alpha=0.8, linewidth=2, 
-                      label=f'Limite Referência ({current_threshold:.1f}°C)')
-        else:
-            # Opcional: mostrar linha padrão se não há referência
-            ax.axhline(y=ALARM_TEMP_THRESHOLD, color='gray', linestyle=':', alpha=0.5, linewidth=1,
-                      label=f'Limite Padrão ({ALARM_TEMP_THRESHOLD}°C) - Sem Referência')
-        
-        total_readings = len(env_temps) + len(ref_temps)
-        ax.set_title(f'Últimas {total_readings} Leituras - Quarto {room_id}')
-        ax.set_xlabel('Data/Hora')
-        ax.set_ylabel('Temperatura (°C)')
-        ax.grid(True, alpha=0.3)
-        self.fig_obj.autofmt_xdate() # Formata as datas no eixo X
-        ax.legend() # Mostra a legenda para as linhas
-
-        canvas = FigureCanvasTkAgg(self.fig_obj, master=self.display_frame)
-        self.canvas_widget_tk = canvas.get_tk_widget()
-        self.canvas_widget_tk.pack(fill=tk.BOTH, expand=True)
-        canvas.draw()
+        self.room_chart.update(series, self._get_current_threshold(room_id), self.engine.rollups.get(room_id),
+                               self.room_history)
 
     def update_display(self):
         """Atualiza a área principal de exibição com base na seleção do quarto."""
-        self._clear_display_frame()
-
         current_selection = self.selected_room.get()
 
         if current_selection == "Todos os Quartos":
-            # Exibe todas as temperaturas em formato de texto
-            self.temp_text_display.pack(fill="both", expand=True)
-            self.temp_text_display.config(state="normal")
-            self.temp_text_display.delete(1.0, tk.END)
-
-            self.temp_text_display.insert(tk.END, "=== MONITOR DE TEMPERATURA - TODOS OS QUARTOS ===\n\n")
-            if not self.room_temperatures:
-                self.temp_text_display.insert(tk.END, "Aguardando dados de temperatura...\n")
-            else:
-                for room_id in sorted(self.room_temperatures.keys()):
-                    self.temp_text_display.insert(tk.END, f"QUARTO {room_id}:\n")
-                    self.temp_text_display.insert(tk.END, "─" * 50 + "\n")
-                    
-                    # Exibe temperaturas do ambiente
-                    env_temps = self.room_temperatures[room_id]["environment"]
-                    if env_temps:
-                        self.temp_text_display.insert(tk.END, "  🌡 Temperaturas do Ambiente:\n")
-                        sorted_env_temps = sorted(list(env_temps), key=lambda x: x['datetime'], reverse=True)
-                        for temp_data in sorted_env_temps:
-                            display_time = temp_data['datetime'].strftime("%H:%M:%S")
-                            temp_str = f"    • {display_time}: {temp_data['value']:.1f}°C"
-                            
-                            # Verifica alerta apenas se a temperatura for posterior à última referência
-                            threshold = self._get_current_threshold(room_id)
-                            
-                            if (threshold is not None and 
-                                self._should_check_alert(room_id, temp_data['datetime']) and 
-                                temp_data['value'] > threshold):
-                                temp_str += f" 🚨 ALERTA: Acima da referência {threshold:.1f}°C!\n"
-                            else:
-                                temp_str += " ✅\n"
-                            self.temp_text_display.insert(tk.END, temp_str)
-                    else:
-                        self.temp_text_display.insert(tk.END, "  ⏳ Aguardando dados do ambiente...\n")
-                    
-                    # Exibe temperaturas de referência
-                    ref_temps = self.room_temperatures[room_id]["reference"]
-                    if ref_temps:
-                        self.temp_text_display.insert(tk.END, "\n  🎯 Temperaturas de Referência:\n")
-                        sorted_ref_temps = sorted(list(ref_temps), key=lambda x: x['datetime'], reverse=True)
-                        for temp_data in sorted_ref_temps:
-                            display_time = temp_data['datetime'].strftime("%H:%M:%S")
-                            temp_str = f"    • {display_time}: {temp_data['value']:.1f}°C 📊\n"
-                            self.temp_text_display.insert(tk.END, temp_str)
-                    else:
-                        self.temp_text_display.insert(tk.END, "\n  ⏳ Aguardando temperatura de referência...\n")
-                    
-                    self.temp_text_display.insert(tk.END, "\n")
-            self.temp_text_display.config(state="disabled")
+            # Exibe todas as temperaturas em formato de texto, reescrevendo apenas os quartos alterados
+            if self.room_chart or self.display_message_label:
+                self._clear_display_frame()
+            if not self.all_rooms_view.frame.winfo_manager():
+                self.all_rooms_view.frame.pack(fill="both", expand=True)
+            self.all_rooms_view.refresh()
 
         elif current_selection in self.room_temperatures:
             # Plota as temperaturas do quarto selecionado
             self._plot_room_temperatures(current_selection)
         else:
             # Mensagem padrão se nenhum quarto for selecionado ou dados não existirem
-            label = ttk.Label(self.display_frame, text="Selecione um quarto ou aguarde o recebimento de dados.", font=("Arial", 14))
-            label.pack(pady=20, padx=20)
+            self._show_display_message("Selecione um quarto ou aguarde o recebimento de dados.")
+
+    def _format_room_block(self, room_id):
+        """
+        Monta o bloco de texto de um quarto na visualização "Todos os Quartos".
+        
+        Args:
+            room_id: ID do quarto
+            
+        Returns:
+            str: Bloco completo do quarto, terminado por uma linha em branco
+        """
+        series = self.room_temperatures[room_id]
+        lines = [f"QUARTO {room_id}:", "─" * 50]
+        if self.engine.get_status(room_id) == STATUS_STALE:
+            lines.append("  📴 SEM SINAL: nenhuma leitura recebida dentro do prazo; valores abaixo podem estar desatualizados")
+
+        # Exibe temperaturas do ambiente
+        env_temps = series.environment
+        if env_temps:
+            lines.append("  🌡 Temperaturas do Ambiente:")
+            # A referência atual é a mesma para todas as leituras do bloco
+            threshold = self._get_current_threshold(room_id)
+            env_timestamps = env_temps.timestamps
+            env_values = env_temps.values
+            # Marcas de alerta por leitura calculadas pelo motor em uma única comparação vetorizada
+            alert_flags = self.engine.reading_alert_flags(room_id)
+            # As leituras já estão ordenadas por tempo no armazenamento: basta percorrer de trás para frente
+            for index in range(len(env_timestamps) - 1, -1, -1):
+                display_time = from_epoch(env_timestamps[index]).strftime("%H:%M:%S")
+                temp_str = f"    • {display_time}: {env_values[index]:.1f}°C"
+
+                if alert_flags[index]:
+                    temp_str += f" 🚨 ALERTA: Acima da referência {threshold:.1f}°C!"
+                else:
+                    temp_str += " ✅"
+                lines.append(temp_str)
+
+            # Resumo do período calculado a partir dos agregados (custo constante)
+            summary = self.engine.range_summary(room_id, TEMP_TYPE_ENVIRONMENT, ALL_ROOMS_SUMMARY_RANGE_S)
+            if summary is not None:
+                lines.append(
+                    f"  📈 Resumo ({format_resolution(ALL_ROOMS_SUMMARY_RANGE_S)}): "
+                    f"mín {summary.min:.1f}°C | máx {summary.max:.1f}°C | média {summary.mean:.1f}°C | "
+                    f"{summary.count} leituras | {summary.above_seconds / 60:.0f} min acima da referência"
+                )
+        else:
+            lines.append("  ⏳ Aguardando dados do ambiente...")
+
+        # Exibe temperaturas de referência
+        ref_temps = series.reference
+        if ref_temps:
+            lines.append("\n  🎯 Temperaturas de Referência:")
+            ref_timestamps = ref_temps.timestamps
+            ref_values = ref_temps.values
+            for index in range(len(ref_timestamps) - 1, -1, -1):
+                display_time = from_epoch(ref_timestamps[index]).strftime("%H:%M:%S")
+                lines.append(f"    • {display_time}: {ref_values[index]:.1f}°C 📊")
+        else:
+            lines.append("\n  ⏳ Aguardando temperatura de referência...")
+
+        lines.append("\n")
+        return "\n".join(lines)
+
+    def _alert_sort_key(self, room_id):
+        """Chave da ordenação por status: quartos em alerta primeiro, depois sem sinal, sem referência e OK."""
+        return self.ALERT_SORT_RANK.get(self.engine.get_status(room_id), len(self.ALERT_SORT_RANK))
+
+    def _deviation_sort_key(self, room_id):
+        """Chave da ordenação por desvio: maior excesso sobre a referência primeiro; sem dados no fim."""
+        latest_env = self.room_temperatures[room_id].environment.latest()
+        threshold = self._get_current_threshold(room_id)
+        if latest_env is None or threshold is None:
+            return float("inf")
+        return threshold - latest_env.value
 
     def update_current_temps_display(self):
-        """Atualiza o painel de resumo com as últimas temperaturas de cada quarto."""
+        """Atualiza no painel de resumo as linhas dos quartos que receberam novas leituras."""
         # Verifica se a atualização está pendente
         if self._pending_updates["current_temps"]:
             return # Sai se já está pendente uma atualização
@@ -312,55 +383,54 @@ class TemperatureMonitorGUI:
         # Marca a atualização como pendente
         self._pending_updates["current_temps"] = True
 
-        # Função interna para realizar a atualização e limpar o estado pendente
-        def do_update():
-            self.current_temps_text.config(state="normal")
-            self.current_temps_text.delete(1.0, tk.END)
-            self.current_temps_text.insert(tk.END, "🏠 Quarto | 🌡 Ambiente  | 🎯 Referência | 📊 Status    \n")
-            self.current_temps_text.insert(tk.END, "─" * 58 + "\n")
-
-            if not self.room_temperatures:
-                self.current_temps_text.insert(tk.END, "Nenhum dado recebido ainda.\n")
-            else:
-                for room_id in sorted(self.room_temperatures.keys()):
-                    env_temps = self.room_temperatures[room_id]["environment"]
-                    ref_temps = self.room_temperatures[room_id]["reference"]
-                    
-                    # Última temperatura ambiente
-                    env_temp_str = "N/A"
-                    if env_temps:
-                        latest_env = env_temps[-1]
-                        env_temp_str = f"{latest_env['value']:.1f}°C"
-                    
-                    # Última temperatura de referência
-                    ref_temp_str = "N/A"
-                    if ref_temps:
-                        latest_ref = ref_temps[-1]
-                        ref_temp_str = f"{latest_ref['value']:.1f}°C"
-                    
-                    # Status de alerta usando a temperatura de referência específica
-                    status_text = "✅ OK"
-                    if env_temps:
-                        if ref_temps:
-                            # Usa temperatura de referência específica do quarto
-                            current_threshold = ref_temps[-1]['value']
-                            latest_env = env_temps[-1]
-                            # Só verifica alerta se a temperatura ambiente for posterior à referência
-                            if (self._should_check_alert(room_id, latest_env['datetime']) and 
-                                latest_env['value'] > current_threshold):
-                                status_text = "🚨 ALERTA"
-                        else:
-                            status_text = "⏳ S/ REF"
-                    
-                    line = f"{room_id:<9} | {env_temp_str:<12} | {ref_temp_str:<12} | {status_text}\n"
-                    self.current_temps_text.insert(tk.END, line)
-            
-            self.current_temps_text.config(state="disabled")
-            # Limpa o estado pendente após a atualização
-            self._pending_updates["current_temps"] = False
-        
         # Executa a atualização após um pequeno atraso, permitindo que múltiplas chamadas sejam agrupadas
-        self.master.after(100, do_update)
+        self.master.after(RENDER_FRAME_INTERVAL_MS, self._apply_current_temps_update)
+
+    def _apply_current_temps_update(self):
+        """Recalcula as linhas dos quartos escolhidos pela política de renderização e limpa o estado pendente."""
+        # Apenas os quartos que receberam leituras são recalculados, uma vez cada, com o valor mais recente
+        rooms = self.render_scheduler.take()
+        deadline = time.perf_counter() + RENDER_FRAME_BUDGET_MS / 1000.0
+        for index, room_id in enumerate(rooms):
+            self._update_summary_row(room_id)
+            if time.perf_counter() > deadline:
+                # Quadro esgotado: os quartos restantes ficam para o próximo
+                self.render_scheduler.requeue(rooms[index + 1:])
+                break
+        # Limpa o estado pendente após a atualização
+        self._pending_updates["current_temps"] = False
+        if len(self.render_scheduler):
+            # Quartos adiados pelo limite por quadro ou por quarto: continua no próximo quadro
+            self.update_current_temps_display()
+
+    def _update_summary_row(self, room_id):
+        """Recalcula a linha de um quarto no painel de resumo."""
+        latest_env = self.room_temperatures[room_id].environment.latest()
+        latest_ref = self.room_temperatures[room_id].reference.latest()
+        
+        # Última temperatura ambiente
+        env_temp_str = "N/A"
+        if latest_env is not None:
+            env_temp_str = f"{latest_env.value:.1f}°C"
+        
+        # Última temperatura de referência
+        ref_temp_str = "N/A"
+        if latest_ref is not None:
+            ref_temp_str = f"{latest_ref.value:.1f}°C"
+        
+        # Status de alerta calculado pelo motor usando a temperatura de referência específica
+        status = self.engine.get_status(room_id)
+        is_alert = status == STATUS_ALERT
+        if is_alert:
+            status_text = "🚨 ALERTA"
+        elif status == STATUS_STALE:
+            status_text = "📴 SEM SINAL"
+        elif status == STATUS_NO_REFERENCE:
+            status_text = "⏳ S/ REF"
+        else:
+            status_text = "✅ OK"
+        
+        self.summary_view.update_row(room_id, env_temp_str, ref_temp_str, status_text, is_alert)
 
     def _update_current_temps_with_flag(self):
         """Wrapper para update_current_temps_display com controle de flag"""
@@ -375,7 +445,31 @@ class TemperatureMonitorGUI:
     def _update_display_with_flag(self):
         """Wrapper para update_display com controle de flag"""
         self._pending_updates["display"] = False
+        pending_since, self._render_pending_since = self._render_pending_since, None
+        metrics = self.metrics
+        if not metrics.enabled:
+            self.update_display()
+            return
+
+        started_at = time.monotonic()
         self.update_display()
+        finished_at = time.monotonic()
+        metrics.renders += 1
+        metrics.redraw.observe(finished_at - started_at)
+        if pending_since is None:
+            return
+        if self.room_chart is not None:
+            # O gráfico é desenhado depois, pelo draw_idle do Matplotlib: a latência termina no draw_event
+            if self._chart_render_since is None:
+                self._chart_render_since = pending_since
+        else:
+            metrics.render.observe(finished_at - pending_since)
+
+    def _on_chart_drawn(self, event):
+        """Fecha a medição da latência de renderização quando o Matplotlib termina de desenhar o gráfico."""
+        pending_since, self._chart_render_since = self._chart_render_since, None
+        if pending_since is not None and self.metrics.enabled:
+            self.metrics.render.observe(time.monotonic() - pending_since)
 
     def _get_current_threshold(self, room_id):
         """
@@ -388,11 +482,7 @@ class TemperatureMonitorGUI:
         Returns:
             float or None: Temperatura de referência atual ou None
         """
-        if room_id in self.room_temperatures:
-            ref_temps = self.room_temperatures[room_id]["reference"]
-            if ref_temps:
-                return ref_temps[-1]['value']  # Última temperatura de referência
-        return None  # Não usa valor padrão
+        return self.engine.get_current_threshold(room_id)
     
     def _on_room_selection_changed(self):
         """Manipula mudanças na seleção de quartos e controla o botão de retorno"""
@@ -414,6 +504,11 @@ class TemperatureMonitorGUI:
         
         self.update_display()
     
+    def _select_room(self, room_id):
+        """Abre o gráfico de um quarto (duplo clique no bloco do quarto em "Todos os Quartos")."""
+        self.selected_room.set(room_id)
+        self._on_room_selection_changed()
+
     def _return_to_all_rooms(self):
         """Retorna para a visualização de todos os quartos"""
         self.selected_room.set("Todos os Quartos")
@@ -424,20 +519,16 @@ class TemperatureMonitorGUI:
         self.room_label.config(text="🏠 Selecionar Quarto:")
         self.update_display()
 
-    def _should_check_alert(self, room_id, temp_datetime):
+    def _should_check_alert(self, room_id, temp_timestamp):
         """
         Verifica se uma temperatura ambiente deve ser comparada com a referência atual.
         Só compara se a temperatura ambiente for posterior à última referência.
         
         Args:
             room_id: ID do quarto
-            temp_datetime: Timestamp da temperatura ambiente
+            temp_timestamp: Timestamp da temperatura ambiente (segundos desde a época)
             
         Returns:
             bool: True se deve verificar alerta, False caso contrário
         """
-        if room_id not in self.reference_timestamps:
-            return False  # Sem referência definida ainda
-        
-        last_ref_time = self.reference_timestamps[room_id]
-        return temp_datetime >= last_ref_time
\ No newline at end of file
+        return self.engine.should_check_alert(room_id, temp_timestamp)
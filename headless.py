@@ -0,0 +1,83 @@
+import signal
+import sys
+import time
+
+from config import INGEST_DRAIN_INTERVAL_MS
+from alert_state import STATUS_ALERT, STATUS_NO_REFERENCE, STATUS_OK, STATUS_STALE
+from monitor_engine import MonitorEngine
+from temperature_store import from_epoch
+
+
+def format_alert_event(event):
+    """Formata um AlertEvent como uma linha de texto."""
+    when = from_epoch(event.timestamp).strftime("%Y-%m-%d %H:%M:%S") if event.timestamp is not None else "-"
+    value = f"{event.value:.1f}°C" if event.value is not None else "N/A"
+    threshold = f"{event.threshold:.1f}°C" if event.threshold is not None else "N/A"
+
+    if event.status == STATUS_STALE:
+        return f"{when} 📴 SEM SINAL Quarto {event.room_id}: nenhuma leitura recebida dentro do prazo (última: {value})"
+    if event.previous_status == STATUS_STALE:
+        return f"{when} 📶 SINAL RESTABELECIDO Quarto {event.room_id}: {value}"
+    if event.status == STATUS_ALERT:
+        return f"{when} 🚨 ALERTA Quarto {event.room_id}: {value} acima da referência {threshold}"
+    if event.status == STATUS_NO_REFERENCE:
+        return f"{when} ⏳ S/ REF Quarto {event.room_id}: {value} sem temperatura de referência"
+    if event.status == STATUS_OK and event.previous_status == STATUS_ALERT:
+        return f"{when} ✅ NORMALIZADO Quarto {event.room_id}: {value} (referência {threshold})"
+    return None
+
+
+class HeadlessMonitor:
+    """
+    Executa o motor de monitoramento sem interface gráfica.
+
+    O laço principal drena a fila de ingestão em intervalos fixos e escreve as mudanças de
+    status de alerta em stdout ou em um arquivo.
+    """
+
+    def __init__(self, engine=None, alert_output=None, interval_ms=INGEST_DRAIN_INTERVAL_MS):
+        """
+        Args:
+            engine: MonitorEngine a ser usado; um novo (sem log de cada leitura) é criado se omitido
+            alert_output: Arquivo de texto aberto para os alertas (padrão: stdout)
+            interval_ms: Intervalo entre drenagens da fila
+        """
+        self.engine = engine if engine is not None else MonitorEngine(log_readings=False)
+        self.alert_output = alert_output if alert_output is not None else sys.stdout
+        self.interval = interval_ms / 1000.0
+        self._running = False
+        self.engine.subscribe(self._on_engine_update)
+
+    def _on_engine_update(self, update):
+        for event in update.alert_events:
+            line = format_alert_event(event)
+            if line is not None:
+                self.alert_output.write(line + "\n")
+        if update.alert_events:
+            self.alert_output.flush()
+
+    def stop(self, *args):
+        """Interrompe o laço principal (também usado como handler de sinais)."""
+        self._running = False
+
+    def run(self, drain=True):
+        """
+        Executa o laço de drenagem até `stop()` ser chamado ou SIGINT/SIGTERM ser recebido.
+
+        Args:
+            drain: Se False, apenas aguarda o encerramento; usado quando outro laço aplica as
+                leituras ao motor (pipeline em asyncio, `async_ingest.py`)
+        """
+        self._running = True
+        signal.signal(signal.SIGINT, self.stop)
+        signal.signal(signal.SIGTERM, self.stop)
+        while self._running and not drain:
+            time.sleep(self.interval)
+        while self._running:
+            started_at = time.monotonic()
+            self.engine.process_pending()
+            # Continua drenando sem pausa enquanto houver leituras acumuladas
+            if not len(self.engine.ingest_queue):
+                remaining = self.interval - (time.monotonic() - started_at)
+                if remaining > 0:
+                    time.sleep(remaining)
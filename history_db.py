@@ -0,0 +1,252 @@
+import logging
+import sqlite3
+import threading
+import time
+from collections import deque
+
+import numpy as np
+
+from config import HISTORY_BATCH_SIZE, HISTORY_FLUSH_INTERVAL_MS, HISTORY_QUEUE_MAXSIZE
+from config import HISTORY_RETRY_ATTEMPTS, HISTORY_RETRY_DELAY_MS
+
+logger = logging.getLogger("monitor.history")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS readings (
+    room_id TEXT NOT NULL,
+    type TEXT NOT NULL,
+    timestamp REAL NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_readings_room_type_timestamp ON readings (room_id, type, timestamp);
+"""
+
+_INSERT = "INSERT INTO readings (room_id, type, timestamp, value) VALUES (?, ?, ?, ?)"
+
+
+def open_history_db(path):
+    """Abre o banco de histórico em modo WAL, criando a tabela e o índice se necessário."""
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(_SCHEMA)
+    return conn
+
+
+def query_range(path, room_id, temp_type, start=None, end=None):
+    """
+    Consulta as leituras de um quarto e tipo em um intervalo de tempo (usa o índice).
+
+    Args:
+        path: Caminho do banco de histórico
+        room_id: ID do quarto
+        temp_type: "0" para ambiente, "1" para referência
+        start: Timestamp inicial em segundos desde a época (inclusive) ou None
+        end: Timestamp final em segundos desde a época (inclusive) ou None
+
+    Returns:
+        tuple: (timestamps, valores) como arrays do NumPy, em ordem de timestamp
+    """
+    sql = "SELECT timestamp, value FROM readings WHERE room_id = ? AND type = ?"
+    params = [room_id, temp_type]
+    if start is not None:
+        sql += " AND timestamp >= ?"
+        params.append(start)
+    if end is not None:
+        sql += " AND timestamp <= ?"
+        params.append(end)
+    sql += " ORDER BY timestamp"
+
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(sql, params).fetchall()
+    finally:
+        conn.close()
+    if not rows:
+        return np.empty(0), np.empty(0)
+    data = np.array(rows, dtype=np.float64)
+    return data[:, 0], data[:, 1]
+
+
+class HistoryWriter:
+    """
+    Grava o histórico de leituras em SQLite a partir de uma thread dedicada.
+
+    As threads de ingestão apenas acrescentam linhas em um deque (sem locks nem I/O); a thread
+    de escrita acorda a cada `flush_interval_ms` ou quando há `batch_size` linhas pendentes e
+    grava tudo em transações de até `batch_size` linhas. Se a fila passar de `queue_maxsize`,
+    as linhas novas são descartadas e contabilizadas em `dropped`.
+
+    Com `segment_writer`, cada lote também é gravado nos segmentos colunares mapeados em
+    memória (`history_segments.py`), na mesma thread. Com `path` None, apenas os segmentos
+    são gravados.
+
+    Um erro ao gravar um lote não encerra a thread: erros transitórios do SQLite (banco
+    bloqueado, disco cheio) são tentados de novo até `retry_attempts` vezes, com espera dobrada
+    a cada tentativa; se ainda assim o lote não for gravado, ele é registrado no log
+    "monitor.history" e contado em `failed_rows` (SQLite) ou `segment_failed_rows` (segmentos).
+    """
+
+    def __init__(self, path, batch_size=HISTORY_BATCH_SIZE, flush_interval_ms=HISTORY_FLUSH_INTERVAL_MS,
+                 queue_maxsize=HISTORY_QUEUE_MAXSIZE, segment_writer=None, retry_attempts=HISTORY_RETRY_ATTEMPTS,
+                 retry_delay_ms=HISTORY_RETRY_DELAY_MS):
+        self.path = path
+        self.segment_writer = segment_writer
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval_ms / 1000.0
+        self.queue_maxsize = queue_maxsize
+        self.retry_attempts = retry_attempts
+        self.retry_delay = retry_delay_ms / 1000.0
+
+        self._rows = deque()
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+
+        # Contadores
+        self.dropped = 0
+        self.failed_rows = 0
+        self.segment_failed_rows = 0
+        self.rows_written = 0
+        self.transactions = 0
+        self.last_commit_ms = 0.0
+        self.max_commit_ms = 0.0
+
+    def start(self):
+        """Abre o banco e inicia a thread de escrita."""
+        # Abre (e cria) o banco antes de iniciar a thread para que erros apareçam na inicialização
+        if self.path is not None:
+            open_history_db(self.path).close()
+        self._thread = threading.Thread(target=self._run, name="HistoryWriter", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Grava as linhas pendentes e encerra a thread de escrita."""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def write(self, room_id, temp_type, timestamp, value):
+        """Enfileira uma leitura para gravação (não bloqueia)."""
+        rows = self._rows
+        if len(rows) >= self.queue_maxsize:
+            self.dropped += 1
+            return
+        rows.append((room_id, temp_type, timestamp, value))
+        if len(rows) >= self.batch_size:
+            self._wakeup.set()
+
+    def write_many(self, room_id, temp_type, timestamps, values):
+        """Enfileira um lote de leituras de um mesmo quarto e tipo (não bloqueia)."""
+        rows = self._rows
+        available = self.queue_maxsize - len(rows)
+        count = len(values)
+        if count > available:
+            self.dropped += count - max(available, 0)
+            count = max(available, 0)
+        rows.extend((room_id, temp_type, float(timestamps[i]), float(values[i])) for i in range(count))
+        if len(rows) >= self.batch_size:
+            self._wakeup.set()
+
+    def pending(self):
+        """Número de linhas aguardando gravação."""
+        return len(self._rows)
+
+    def stats(self):
+        """Retorna os contadores da gravação do histórico."""
+        return {
+            "pending": len(self._rows),
+            "rows_written": self.rows_written,
+            "transactions": self.transactions,
+            "dropped": self.dropped,
+            "failed_rows": self.failed_rows,
+            "segment_failed_rows": self.segment_failed_rows,
+            "last_commit_ms": self.last_commit_ms,
+            "max_commit_ms": self.max_commit_ms,
+        }
+
+    def register_metrics(self, metrics):
+        """Exporta as linhas descartadas e as que falharam nas métricas do motor."""
+        metrics.add_gauge("monitor_history_pending", "Linhas aguardando gravação no histórico", self.pending)
+        metrics.add_gauge("monitor_history_dropped_total", "Linhas do histórico descartadas com a fila cheia",
+                          lambda: self.dropped, kind="counter")
+        metrics.add_gauge("monitor_history_failed_rows_total", "Linhas que não puderam ser gravadas no SQLite",
+                          lambda: self.failed_rows, kind="counter")
+        metrics.add_gauge("monitor_history_segment_failed_rows_total",
+                          "Linhas que não puderam ser gravadas nos segmentos",
+                          lambda: self.segment_failed_rows, kind="counter")
+
+    def _run(self):
+        conn = open_history_db(self.path) if self.path is not None else None
+        try:
+            while True:
+                if len(self._rows) < self.batch_size:
+                    self._wakeup.wait(self.flush_interval)
+                self._wakeup.clear()
+                self._flush(conn)
+                if self._stopping and not self._rows:
+                    break
+        finally:
+            if conn is not None:
+                conn.close()
+            if self.segment_writer is not None:
+                self.segment_writer.close()
+
+    def _flush(self, conn):
+        """Grava as linhas pendentes em transações de até `batch_size` linhas."""
+        rows = self._rows
+        popleft = rows.popleft
+        while rows:
+            batch = [popleft() for _ in range(min(len(rows), self.batch_size))]
+            started_at = time.perf_counter()
+            written = True
+            if conn is not None and not self._insert(conn, batch):
+                self.failed_rows += len(batch)
+                written = False
+            if self.segment_writer is not None:
+                try:
+                    self.segment_writer.write_rows(batch)
+                except Exception as e:
+                    # Ex.: OSError ao criar ou aumentar um segmento (disco cheio)
+                    self.segment_failed_rows += len(batch)
+                    written = written and conn is not None
+                    logger.error("Falha ao gravar %d leituras nos segmentos de histórico: %s", len(batch), e)
+            if not written:
+                continue
+            elapsed_ms = (time.perf_counter() - started_at) * 1000.0
+            self.rows_written += len(batch)
+            self.transactions += 1
+            self.last_commit_ms = elapsed_ms
+            if elapsed_ms > self.max_commit_ms:
+                self.max_commit_ms = elapsed_ms
+
+    def _insert(self, conn, batch):
+        """
+        Grava um lote em uma transação, tentando de novo após erros transitórios.
+
+        Returns:
+            bool: False se o lote não pôde ser gravado
+        """
+        delay = self.retry_delay
+        for attempt in range(self.retry_attempts + 1):
+            try:
+                with conn:
+                    conn.executemany(_INSERT, batch)
+                return True
+            except sqlite3.OperationalError as e:
+                # Banco bloqueado por outro processo, disco cheio ou erro de I/O: podem passar
+                if attempt == self.retry_attempts or self._stopping:
+                    error = e
+                    break
+                logger.warning("Falha ao gravar o histórico (tentativa %d de %d): %s",
+                               attempt + 1, self.retry_attempts + 1, e)
+                time.sleep(delay)
+                delay *= 2
+            except Exception as e:
+                error = e
+                break
+        logger.error("%d leituras não foram gravadas no histórico %s: %s", len(batch), self.path, error)
+        return False
@@ -0,0 +1,373 @@
+import logging
+import mmap
+import os
+import struct
+from collections import OrderedDict
+from datetime import datetime, timezone
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+from config import HISTORY_SEGMENT_INITIAL_CAPACITY, HISTORY_SEGMENTS_MAX_OPEN, HISTORY_SEGMENTS_FD_RESERVE
+
+try:
+    import resource  # Limite de descritores de arquivo (apenas Unix)
+except ImportError:
+    resource = None
+
+logger = logging.getLogger("monitor.history")
+
+# Cabeçalho: magic, capacidade, número de leituras gravadas, início do dia (ns) e flags
+MAGIC = b"TSEG0001"
+_HEADER = struct.Struct("<8sQQqQ")
+_COUNT_OFFSET = 16
+_FLAGS_OFFSET = 32
+HEADER_SIZE = 64
+
+FLAG_UNSORTED = 1  # Alguma leitura foi gravada fora de ordem
+FLAG_SUPERSEDED = 2  # O arquivo foi substituído por uma versão maior; leitores devem reabri-lo
+
+NS_PER_SECOND = 1_000_000_000
+NS_PER_DAY = 86400 * NS_PER_SECOND
+
+SEGMENT_SUFFIX = ".seg"
+
+
+def to_epoch_ns(timestamps):
+    """Converte segundos desde a época (float) para nanossegundos (int64)."""
+    return np.round(np.asarray(timestamps, dtype=np.float64) * NS_PER_SECOND).astype(np.int64)
+
+
+def segment_path(root, room_id, temp_type, day):
+    """
+    Caminho do segmento de um quarto, tipo e dia (dias desde a época).
+    O ID do quarto é codificado para ser um nome de diretório válido.
+    """
+    date = datetime.fromtimestamp(day * 86400, timezone.utc).strftime("%Y-%m-%d")
+    return os.path.join(root, quote(room_id, safe=""), temp_type, date + SEGMENT_SUFFIX)
+
+
+def descriptor_budget(reserve=HISTORY_SEGMENTS_FD_RESERVE):
+    """Segmentos que podem ficar abertos ao mesmo tempo pelo limite de descritores do processo (None: sem limite)."""
+    if resource is None:
+        return None
+    soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if soft == resource.RLIM_INFINITY:
+        return None
+    return max(soft - reserve, 1)
+
+
+def _segment_day(file_name):
+    date = datetime.strptime(file_name[:-len(SEGMENT_SUFFIX)], "%Y-%m-%d").replace(tzinfo=timezone.utc)
+    return int(date.timestamp()) // 86400
+
+
+class Segment:
+    """
+    Arquivo de segmento de um dia mapeado em memória.
+
+    Layout: cabeçalho de 64 bytes, coluna de `capacity` timestamps int64 (ns desde a época) e
+    coluna de `capacity` valores float32. Apenas as primeiras `count` posições são válidas; o
+    escritor grava as colunas antes de atualizar `count`, então leitores em outros processos
+    sempre veem um prefixo consistente.
+    """
+
+    __slots__ = ("path", "capacity", "_mm")
+
+    def __init__(self, path, writable=False):
+        self.path = path
+        # O mmap duplica o descritor; o arquivo é fechado logo em seguida, então cada segmento
+        # aberto ocupa um único descritor
+        with open(path, "r+b" if writable else "rb") as f:
+            access = mmap.ACCESS_WRITE if writable else mmap.ACCESS_READ
+            self._mm = mmap.mmap(f.fileno(), 0, access=access)
+        magic, self.capacity, _, _, _ = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            self.close()
+            raise ValueError(f"Arquivo de segmento inválido: {path}")
+
+    @classmethod
+    def create(cls, path, capacity, day):
+        """Cria um segmento vazio (esparso) de forma atômica: arquivo temporário + rename."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, capacity, 0, day * NS_PER_DAY, 0).ljust(HEADER_SIZE, b"\0"))
+            f.truncate(HEADER_SIZE + 12 * capacity)
+        os.replace(tmp_path, path)
+        return cls(path, writable=True)
+
+    @property
+    def count(self):
+        return struct.unpack_from("<Q", self._mm, _COUNT_OFFSET)[0]
+
+    @property
+    def flags(self):
+        return struct.unpack_from("<Q", self._mm, _FLAGS_OFFSET)[0]
+
+    def _set_flags(self, flags):
+        struct.pack_into("<Q", self._mm, _FLAGS_OFFSET, flags)
+
+    def timestamps_ns(self, count=None):
+        """View (sem cópia) dos timestamps gravados, em nanossegundos desde a época."""
+        return np.frombuffer(self._mm, dtype=np.int64, count=self.count if count is None else count,
+                             offset=HEADER_SIZE)
+
+    def values(self, count=None):
+        """View (sem cópia) dos valores gravados (float32)."""
+        return np.frombuffer(self._mm, dtype=np.float32, count=self.count if count is None else count,
+                             offset=HEADER_SIZE + 8 * self.capacity)
+
+    def append(self, timestamps_ns, values):
+        """Grava leituras no fim das colunas (o chamador garante a capacidade)."""
+        count = self.count
+        new_count = count + len(timestamps_ns)
+        ts_column = np.frombuffer(self._mm, dtype=np.int64, count=self.capacity, offset=HEADER_SIZE)
+        value_column = np.frombuffer(self._mm, dtype=np.float32, count=self.capacity,
+                                     offset=HEADER_SIZE + 8 * self.capacity)
+        ts_column[count:new_count] = timestamps_ns
+        value_column[count:new_count] = values
+
+        out_of_order = (count > 0 and timestamps_ns[0] < ts_column[count - 1]) or (
+            len(timestamps_ns) > 1 and np.any(timestamps_ns[1:] < timestamps_ns[:-1]))
+        if out_of_order and not self.flags & FLAG_UNSORTED:
+            self._set_flags(self.flags | FLAG_UNSORTED)
+        del ts_column, value_column
+        # Publica as leituras somente depois que as colunas foram escritas
+        struct.pack_into("<Q", self._mm, _COUNT_OFFSET, new_count)
+
+    def close(self):
+        """Fecha o mapeamento. Views ainda em uso mantêm o mapeamento aberto até serem liberadas."""
+        try:
+            self._mm.close()
+        except BufferError:
+            pass
+
+
+class SegmentWriter:
+    """
+    Grava o histórico em segmentos colunares por quarto, tipo e dia (`<raiz>/<quarto>/<tipo>/<AAAA-MM-DD>.seg`).
+
+    Usado pela thread do HistoryWriter. Os segmentos abertos ficam em cache (LRU). O cache
+    comporta ao menos `max_open` arquivos e cresce até um por quarto/tipo já gravado, para que o
+    segmento do dia de cada sensor continue mapeado entre os lotes; o teto é o limite de
+    descritores do processo (`descriptor_budget`). Quando um segmento enche, é recriado com o
+    dobro da capacidade e substitui o anterior com um rename atômico; o antigo é marcado como
+    substituído para que leitores o reabram.
+    """
+
+    def __init__(self, root, initial_capacity=HISTORY_SEGMENT_INITIAL_CAPACITY, max_open=HISTORY_SEGMENTS_MAX_OPEN,
+                 max_descriptors=None):
+        self.root = root
+        self.initial_capacity = initial_capacity
+        self.max_open = max_open
+        self.max_descriptors = descriptor_budget() if max_descriptors is None else max_descriptors
+        self._open = OrderedDict()  # (room_id, temp_type, dia) -> Segment
+        self._series = set()  # (room_id, temp_type) já gravados: tamanho do conjunto ativo
+        self._limit_warned = False
+        # Leituras que cada segmento já tinha quando este escritor o abriu pela primeira vez;
+        # registrado antes da primeira gravação, para que leitores separem o histórico anterior
+        self.initial_counts = {}  # (room_id, temp_type, dia) -> leituras
+        self.rows_written = 0
+
+    def write_rows(self, rows):
+        """Grava uma lista de linhas (room_id, temp_type, timestamp, valor), agrupando por quarto e tipo."""
+        groups = {}
+        for room_id, temp_type, timestamp, value in rows:
+            group = groups.get((room_id, temp_type))
+            if group is None:
+                group = groups[(room_id, temp_type)] = ([], [])
+            group[0].append(timestamp)
+            group[1].append(value)
+        for (room_id, temp_type), (timestamps, values) in groups.items():
+            self.write_many(room_id, temp_type, timestamps, values)
+
+    def write_many(self, room_id, temp_type, timestamps, values):
+        """Grava um lote de leituras de um mesmo quarto e tipo, separando-as por dia."""
+        timestamps_ns = to_epoch_ns(timestamps)
+        values = np.asarray(values, dtype=np.float32)
+        if len(timestamps_ns) == 0:
+            return
+        days = timestamps_ns // NS_PER_DAY
+        if np.all(days == days[0]):
+            self._append(room_id, temp_type, int(days[0]), timestamps_ns, values)
+        else:
+            for day in np.unique(days):
+                mask = days == day
+                self._append(room_id, temp_type, int(day), timestamps_ns[mask], values[mask])
+        self.rows_written += len(timestamps_ns)
+
+    def open_limit(self):
+        """Segmentos mantidos abertos: ao menos `max_open`, um por quarto/tipo ativo, até o limite de descritores."""
+        limit = max(self.max_open, len(self._series))
+        if self.max_descriptors is not None and limit > self.max_descriptors:
+            if not self._limit_warned:
+                self._limit_warned = True
+                logger.warning("%d séries de histórico, mas apenas %d segmentos podem ficar abertos pelo limite "
+                               "de descritores; aumente `ulimit -n` para evitar reabrir segmentos a cada lote",
+                               len(self._series), self.max_descriptors)
+            limit = self.max_descriptors
+        return limit
+
+    def _append(self, room_id, temp_type, day, timestamps_ns, values):
+        key = (room_id, temp_type, day)
+        segment = self._open.get(key)
+        if segment is None:
+            self._series.add((room_id, temp_type))
+            path = segment_path(self.root, room_id, temp_type, day)
+            if os.path.exists(path):
+                segment = Segment(path, writable=True)
+            else:
+                segment = Segment.create(path, max(self.initial_capacity, len(timestamps_ns)), day)
+            self.initial_counts.setdefault(key, segment.count)
+            self._open[key] = segment
+            if len(self._open) > self.open_limit():
+                _, evicted = self._open.popitem(last=False)
+                evicted.close()
+        else:
+            self._open.move_to_end(key)
+
+        if segment.count + len(timestamps_ns) > segment.capacity:
+            segment = self._open[key] = self._grow(segment, day, segment.count + len(timestamps_ns))
+        segment.append(timestamps_ns, values)
+
+    def _grow(self, segment, day, required):
+        """Recria o segmento com capacidade maior, copiando as colunas, e substitui o arquivo."""
+        capacity = segment.capacity
+        while capacity < required:
+            capacity *= 2
+        count = segment.count
+        tmp_path = segment.path + ".grow"
+        with open(tmp_path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, capacity, 0, day * NS_PER_DAY, segment.flags).ljust(HEADER_SIZE, b"\0"))
+            f.truncate(HEADER_SIZE + 12 * capacity)
+        grown = Segment(tmp_path, writable=True)
+        grown.append(segment.timestamps_ns(count), segment.values(count))
+        grown._set_flags(segment.flags & FLAG_UNSORTED)
+        os.replace(tmp_path, segment.path)
+        grown.path = segment.path
+        segment._set_flags(segment.flags | FLAG_SUPERSEDED)
+        segment.close()
+        return grown
+
+    def close(self):
+        """Descarrega e fecha todos os segmentos abertos."""
+        for segment in self._open.values():
+            segment._mm.flush()
+            segment.close()
+        self._open.clear()
+
+
+class SegmentReader:
+    """
+    Leitura do histórico em segmentos, com views do NumPy diretamente sobre os arquivos mapeados.
+
+    Nenhuma leitura é interpretada ou copiada individualmente: cada dia é um par de views sobre o
+    page cache, que pode ser compartilhado por vários processos do monitor no mesmo host.
+    """
+
+    def __init__(self, root, max_open=HISTORY_SEGMENTS_MAX_OPEN):
+        self.root = root
+        self.max_open = max_open
+        self._open = OrderedDict()  # caminho -> Segment
+
+    def room_ids(self):
+        """IDs dos quartos com histórico em disco."""
+        if not os.path.isdir(self.root):
+            return []
+        return [unquote(name) for name in os.listdir(self.root)
+                if os.path.isdir(os.path.join(self.root, name))]
+
+    def days(self, room_id, temp_type):
+        """Dias (desde a época) com segmento gravado, em ordem."""
+        directory = os.path.join(self.root, quote(room_id, safe=""), temp_type)
+        if not os.path.isdir(directory):
+            return []
+        return sorted(_segment_day(name) for name in os.listdir(directory) if name.endswith(SEGMENT_SUFFIX))
+
+    def _segment(self, path):
+        segment = self._open.get(path)
+        if segment is not None:
+            if not segment.flags & FLAG_SUPERSEDED:
+                self._open.move_to_end(path)
+                return segment
+            # O escritor substituiu o arquivo por uma versão maior: reabre
+            del self._open[path]
+            segment.close()
+        if not os.path.exists(path):
+            return None
+        segment = self._open[path] = Segment(path)
+        if len(self._open) > self.max_open:
+            _, evicted = self._open.popitem(last=False)
+            evicted.close()
+        return segment
+
+    def day_views(self, room_id, temp_type, day, prior_counts=None):
+        """
+        Retorna as leituras de um dia.
+
+        Args:
+            prior_counts: `SegmentWriter.initial_counts` do escritor deste processo; se informado,
+                retorna apenas as leituras gravadas antes de ele começar a escrever no segmento
+
+        Returns:
+            tuple or None: (timestamps em ns, valores float32) como views sem cópia, ou None
+        """
+        segment = self._segment(segment_path(self.root, room_id, temp_type, day))
+        if segment is None:
+            return None
+        count = segment.count
+        if prior_counts is not None:
+            # Lido depois de `count`: o escritor registra a contagem inicial antes de gravar
+            count = min(count, prior_counts.get((room_id, temp_type, day), count))
+        timestamps_ns, values = segment.timestamps_ns(count), segment.values(count)
+        if segment.flags & FLAG_UNSORTED:
+            # Raro: leituras gravadas fora de ordem precisam ser ordenadas (cópia)
+            order = np.argsort(timestamps_ns, kind="stable")
+            timestamps_ns, values = timestamps_ns[order], values[order]
+        return timestamps_ns, values
+
+    def iter_range(self, room_id, temp_type, start=None, end=None, prior_counts=None):
+        """
+        Percorre as leituras de [start, end] (segundos desde a época), um dia por vez
+        (`prior_counts` como em `day_views`).
+
+        Yields:
+            tuple: (timestamps em ns, valores float32) como views sem cópia de cada dia
+        """
+        start_ns = None if start is None else int(start * NS_PER_SECOND)
+        end_ns = None if end is None else int(end * NS_PER_SECOND)
+        for day in self.days(room_id, temp_type):
+            if start_ns is not None and (day + 1) * NS_PER_DAY <= start_ns:
+                continue
+            if end_ns is not None and day * NS_PER_DAY > end_ns:
+                break
+            views = self.day_views(room_id, temp_type, day, prior_counts)
+            if views is None:
+                continue
+            timestamps_ns, values = views
+            lo = 0 if start_ns is None else np.searchsorted(timestamps_ns, start_ns, "left")
+            hi = len(timestamps_ns) if end_ns is None else np.searchsorted(timestamps_ns, end_ns, "right")
+            if hi > lo:
+                yield timestamps_ns[lo:hi], values[lo:hi]
+
+    def load_range(self, room_id, temp_type, start=None, end=None):
+        """
+        Retorna as leituras de [start, end]. Se o intervalo cabe em um único dia, os arrays são
+        views sem cópia; caso contrário, cada coluna é concatenada com uma única alocação.
+
+        Returns:
+            tuple: (timestamps em ns int64, valores float32)
+        """
+        parts = list(self.iter_range(room_id, temp_type, start, end))
+        if not parts:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        if len(parts) == 1:
+            return parts[0]
+        return (np.concatenate([timestamps_ns for timestamps_ns, _ in parts]),
+                np.concatenate([values for _, values in parts]))
+
+    def close(self):
+        for segment in self._open.values():
+            segment.close()
+        self._open.clear()
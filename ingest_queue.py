@@ -0,0 +1,138 @@
+import time
+from collections import deque
+
+
+class IngestQueue:
+    """
+    Fila limitada entre a thread de rede do MQTT (produtora) e a thread do Tk (consumidora).
+
+    Usa um deque, cujas operações append/popleft são atômicas no CPython, portanto
+    a thread do MQTT apenas insere itens sem precisar de locks. Quando a fila está
+    cheia, o item novo é descartado e contabilizado em `dropped`.
+    """
+
+    # Intervalo mínimo (s) entre marcas de tempo de inserção: limita o custo por item a uma leitura do relógio
+    PUT_TIME_RESOLUTION = 0.001
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._items = deque()
+
+        # Contadores atualizados pela thread produtora
+        self.total_put = 0
+        self.dropped = 0
+
+        # Marcas (posição na fila, instante de `time.monotonic()` ou None) dos itens inseridos com
+        # `timed=True`; cada marca vale para os itens seguintes até a próxima marca
+        self._put_times = deque()
+        self._last_put_time = 0.0
+
+        # Contadores atualizados pela thread consumidora
+        self.total_drained = 0
+        self.drain_count = 0
+        self.max_depth = 0
+        self.last_batch_size = 0
+        self.last_drain_ms = 0.0
+        self.max_drain_ms = 0.0
+        self.total_drain_ms = 0.0
+
+    def put(self, item, timed=False):
+        """
+        Insere um item na fila (seguro para chamar a partir de qualquer thread).
+
+        Args:
+            item: Item a ser inserido
+            timed: Se True, registra o instante da inserção, com resolução de
+                `PUT_TIME_RESOLUTION` (ver `pop_put_times`)
+
+        Returns:
+            bool: True se o item foi aceito, False se foi descartado por falta de espaço
+        """
+        if len(self._items) >= self.maxsize:
+            self.dropped += 1
+            return False
+        self._items.append(item)
+        if timed:
+            now = time.monotonic()
+            if now - self._last_put_time >= self.PUT_TIME_RESOLUTION:
+                self._put_times.append((self.total_put, now))
+                self._last_put_time = now
+        elif self._last_put_time:
+            # Fim de um trecho com marcas de tempo: os itens seguintes não são medidos
+            self._put_times.append((self.total_put, None))
+            self._last_put_time = 0.0
+        self.total_put += 1
+        return True
+
+    def drain(self, max_items):
+        """
+        Remove até `max_items` itens da fila, em ordem de chegada.
+
+        Deve ser chamado apenas pela thread consumidora.
+        """
+        items = self._items
+        depth = len(items)
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+        count = min(depth, max_items)
+        popleft = items.popleft
+        batch = [popleft() for _ in range(count)]
+        self.total_drained += count
+        self.last_batch_size = count
+        return batch
+
+    def pop_put_times(self):
+        """
+        Remove e retorna as marcas de tempo de inserção dos itens já drenados que foram
+        inseridos com `timed=True`. Deve ser chamado apenas pela thread consumidora.
+
+        Returns:
+            list: (instante de `time.monotonic()`, número de itens), em ordem de chegada
+        """
+        put_times = self._put_times
+        drained = self.total_drained
+        result = []
+        while put_times and put_times[0][0] < drained:
+            position, put_time = put_times.popleft()
+            if put_times and put_times[0][0] <= drained:
+                end = put_times[0][0]
+            else:
+                # Marca ainda aberta ou drenada em parte: continua valendo a partir de `drained`
+                put_times.appendleft((drained, put_time))
+                end = drained
+            if put_time is not None and end > position:
+                result.append((put_time, end - position))
+        return result
+
+    def record_drain_time(self, started_at):
+        """Registra o tempo gasto aplicando um lote, a partir de um valor de `time.perf_counter()`."""
+        elapsed_ms = (time.perf_counter() - started_at) * 1000.0
+        self.drain_count += 1
+        self.last_drain_ms = elapsed_ms
+        self.total_drain_ms += elapsed_ms
+        if elapsed_ms > self.max_drain_ms:
+            self.max_drain_ms = elapsed_ms
+
+    def __len__(self):
+        return len(self._items)
+
+    def full(self):
+        """True se o próximo `put` seria descartado (para produtores que preferem aguardar)."""
+        return len(self._items) >= self.maxsize
+
+    def stats(self):
+        """Retorna um dicionário com a profundidade da fila e os contadores de drenagem."""
+        avg_drain_ms = self.total_drain_ms / self.drain_count if self.drain_count else 0.0
+        return {
+            "depth": len(self._items),
+            "max_depth": self.max_depth,
+            "total_put": self.total_put,
+            "total_drained": self.total_drained,
+            "dropped": self.dropped,
+            "drain_count": self.drain_count,
+            "last_batch_size": self.last_batch_size,
+            "last_drain_ms": self.last_drain_ms,
+            "avg_drain_ms": avg_drain_ms,
+            "max_drain_ms": self.max_drain_ms,
+        }
@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Gerador de carga sintética para o monitor de temperatura.
+
+Simula N quartos (até dezenas de milhares) publicando leituras a uma taxa configurável, com
+padrão constante ou em rajadas. As mensagens podem ser injetadas diretamente no
+`MQTTTemperatureClient.on_message` (sem broker) ou publicadas em um broker MQTT real.
+"""
+
+import argparse
+import json
+import random
+import struct
+import time
+
+
+class FakeMessage:
+    """Mensagem com os mesmos atributos usados de `paho.mqtt.client.MQTTMessage`."""
+
+    __slots__ = ("topic", "payload")
+
+    def __init__(self, topic, payload):
+        self.topic = topic
+        self.payload = payload
+
+
+class LoadGenerator:
+    """
+    Gera leituras de temperatura para `rooms` quartos a `rate` mensagens por segundo.
+
+    Padrões de carga:
+        - "constant": taxa fixa
+        - "burst": a cada `burst_period` segundos, durante `burst_duration` segundos, a taxa
+          é multiplicada por `burst_factor`
+
+    Os timestamps dos payloads são o horário (segundos desde a época) em que cada mensagem
+    é gerada, o que permite medir a latência de ponta a ponta no consumidor.
+    """
+
+    def __init__(self, rooms=100, rate=1000.0, pattern="constant", burst_factor=10.0, burst_period=10.0,
+                 burst_duration=1.0, reference_ratio=0.05, batch_size=1, codec="json", seed=None):
+        """
+        Args:
+            rooms: Número de quartos simulados
+            rate: Mensagens por segundo (fora das rajadas)
+            pattern: "constant" ou "burst"
+            burst_factor: Multiplicador da taxa durante as rajadas
+            burst_period: Intervalo entre o início de duas rajadas (s)
+            burst_duration: Duração de cada rajada (s)
+            reference_ratio: Fração das mensagens que são temperaturas de referência (Y=1)
+            batch_size: Leituras por mensagem; acima de 1 usa os tópicos "/sensors/X/Y/batch"
+            codec: "json" ou "struct" (binário "<dd" por leitura)
+            seed: Semente do gerador aleatório (para execuções reproduzíveis)
+        """
+        if pattern not in ("constant", "burst"):
+            raise ValueError(f"Padrão de carga desconhecido: {pattern}")
+        if codec not in ("json", "struct"):
+            raise ValueError(f"Codec desconhecido: {codec}")
+
+        self.rooms = rooms
+        self.rate = rate
+        self.pattern = pattern
+        self.burst_factor = burst_factor
+        self.burst_period = burst_period
+        self.burst_duration = burst_duration
+        self.reference_ratio = reference_ratio
+        self.batch_size = batch_size
+        self.codec = codec
+        self._random = random.Random(seed)
+
+        # Tópicos e temperaturas de base pré-calculados por quarto
+        self.room_ids = [str(100 + index) for index in range(rooms)]
+        suffix = "/batch" if batch_size > 1 else ""
+        self._topics = {
+            temp_type: [f"/sensors/{room_id}/{temp_type}{suffix}" for room_id in self.room_ids]
+            for temp_type in ("0", "1")
+        }
+        self._base = [self._random.uniform(20.0, 24.0) for _ in range(rooms)]
+
+        self.messages_sent = 0
+        self.readings_sent = 0
+
+    def rate_at(self, elapsed):
+        """Taxa de mensagens por segundo no instante `elapsed` (s desde o início)."""
+        if self.pattern == "burst" and elapsed % self.burst_period < self.burst_duration:
+            return self.rate * self.burst_factor
+        return self.rate
+
+    def _payload(self, timestamp, value):
+        if self.codec == "struct":
+            if self.batch_size > 1:
+                return b"".join(struct.pack("<dd", timestamp + i * 1e-3, value) for i in range(self.batch_size))
+            return struct.pack("<dd", timestamp, value)
+        if self.batch_size > 1:
+            return json.dumps([{"timestamp": timestamp + i * 1e-3, "value": value}
+                               for i in range(self.batch_size)]).encode()
+        return json.dumps({"timestamp": timestamp, "value": value}).encode()
+
+    def make_message(self, now=None):
+        """Gera uma mensagem para um quarto aleatório."""
+        now = time.time() if now is None else now
+        index = self._random.randrange(self.rooms)
+        if self._random.random() < self.reference_ratio:
+            temp_type, value = "1", 22.0
+        else:
+            temp_type = "0"
+            value = self._base[index] + self._random.gauss(0.0, 1.0)
+        self.messages_sent += 1
+        self.readings_sent += self.batch_size
+        return FakeMessage(self._topics[temp_type][index], self._payload(now, round(value, 2)))
+
+    def run(self, sink, duration, tick=0.005, stop_event=None, on_tick=None):
+        """
+        Entrega mensagens a `sink(mensagem)` seguindo a taxa e o padrão configurados.
+
+        A cada `tick` segundos gera as mensagens devidas até o momento; se o consumidor
+        (`sink`) for mais lento que a taxa pedida, a geração atrasa em vez de acumular.
+
+        Args:
+            sink: Função chamada com cada FakeMessage
+            duration: Duração da geração em segundos
+            tick: Intervalo entre rodadas de geração
+            stop_event: threading.Event opcional para interromper antes do fim
+            on_tick: Função opcional chamada ao fim de cada rodada com (instante, mensagens enviadas)
+        """
+        started_at = time.monotonic()
+        due = 0.0
+        last = started_at
+        while True:
+            now = time.monotonic()
+            elapsed = now - started_at
+            if elapsed >= duration or (stop_event is not None and stop_event.is_set()):
+                break
+            due += self.rate_at(elapsed) * (now - last)
+            last = now
+
+            count = int(due)
+            due -= count
+            wall_now = time.time()
+            for _ in range(count):
+                sink(self.make_message(wall_now))
+            if on_tick is not None:
+                on_tick(now, self.messages_sent)
+
+            sleep_for = tick - (time.monotonic() - now)
+            if sleep_for > 0:
+                time.sleep(sleep_for)
+
+
+def parse_args():
+    """Lê as opções de linha de comando"""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rooms", type=int, default=100, help="Número de quartos simulados")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Mensagens por segundo")
+    parser.add_argument("--duration", type=float, default=10.0, help="Duração em segundos")
+    parser.add_argument("--pattern", choices=("constant", "burst"), default="constant", help="Padrão de carga")
+    parser.add_argument("--burst-factor", type=float, default=10.0, help="Multiplicador da taxa nas rajadas")
+    parser.add_argument("--burst-period", type=float, default=10.0, help="Intervalo entre rajadas (s)")
+    parser.add_argument("--burst-duration", type=float, default=1.0, help="Duração de cada rajada (s)")
+    parser.add_argument("--batch-size", type=int, default=1, help="Leituras por mensagem (>1 usa /sensors/X/Y/batch)")
+    parser.add_argument("--codec", choices=("json", "struct"), default="json", help="Formato dos payloads")
+    parser.add_argument("--broker", default="localhost", help="Broker MQTT")
+    parser.add_argument("--port", type=int, default=1883, help="Porta do broker MQTT")
+    return parser.parse_args()
+
+
+def main():
+    """Publica a carga sintética em um broker MQTT real."""
+    import paho.mqtt.client as mqtt
+
+    args = parse_args()
+    generator = LoadGenerator(
+        rooms=args.rooms, rate=args.rate, pattern=args.pattern, burst_factor=args.burst_factor,
+        burst_period=args.burst_period, burst_duration=args.burst_duration,
+        batch_size=args.batch_size, codec=args.codec
+    )
+    client = mqtt.Client()
+    client.connect(args.broker, args.port, 60)
+    client.loop_start()
+    print(f"Publicando {args.rate:.0f} msg/s para {args.rooms} quartos por {args.duration:.0f}s...")
+    started_at = time.monotonic()
+    try:
+        generator.run(lambda message: client.publish(message.topic, message.payload), args.duration)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.loop_stop()
+        client.disconnect()
+    elapsed = time.monotonic() - started_at
+    print(f"{generator.messages_sent} mensagens ({generator.readings_sent} leituras) em {elapsed:.1f}s "
+          f"= {generator.messages_sent / max(elapsed, 1e-9):.0f} msg/s")
+
+
+if __name__ == "__main__":
+    main()
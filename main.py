@@ -1,39 +1,359 @@
-import tkinter as tk
+import argparse
+import logging
+import sys
+import threading
+import time
+
+import startup_profile
+
+# Com --profile-startup, a medição começa antes dos imports da aplicação para incluí-los no relatório
+if "--profile-startup" in sys.argv:
+    startup_profile.install()
+
 from mqtt_client import MQTTTemperatureClient
-from gui import TemperatureMonitorGUI
-from config import MQTT_BROKER, MQTT_PORT, MQTT_TOPIC
+from monitor_engine import MonitorEngine
+from event_log import EventLog, audit_alert_events
+from snapshot import SnapshotWriter, read_snapshot
+from history_db import HistoryWriter
+from history_segments import SegmentReader, SegmentWriter
+from metrics import MetricsServer
+from config import MQTT_BROKER, MQTT_PORT, MQTT_TOPIC, HISTORY_DB_PATH, HISTORY_SEGMENTS_DIR
+from config import HISTORY_SEGMENTS_BACKFILL_DAYS, METRICS_HTTP_HOST, METRICS_HTTP_PORT
+from config import INGEST_WORKERS, INGEST_SHARD_MODE, SNAPSHOT_PATH, SNAPSHOT_MAX_AGE_S
 
-def main():
-    root = tk.Tk()
+logger = logging.getLogger("monitor.app")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Monitor de temperatura de quartos via MQTT")
+    parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="Executa apenas o cliente MQTT e o motor de alertas, sem interface gráfica"
+    )
+    parser.add_argument(
+        "--alert-log",
+        metavar="ARQUIVO",
+        help="No modo headless, grava as mudanças de status de alerta neste arquivo em vez de stdout"
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=INGEST_WORKERS,
+        metavar="N",
+        help="Decodifica as mensagens MQTT em N processos worker (0: um único cliente no processo principal)"
+    )
+    parser.add_argument(
+        "--shard-mode",
+        choices=("hash", "shared"),
+        default=INGEST_SHARD_MODE,
+        help="Distribuição entre os workers: partição dos quartos por hash ou assinatura compartilhada MQTT 5"
+    )
+    parser.add_argument(
+        "--async-ingest",
+        action="store_true",
+        help="Usa o pipeline de ingestão em asyncio com filas limitadas e contrapressão (async_ingest.py)"
+    )
+    parser.add_argument(
+        "--profile-startup",
+        action="store_true",
+        help="Registra o tempo de cada etapa da inicialização e dos imports até a primeira leitura na tela"
+    )
+    args = parser.parse_args()
+    if args.async_ingest and args.workers > 0:
+        parser.error("--async-ingest e --workers não podem ser usados juntos")
+    return args
+
+def start_history_writer():
+    """Inicia a gravação do histórico em disco (SQLite e/ou segmentos), se configurada."""
+    if not HISTORY_DB_PATH and not HISTORY_SEGMENTS_DIR:
+        return None
+    segment_writer = SegmentWriter(HISTORY_SEGMENTS_DIR) if HISTORY_SEGMENTS_DIR else None
+    history_writer = HistoryWriter(HISTORY_DB_PATH or None, segment_writer=segment_writer)
+    try:
+        history_writer.start()
+    except Exception as e:
+        logger.warning("Histórico em disco desativado: não foi possível abrir %s: %s", HISTORY_DB_PATH, e)
+        return None
+    return history_writer
 
-    # Inicializa a interface gráfica
-    gui = TemperatureMonitorGUI(root)
+def open_cold_history(engine):
+    """Abre os segmentos de histórico como camada fria do motor."""
+    if HISTORY_SEGMENTS_DIR:
+        engine.cold_store = SegmentReader(HISTORY_SEGMENTS_DIR)
 
-    # Inicializa o cliente MQTT com callback para atualizar a GUI
-    mqtt_client = MQTTTemperatureClient(
+def start_rollup_backfill(engine):
+    """
+    Reconstrói os agregados a partir dos segmentos de histórico em segundo plano (depois da
+    conexão, para não atrasar os primeiros dados na tela).
+    """
+    if not HISTORY_SEGMENTS_DIR or not HISTORY_SEGMENTS_BACKFILL_DAYS:
+        return None
+    return engine.start_rollup_backfill(SegmentReader(HISTORY_SEGMENTS_DIR), HISTORY_SEGMENTS_BACKFILL_DAYS * 86400)
+
+def restore_snapshot(engine):
+    """
+    Restaura o último snapshot de estado (buffers, referências e alertas) antes de conectar ao
+    MQTT, para que os quartos apareçam sem esperar a próxima leitura de cada sensor (e para que os
+    workers de ingestão no modo "hash" recebam os estados de alerta restaurados ao iniciar).
+
+    Returns:
+        EngineUpdate or None: Quartos restaurados, já entregues aos assinantes atuais do motor
+    """
+    if not SNAPSHOT_PATH:
+        return None
+    started_at = time.perf_counter()
+    try:
+        snapshot = read_snapshot(SNAPSHOT_PATH)
+    except (OSError, ValueError) as e:
+        logger.warning("Snapshot de estado ignorado: não foi possível ler %s: %s", SNAPSHOT_PATH, e)
+        return None
+    if snapshot is None:
+        return None
+    age = time.time() - snapshot.created_at
+    if SNAPSHOT_MAX_AGE_S and age > SNAPSHOT_MAX_AGE_S:
+        logger.info("Snapshot de estado ignorado: capturado há %.0f s.", age)
+        return None
+    update = engine.restore_snapshot(snapshot)
+    logger.info("Estado de %d quartos restaurado de %s em %.1f ms (capturado há %.0f s).",
+                len(snapshot), SNAPSHOT_PATH, (time.perf_counter() - started_at) * 1000.0, age)
+    return update
+
+def start_snapshot_writer(engine):
+    """Inicia a gravação periódica de snapshots de estado, se configurada."""
+    if not SNAPSHOT_PATH:
+        return None
+    snapshot_writer = SnapshotWriter(engine)
+    snapshot_writer.register_metrics(engine.metrics)
+    snapshot_writer.start()
+    return snapshot_writer
+
+def start_metrics_server(engine):
+    """Inicia o endpoint Prometheus local com as métricas do motor, se configurado."""
+    if not METRICS_HTTP_PORT:
+        return None
+    server = MetricsServer(engine.metrics, METRICS_HTTP_HOST, METRICS_HTTP_PORT)
+    try:
+        server.start()
+    except OSError as e:
+        logger.warning("Endpoint de métricas desativado: não foi possível abrir %s:%s: %s",
+                       METRICS_HTTP_HOST, METRICS_HTTP_PORT, e)
+        return None
+    logger.info("Métricas disponíveis em http://%s:%s/metrics", METRICS_HTTP_HOST, server.port)
+    return server
+
+def create_ingest_client(engine, workers, shard_mode, on_new_data_callback, on_new_batch_callback,
+                         async_ingest=False, handoff=True):
+    """
+    Cria o cliente de ingestão: um MQTTTemperatureClient no processo principal, o pipeline em
+    asyncio (`async_ingest`) ou, com `workers` > 0, a ingestão em vários processos (todos com a
+    mesma interface de conexão e encerramento).
+
+    Args:
+        handoff: No pipeline em asyncio, entrega as leituras à fila do motor (GUI) em vez de
+            aplicá-las no laço do asyncio (headless)
+    """
+    if async_ingest:
+        from async_ingest import AsyncIngestClient
+        return AsyncIngestClient(engine, handoff=handoff)
+    if workers > 0:
+        from sharded_ingest import ShardedIngest
+        logger.info("Ingestão em %d processos (modo %s).", workers, shard_mode)
+        return ShardedIngest(engine, workers=workers, mode=shard_mode)
+    return MQTTTemperatureClient(
         broker=MQTT_BROKER,
         port=MQTT_PORT,
         topic=MQTT_TOPIC,
-        on_new_data_callback=lambda room_id, timestamp, value, temp_type: gui.add_temperature_data(room_id, timestamp, value, temp_type)
+        on_new_data_callback=on_new_data_callback,
+        on_new_batch_callback=on_new_batch_callback,
+        metrics=engine.metrics
+    )
+
+def attach_event_log(engine, event_log):
+    """Exporta os contadores do log nas métricas do motor e grava as mudanças de alerta na auditoria."""
+    if event_log is None:
+        return
+    event_log.register_metrics(engine.metrics)
+    engine.subscribe(audit_alert_events)
+
+def stop_metrics_server(metrics_server):
+    if metrics_server is not None:
+        metrics_server.stop()
+
+def stop_history_writer(history_writer):
+    if history_writer is not None:
+        history_writer.stop()
+
+def stop_rollup_backfill(rollup_backfill):
+    if rollup_backfill is not None:
+        rollup_backfill.stop()
+
+def stop_snapshot_writer(snapshot_writer):
+    # Depois de encerrar a ingestão: grava o estado final
+    if snapshot_writer is not None:
+        snapshot_writer.stop()
+
+def run_headless(alert_log=None, workers=INGEST_WORKERS, shard_mode=INGEST_SHARD_MODE, async_ingest=False,
+                 event_log=None):
+    # Importado aqui para que o modo headless não carregue Tkinter nem Matplotlib
+    from headless import HeadlessMonitor
+
+    alert_output = open(alert_log, "a", encoding="utf-8") if alert_log else None
+    history_writer = start_history_writer()
+    engine = MonitorEngine(log_readings=False, history_writer=history_writer)
+    open_cold_history(engine)
+    monitor = HeadlessMonitor(engine=engine, alert_output=alert_output)
+    attach_event_log(engine, event_log)
+    restore_snapshot(engine)
+    metrics_server = start_metrics_server(engine)
+
+    mqtt_client = create_ingest_client(
+        engine, workers, shard_mode, monitor.engine.enqueue_reading, monitor.engine.enqueue_batch,
+        async_ingest=async_ingest, handoff=False
     )
 
     try:
         mqtt_client.connect_and_loop()
     except Exception as e:
-        print(f"A aplicação falhou ao iniciar devido a um erro de conexão MQTT: {e}")
+        logger.error("A aplicação falhou ao iniciar devido a um erro de conexão MQTT: %s", e)
+        stop_metrics_server(metrics_server)
+        stop_history_writer(history_writer)
+        return
+
+    snapshot_writer = start_snapshot_writer(engine)
+    rollup_backfill = start_rollup_backfill(engine)
+    startup_profile.finish()
+    logger.info("Monitor em execução sem interface gráfica. Pressione Ctrl+C para encerrar.")
+    try:
+        monitor.run(drain=not async_ingest)
+    finally:
+        stop_rollup_backfill(rollup_backfill)
+        mqtt_client.disconnect()
+        stop_snapshot_writer(snapshot_writer)
+        stop_metrics_server(metrics_server)
+        stop_history_writer(history_writer)
+        if alert_output is not None:
+            alert_output.close()
+        logger.info("Aplicação encerrada.")
+
+def connect_in_background(mqtt_client):
+    """
+    Conecta o cliente de ingestão em uma thread, em paralelo com a construção da interface.
+
+    Returns:
+        callable: Espera a conexão terminar e devolve a exceção levantada por ela (ou None)
+    """
+    errors = []
+
+    def connect():
+        try:
+            with startup_profile.phase("conexão MQTT"):
+                mqtt_client.connect_and_loop()
+        except Exception as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=connect, name="MQTTConnect", daemon=True)
+    thread.start()
+
+    def wait():
+        thread.join()
+        return errors[0] if errors else None
+    return wait
+
+def profile_first_data(root, engine):
+    """Marca o primeiro desenho da janela e a primeira leitura aplicada, e então emite o relatório."""
+    pending = {"primeiro desenho", "primeira leitura"}
+
+    def reached(name):
+        if name not in pending:
+            return
+        pending.discard(name)
+        startup_profile.mark(name)
+        if not pending:
+            startup_profile.finish()
+
+    def on_engine_update(update):
+        if update.changed_rooms:
+            unsubscribe()
+            reached("primeira leitura")
+
+    unsubscribe = engine.subscribe(on_engine_update)
+    root.after_idle(reached, "primeiro desenho")
+
+def run_gui(workers=INGEST_WORKERS, shard_mode=INGEST_SHARD_MODE, async_ingest=False, event_log=None):
+    with startup_profile.phase("Tk"):
+        import tkinter as tk
+        from gui import TemperatureMonitorGUI
+        root = tk.Tk()
+
+    # Inicializa o motor (com gravação do histórico em segundo plano)
+    with startup_profile.phase("motor e histórico"):
+        history_writer = start_history_writer()
+        engine = MonitorEngine(history_writer=history_writer)
+        open_cold_history(engine)
+
+    # O snapshot é restaurado antes da conexão: os workers no modo "hash" partem dos estados de
+    # alerta restaurados
+    with startup_profile.phase("snapshot"):
+        restored = restore_snapshot(engine)
+
+    # Inicializa o cliente MQTT e conecta em paralelo com a interface; as leituras são enfileiradas
+    # no motor e só são aplicadas em lote pela thread do Tk depois que o loop da GUI começa
+    mqtt_client = create_ingest_client(
+        engine, workers, shard_mode, engine.enqueue_reading, engine.enqueue_batch,
+        async_ingest=async_ingest
+    )
+    wait_connected = connect_in_background(mqtt_client)
+
+    with startup_profile.phase("interface"):
+        gui = TemperatureMonitorGUI(root, engine)
+    attach_event_log(engine, event_log)
+    if restored is not None:
+        # Quartos do último snapshot aparecem já no primeiro desenho, antes das primeiras leituras
+        engine.publish(restored)
+    metrics_server = start_metrics_server(engine)
+
+    error = wait_connected()
+    if error is not None:
+        logger.error("A aplicação falhou ao iniciar devido a um erro de conexão MQTT: %s", error)
         root.destroy()
+        stop_metrics_server(metrics_server)
+        stop_history_writer(history_writer)
         return
 
+    snapshot_writer = start_snapshot_writer(engine)
+    rollup_backfill = start_rollup_backfill(engine)
+
     # Atualizações iniciais
     gui.update_current_temps_display()
     gui.update_display()
 
+    if startup_profile.active():
+        profile_first_data(root, engine)
+
     # Inicia o loop da GUI
     root.mainloop()
 
     # Cleanup
+    stop_rollup_backfill(rollup_backfill)
     mqtt_client.disconnect()
-    print("Aplicação encerrada.")
+    stop_snapshot_writer(snapshot_writer)
+    stop_metrics_server(metrics_server)
+    stop_history_writer(history_writer)
+    logger.info("Aplicação encerrada.")
+
+def main():
+    args = parse_args()
+    # Registros escritos por uma thread própria, fora das threads do MQTT e do Tk
+    event_log = EventLog()
+    event_log.start()
+    try:
+        if args.headless:
+            run_headless(args.alert_log, args.workers, args.shard_mode, args.async_ingest, event_log)
+        else:
+            run_gui(args.workers, args.shard_mode, args.async_ingest, event_log)
+    finally:
+        startup_profile.finish()  # Se a primeira leitura não chegou antes do encerramento
+        event_log.stop()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,236 @@
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from config import METRICS_ENABLED, METRICS_LATENCY_BUCKETS
+
+
+class LatencyHistogram:
+    """
+    Histograma de latências com intervalos fixos (limites superiores em segundos).
+
+    `observe` custa uma busca binária e dois incrementos; não há alocação por amostra.
+    Cada histograma deve ser alimentado por uma única thread; a leitura a partir de outra
+    thread (painel ou endpoint HTTP) pode ver uma amostra a menos, nunca um estado inválido.
+    """
+
+    __slots__ = ("bounds", "counts", "sum")
+
+    def __init__(self, bounds=METRICS_LATENCY_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # o último intervalo é o +Inf
+        self.sum = 0.0
+
+    def observe(self, seconds, count=1):
+        """Registra `count` amostras com a mesma latência `seconds`."""
+        self.counts[bisect_left(self.bounds, seconds)] += count
+        self.sum += seconds * count
+
+    @property
+    def count(self):
+        return sum(self.counts)
+
+    def quantile(self, q):
+        """
+        Estima o quantil `q` (0 a 1) por interpolação linear dentro do intervalo que o contém.
+
+        Returns:
+            float or None: Latência em segundos, ou None se não houver amostras
+        """
+        counts = list(self.counts)
+        total = sum(counts)
+        if not total:
+            return None
+        rank = q * total
+        cumulative = 0
+        for index, count in enumerate(counts):
+            if count and cumulative + count >= rank:
+                if index == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[index - 1] if index else 0.0
+                return lower + (self.bounds[index] - lower) * (rank - cumulative) / count
+            cumulative += count
+        return self.bounds[-1]
+
+    def reset(self):
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+
+class Metrics:
+    """
+    Instrumentação do pipeline: histogramas de latência por etapa e contadores.
+
+    Etapas (instantes de `time.monotonic()`):
+        - decode: recebimento da mensagem → tópico e payload decodificados (por mensagem)
+        - store: leitura enfileirada → aplicada ao armazenamento (por mensagem, com resolução de
+          1 ms; inclui a espera na fila)
+        - drain: duração de cada lote aplicado por `process_pending` (por lote)
+        - render: lote aplicado → resultado visível na GUI, incluindo o agendamento (por atualização)
+        - redraw: duração da atualização da view na thread do Tk (por atualização)
+
+    A instrumentação pode ser ligada e desligada em tempo de execução com `enabled`; desligada,
+    o custo nos caminhos críticos é apenas o teste do atributo. Erros de parse e os contadores
+    da política de sobrecarga da GUI (`render_policy.py`) são contados sempre. Medidas adicionais
+    (profundidade da fila, quartos, ...) são registradas com `add_gauge` e lidas apenas na
+    exportação.
+    """
+
+    STAGES = ("decode", "store", "drain", "render", "redraw")
+    STAGE_DESCRIPTIONS = {
+        "decode": "Decodificação",
+        "store": "Armazenamento",
+        "drain": "Lote",
+        "render": "Renderização",
+        "redraw": "Redesenho",
+    }
+
+    # (atributo, nome Prometheus, descrição)
+    COUNTERS = (
+        ("messages", "monitor_messages_received_total", "Mensagens MQTT recebidas"),
+        ("parse_errors", "monitor_parse_errors_total", "Mensagens descartadas por erro de tópico ou payload"),
+        ("coalesced_updates", "monitor_coalesced_updates_total",
+         "Atualizações da GUI absorvidas por uma atualização já agendada"),
+        ("renders", "monitor_renders_total", "Atualizações da view principal da GUI"),
+        ("coalesced_rooms", "monitor_render_coalesced_rooms_total",
+         "Atualizações de quartos absorvidas por um desenho já pendente do mesmo quarto"),
+        ("deferred_rooms", "monitor_render_deferred_rooms_total",
+         "Quartos adiados para um quadro seguinte pela política de sobrecarga (contados a cada quadro)"),
+    )
+
+    def __init__(self, enabled=METRICS_ENABLED, buckets=METRICS_LATENCY_BUCKETS):
+        self.enabled = enabled
+        self.started_at = time.monotonic()
+        for stage in self.STAGES:
+            setattr(self, stage, LatencyHistogram(buckets))
+        for attribute, _, _ in self.COUNTERS:
+            setattr(self, attribute, 0)
+        self._gauges = []  # (nome Prometheus, descrição, tipo, função sem argumentos)
+
+    def histograms(self):
+        return {stage: getattr(self, stage) for stage in self.STAGES}
+
+    def counters(self):
+        return {attribute: getattr(self, attribute) for attribute, _, _ in self.COUNTERS}
+
+    def add_gauge(self, name, description, getter, kind="gauge"):
+        """
+        Registra uma medida calculada na exportação.
+
+        Args:
+            name: Nome Prometheus da medida
+            description: Texto do HELP
+            getter: Função sem argumentos que retorna o valor atual
+            kind: "gauge" ou "counter"
+        """
+        self._gauges.append((name, description, kind, getter))
+
+    def reset(self):
+        """Zera histogramas e contadores (as medidas registradas com `add_gauge` não mudam)."""
+        self.started_at = time.monotonic()
+        for histogram in self.histograms().values():
+            histogram.reset()
+        for attribute, _, _ in self.COUNTERS:
+            setattr(self, attribute, 0)
+
+    def render_prometheus(self):
+        """Exporta as métricas no formato de texto do Prometheus (versão 0.0.4)."""
+        lines = [
+            "# HELP monitor_instrumentation_enabled Instrumentação de latência ativa (1) ou não (0)",
+            "# TYPE monitor_instrumentation_enabled gauge",
+            f"monitor_instrumentation_enabled {int(self.enabled)}",
+        ]
+        for attribute, name, description in self.COUNTERS:
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} counter", f"{name} {getattr(self, attribute)}"]
+        for name, description, kind, getter in self._gauges:
+            lines += [f"# HELP {name} {description}", f"# TYPE {name} {kind}", f"{name} {getter()}"]
+
+        lines += [
+            "# HELP monitor_stage_latency_seconds Latência de cada etapa do pipeline",
+            "# TYPE monitor_stage_latency_seconds histogram",
+        ]
+        for stage, histogram in self.histograms().items():
+            counts = list(histogram.counts)
+            cumulative = 0
+            for bound, count in zip(histogram.bounds, counts):
+                cumulative += count
+                lines.append(f'monitor_stage_latency_seconds_bucket{{stage="{stage}",le="{bound:g}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'monitor_stage_latency_seconds_bucket{{stage="{stage}",le="+Inf"}} {cumulative}')
+            lines.append(f'monitor_stage_latency_seconds_sum{{stage="{stage}"}} {histogram.sum!r}')
+            lines.append(f'monitor_stage_latency_seconds_count{{stage="{stage}"}} {cumulative}')
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """
+    Endpoint HTTP local com as métricas no formato do Prometheus, servido por uma thread própria.
+
+    Rotas:
+        GET  /metrics                 métricas em texto
+        POST /instrumentation/on      liga a instrumentação de latência
+        POST /instrumentation/off     desliga a instrumentação de latência
+    """
+
+    def __init__(self, metrics, host="127.0.0.1", port=9108):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        """Abre o socket (erros de bind são propagados) e inicia a thread do servidor."""
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                self._reply(200, metrics.render_prometheus())
+
+            def do_POST(self):
+                path = self.path.split("?")[0]
+                if path not in ("/instrumentation/on", "/instrumentation/off"):
+                    self.send_error(404)
+                    return
+                metrics.enabled = path.endswith("/on")
+                self._reply(200, f"instrumentation {'on' if metrics.enabled else 'off'}\n")
+
+            def _reply(self, status, text):
+                body = text.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass  # Sem uma linha no terminal a cada coleta
+
+        self._server = ThreadingHTTPServer((self.host, self.port), Handler)
+        self._server.daemon_threads = True
+        self.port = self._server.server_address[1]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="MetricsServer", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._server is None:
+            return
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+        self._server = None
+
+
+def format_latency(seconds):
+    """Formata uma latência em segundos com a unidade adequada."""
+    if seconds is None:
+        return "N/A"
+    if seconds >= 1.0:
+        return f"{seconds:.2f} s"
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.1f} ms"
+    return f"{seconds * 1e6:.0f} µs"
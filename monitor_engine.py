@@ -0,0 +1,562 @@
+import logging
+import time
+from collections import deque
+
+import numpy as np
+
+from config import MAX_TEMPS_PER_ROOM, TEMP_TYPE_ENVIRONMENT, TEMP_TYPE_REFERENCE
+from config import INGEST_QUEUE_MAXSIZE, INGEST_MAX_BATCH, ROLLUP_TIERS
+from config import STALE_TIMEOUT_ENVIRONMENT_S, STALE_TIMEOUT_REFERENCE_S
+from alert_state import AlertEvent, AlertTracker, STATUS_STALE
+from ingest_queue import IngestQueue
+from metrics import Metrics
+from rollups import RollupBackfill, RollupStore
+from snapshot import StateSnapshot
+from staleness import StalenessTracker
+from event_log import CategoryLogger, EpochTime
+from temperature_store import TemperatureStore, to_epoch
+
+logger = logging.getLogger("monitor.engine")
+readings_logger = CategoryLogger("monitor.readings")
+
+class EngineUpdate:
+    """Resumo de um lote processado pelo motor, entregue aos assinantes."""
+
+    __slots__ = ("changed_rooms", "new_rooms", "alert_events")
+
+    def __init__(self, changed_rooms, new_rooms, alert_events):
+        self.changed_rooms = changed_rooms  # Quartos que receberam leituras
+        self.new_rooms = new_rooms  # Quartos vistos pela primeira vez
+        self.alert_events = alert_events  # Lista de AlertEvent (transições de status no lote)
+
+
+class MonitorEngine:
+    """
+    Núcleo do monitor, sem dependência de Tkinter ou Matplotlib.
+
+    Recebe leituras de qualquer thread (`enqueue_reading`/`enqueue_batch`), aplica-as em lote
+    na thread consumidora (`process_pending`), mantém as séries de cada quarto, atualiza o estado
+    de alerta de forma incremental a cada leitura e notifica as views inscritas com `subscribe`.
+    """
+
+    def __init__(self, capacity=MAX_TEMPS_PER_ROOM, queue_maxsize=INGEST_QUEUE_MAXSIZE,
+                 max_batch=INGEST_MAX_BATCH, log_readings=True, alert_tracker=None, history_writer=None,
+                 rollup_tiers=ROLLUP_TIERS, cold_store=None, metrics=None, stale_timeouts=None):
+        """
+        Args:
+            capacity: Máximo de leituras de cada tipo armazenadas por quarto
+            queue_maxsize: Máximo de itens aguardando processamento
+            max_batch: Máximo de itens aplicados por chamada a `process_pending`
+            log_readings: Se True, registra cada leitura recebida na categoria "monitor.readings"
+            alert_tracker: AlertTracker com as regras de alerta; um novo é criado se omitido
+            history_writer: HistoryWriter opcional que grava cada leitura em disco em segundo plano
+            rollup_tiers: Níveis (resolução em segundos, intervalos retidos) dos agregados por quarto
+            cold_store: SegmentReader opcional com o histórico em disco (camada fria atrás dos buffers)
+            metrics: Metrics com a instrumentação do pipeline; um novo é criado se omitido
+            stale_timeouts: {temp_type: segundos} sem leituras até o quarto ficar sem sinal;
+                padrão: STALE_TIMEOUT_ENVIRONMENT_S e STALE_TIMEOUT_REFERENCE_S
+        """
+        # Séries de temperatura de cada quarto em buffers circulares compactos
+        self.store = TemperatureStore(capacity)
+
+        # Agregados em várias resoluções, atualizados em O(1) a cada leitura, para consultas longas
+        self.rollups = RollupStore(rollup_tiers)
+        # Agregados reconstruídos do histórico em disco por `start_rollup_backfill`, aguardando a
+        # thread consumidora: (room_id, temp_type, RollupSet)
+        self._backfilled = deque()
+
+        # Timestamp (segundos desde a época) da referência mais recente por quarto; não retrocede
+        # quando uma referência chega atrasada
+        self.reference_timestamps = {}
+
+        # Estado de alerta de cada quarto, atualizado a cada leitura
+        self.alerts = alert_tracker if alert_tracker is not None else AlertTracker()
+        self._pending_events = []
+
+        # Prazos de cada quarto e tipo em um heap; apenas os vencidos são processados a cada drenagem
+        if stale_timeouts is None:
+            stale_timeouts = {TEMP_TYPE_ENVIRONMENT: STALE_TIMEOUT_ENVIRONMENT_S,
+                              TEMP_TYPE_REFERENCE: STALE_TIMEOUT_REFERENCE_S}
+        self.staleness = StalenessTracker(stale_timeouts)
+        self._applied_at = time.monotonic()  # Instante de chegada usado nos prazos do lote em aplicação
+
+        # Gravação do histórico em disco (feita por uma thread própria, nunca bloqueia a ingestão)
+        self.history = history_writer
+
+        # Leitura do histórico em segmentos mapeados em memória, para períodos além dos buffers
+        self.cold_store = cold_store
+
+        self.ingest_queue = IngestQueue(queue_maxsize)
+        self.max_batch = max_batch
+        self.log_readings = log_readings
+        self._subscribers = []
+
+        # Histogramas de latência e contadores; a fila e os quartos são lidos apenas na exportação
+        self.metrics = metrics if metrics is not None else Metrics()
+        queue = self.ingest_queue
+        self.metrics.add_gauge("monitor_queue_depth", "Itens aguardando na fila de ingestão", queue.__len__)
+        self.metrics.add_gauge("monitor_queue_dropped_total", "Itens descartados com a fila cheia",
+                               lambda: queue.dropped, kind="counter")
+        self.metrics.add_gauge("monitor_queue_drained_total", "Itens aplicados a partir da fila",
+                               lambda: queue.total_drained, kind="counter")
+        if history_writer is not None:
+            history_writer.register_metrics(self.metrics)
+        self.metrics.add_gauge("monitor_rooms", "Quartos com leituras", self.store.__len__)
+        self.metrics.add_gauge("monitor_stale_rooms", "Quartos sem leituras dentro do prazo", self.staleness.__len__)
+        store = self.store
+        self.metrics.add_gauge("monitor_late_dropped_total", "Leituras descartadas por chegarem além da janela de atraso",
+                               lambda: store.late_dropped, kind="counter")
+
+    # --- Produtores (seguros para qualquer thread) ---
+
+    def enqueue_reading(self, room_id, timestamp, temperature_value, temp_type):
+        """
+        Enfileira uma leitura. Compatível com o `on_new_data_callback` do cliente MQTT.
+
+        Returns:
+            bool: False se a fila estava cheia e a leitura foi descartada
+        """
+        return self.ingest_queue.put((room_id, timestamp, temperature_value, temp_type), self.metrics.enabled)
+
+    def enqueue_batch(self, room_id, temp_type, timestamps, values):
+        """
+        Enfileira um lote de leituras de um mesmo quarto e tipo como um único item.
+        Compatível com o `on_new_batch_callback` do cliente MQTT.
+        """
+        return self.ingest_queue.put((room_id, temp_type, timestamps, values, True), self.metrics.enabled)
+
+    def enqueue_delta(self, readings, alert_states, alert_events):
+        """
+        Enfileira o lote já decodificado por um worker de ingestão (ver `sharded_ingest.py`).
+
+        Args:
+            readings: Lista de (room_id, temp_type, timestamps, valores), timestamps em segundos desde a época
+            alert_states: Estados de alerta finais dos quartos do lote (`AlertTracker.export_state`),
+                ou None se o worker não avaliou os alertas
+            alert_events: Transições de alerta do lote como tuplas de campos de AlertEvent
+        """
+        return self.ingest_queue.put((readings, alert_states, alert_events), self.metrics.enabled)
+
+    # --- Consumidor (uma única thread: a do Tk ou o laço do modo headless) ---
+
+    def subscribe(self, callback):
+        """
+        Inscreve uma view para receber um EngineUpdate após cada lote processado.
+
+        Returns:
+            function: Função que cancela a inscrição
+        """
+        self._subscribers.append(callback)
+        return lambda: self._subscribers.remove(callback)
+
+    def process_pending(self):
+        """
+        Aplica em lote as leituras enfileiradas e notifica os assinantes uma única vez.
+
+        Returns:
+            EngineUpdate or None: Resumo do lote ou None se não havia leituras
+        """
+        batch = self.ingest_queue.drain(self.max_batch)
+        if not batch:
+            # Sem leituras, ainda pode haver prazos vencendo (inclusive com todos os sensores parados)
+            update = self.collect_stale()
+            if update is not None:
+                self.publish(update)
+            return update
+
+        started_at = time.perf_counter()
+        update = self.apply_items(batch)
+        self._record_store_latency(started_at)
+        if update is not None:
+            self.publish(update)
+        self.ingest_queue.record_drain_time(started_at)
+        return update
+
+    def apply_items(self, items):
+        """
+        Aplica itens no formato da fila de ingestão sem notificar os assinantes.
+
+        Usado por `process_pending` e pelo estágio de armazenamento de `async_ingest.py`, que
+        entrega o resultado aos assinantes em um estágio separado (`publish`).
+
+        Returns:
+            EngineUpdate or None: Resumo dos itens ou None se nenhum quarto recebeu leituras
+        """
+        self._applied_at = time.monotonic()
+        changed_rooms = set()
+        new_rooms = set()
+        for item in items:
+            if len(item) == 3:
+                # Lote de um worker de ingestão: (leituras, estados de alerta, transições)
+                self._apply_delta(*item, changed_rooms, new_rooms)
+                continue
+            if len(item) == 5:
+                # Lote vindo de "/sensors/X/Y/batch": (room_id, temp_type, timestamps, valores, True)
+                room_id = item[0]
+                is_new_room = self._store_batch(*item[:4])
+            else:
+                room_id, timestamp, temperature_value, temp_type = item
+                is_new_room = self._store_reading(room_id, timestamp, temperature_value, temp_type)
+            if is_new_room is None:
+                continue
+            changed_rooms.add(room_id)
+            if is_new_room:
+                new_rooms.add(room_id)
+
+        changed_rooms.update(self._expire_stale(self._applied_at))
+        self._install_backfilled()
+        return self._collect_update(changed_rooms, new_rooms)
+
+    def collect_stale(self, now=None):
+        """
+        Marca como sem sinal os quartos cujos prazos venceram, sem notificar os assinantes.
+
+        Returns:
+            EngineUpdate or None: Quartos que ficaram sem sinal e os eventos, ou None se nenhum prazo venceu
+        """
+        self._install_backfilled()
+        return self._collect_update(set(self._expire_stale(time.monotonic() if now is None else now)), set())
+
+    def _expire_stale(self, now):
+        """Processa os prazos vencidos e registra um evento para cada quarto que ficou sem sinal."""
+        expired_rooms = self.staleness.expire(now)
+        for room_id in expired_rooms:
+            self._pending_events.append(self._stale_event(room_id, self.alerts.status(room_id), STATUS_STALE))
+        return expired_rooms
+
+    def _mark_received(self, room_id, temp_type):
+        """Renova o prazo do quarto; registra um evento se ele volta a ter sinal."""
+        if self.staleness.touch(room_id, temp_type, self._applied_at):
+            self._pending_events.append(self._stale_event(room_id, STATUS_STALE, self.alerts.status(room_id)))
+
+    def _stale_event(self, room_id, previous_status, status):
+        state = self.alerts.get(room_id)
+        value = state.last_value if state is not None else None
+        threshold = state.reference_value if state is not None else None
+        return AlertEvent(room_id, previous_status, status, value, threshold, time.time())
+
+    def publish(self, update):
+        """Entrega um EngineUpdate aos assinantes."""
+        for callback in list(self._subscribers):
+            callback(update)
+
+    def _record_store_latency(self, started_at):
+        """Registra a latência fila→armazenamento de cada item do lote e a duração do lote."""
+        # Os instantes são sempre removidos, mesmo com a instrumentação desligada no meio do caminho
+        put_times = self.ingest_queue.pop_put_times()
+        metrics = self.metrics
+        if not metrics.enabled:
+            return
+        now = time.monotonic()
+        observe = metrics.store.observe
+        for put_time, count in put_times:
+            observe(now - put_time, count)
+        metrics.drain.observe(time.perf_counter() - started_at)
+
+    def add_reading(self, room_id, timestamp, temperature_value, temp_type):
+        """Armazena uma leitura imediatamente (na thread consumidora) e notifica os assinantes."""
+        self._applied_at = time.monotonic()
+        is_new_room = self._store_reading(room_id, timestamp, temperature_value, temp_type)
+        if is_new_room is None:
+            return None
+        return self._finish_update({room_id}, {room_id} if is_new_room else set())
+
+    def _finish_update(self, changed_rooms, new_rooms):
+        """Notifica os assinantes com os quartos alterados e as transições de alerta do lote."""
+        update = self._collect_update(changed_rooms, new_rooms)
+        if update is not None:
+            self.publish(update)
+        return update
+
+    def _collect_update(self, changed_rooms, new_rooms):
+        """Monta o EngineUpdate do lote com as transições de alerta acumuladas desde o anterior."""
+        alert_events = self._pending_events
+        self._pending_events = []
+        if not changed_rooms:
+            return None
+        return EngineUpdate(changed_rooms, new_rooms, alert_events)
+
+    def _store_reading(self, room_id, timestamp, temperature_value, temp_type):
+        """
+        Armazena uma leitura.
+
+        Returns:
+            bool or None: True se o quarto é novo, False se já existia, None se o tipo é desconhecido
+        """
+        # Determina o tipo de temperatura
+        if temp_type == TEMP_TYPE_ENVIRONMENT:
+            type_name = "ambiente"
+        elif temp_type == TEMP_TYPE_REFERENCE:
+            type_name = "referência"
+        else:
+            logger.warning("Tipo de temperatura desconhecido: %s", temp_type)
+            return None
+
+        epoch_timestamp = to_epoch(timestamp)
+        is_new_room = self.store.add(room_id, temp_type, epoch_timestamp, temperature_value)
+        self.rollups.add(room_id, temp_type, epoch_timestamp, temperature_value,
+                         self._rollup_reference(room_id, temp_type))
+        if self.history is not None:
+            self.history.write(room_id, temp_type, epoch_timestamp, temperature_value)
+        self._mark_received(room_id, temp_type)
+
+        # Se for uma nova temperatura de referência, marca o timestamp para futuras comparações
+        if temp_type == TEMP_TYPE_REFERENCE:
+            self._mark_reference(room_id, epoch_timestamp)
+            event = self.alerts.on_reference(room_id, epoch_timestamp, temperature_value)
+        else:
+            event = self.alerts.on_environment(room_id, epoch_timestamp, temperature_value)
+        if event is not None:
+            self._pending_events.append(event)
+
+        if self.log_readings:
+            readings_logger.info("Temperatura %s recebida para Quarto %s: %s°C em %s",
+                                 type_name, room_id, temperature_value, EpochTime(epoch_timestamp))
+        return is_new_room
+
+    def _store_batch(self, room_id, temp_type, timestamps, values):
+        """
+        Armazena um lote de leituras de um mesmo quarto e tipo com uma única chamada ao armazenamento.
+
+        Returns:
+            bool or None: True se o quarto é novo, False se já existia, None se o tipo é desconhecido
+        """
+        if temp_type == TEMP_TYPE_ENVIRONMENT:
+            type_name = "ambiente"
+        elif temp_type == TEMP_TYPE_REFERENCE:
+            type_name = "referência"
+        else:
+            logger.warning("Tipo de temperatura desconhecido: %s", temp_type)
+            return None
+
+        is_new_room = self.store.add_many(room_id, temp_type, timestamps, values)
+        self.rollups.add_many(room_id, temp_type, timestamps, values, self._rollup_reference(room_id, temp_type))
+        if self.history is not None:
+            self.history.write_many(room_id, temp_type, timestamps, values)
+        self._mark_received(room_id, temp_type)
+
+        # A leitura mais recente do lote passa a ser a referência para futuras comparações
+        if temp_type == TEMP_TYPE_REFERENCE:
+            self._mark_reference(room_id, float(max(timestamps)))
+            update_alert = self.alerts.on_reference
+        else:
+            update_alert = self.alerts.on_environment
+        for timestamp, value in zip(timestamps, values):
+            event = update_alert(room_id, float(timestamp), float(value))
+            if event is not None:
+                self._pending_events.append(event)
+
+        if self.log_readings:
+            readings_logger.info("Lote de %d temperaturas %s recebido para Quarto %s", len(values), type_name, room_id)
+        return is_new_room
+
+    def _apply_delta(self, readings, alert_states, alert_events, changed_rooms, new_rooms):
+        """Aplica o lote de um worker de ingestão, reaproveitando os alertas avaliados por ele."""
+        if alert_states is None:
+            # Worker sem quartos fixos (assinatura compartilhada): os alertas são avaliados aqui
+            for room_id, temp_type, timestamps, values in readings:
+                is_new_room = self._store_batch(room_id, temp_type, timestamps, values)
+                if is_new_room is None:
+                    continue
+                changed_rooms.add(room_id)
+                if is_new_room:
+                    new_rooms.add(room_id)
+            return
+
+        for state in alert_states:
+            self.alerts.restore_state(*state)
+        for room_id, temp_type, timestamps, values in readings:
+            is_new_room = self.store.add_many(room_id, temp_type, timestamps, values)
+            self.rollups.add_many(room_id, temp_type, timestamps, values, self._rollup_reference(room_id, temp_type))
+            if self.history is not None:
+                self.history.write_many(room_id, temp_type, timestamps, values)
+            self._mark_received(room_id, temp_type)
+            if temp_type == TEMP_TYPE_REFERENCE:
+                self._mark_reference(room_id, float(max(timestamps)))
+            changed_rooms.add(room_id)
+            if is_new_room:
+                new_rooms.add(room_id)
+        self._pending_events.extend(AlertEvent(*event) for event in alert_events)
+
+    def _mark_reference(self, room_id, timestamp):
+        """Registra o timestamp de uma referência recebida, ignorando as mais antigas que a atual."""
+        last_ref_time = self.reference_timestamps.get(room_id)
+        if last_ref_time is None or timestamp > last_ref_time:
+            self.reference_timestamps[room_id] = timestamp
+
+    def _rollup_reference(self, room_id, temp_type):
+        """Referência vigente usada no tempo acima da referência (apenas para temperaturas ambiente)."""
+        if temp_type != TEMP_TYPE_ENVIRONMENT:
+            return None
+        state = self.alerts.get(room_id)
+        return state.reference_value if state is not None else None
+
+    # --- Agregados ---
+
+    def range_summary(self, room_id, temp_type, duration, max_buckets=60):
+        """
+        Resume as leituras do último período de `duration` segundos (até a leitura mais recente)
+        a partir dos agregados, sem percorrer as leituras brutas. O período é arredondado para os
+        intervalos do nível escolhido, o mais fino com no máximo `max_buckets` intervalos no período.
+
+        Returns:
+            RollupSummary or None: None se não há leituras no período
+        """
+        rollups = self.rollups.get(room_id)
+        series = self.store.get(room_id)
+        if rollups is None or series is None:
+            return None
+        latest = series.get(temp_type).latest()
+        if latest is None:
+            return None
+        return rollups.get(temp_type).summary(latest.timestamp - duration, latest.timestamp, max_buckets)
+
+    def start_rollup_backfill(self, reader, max_age):
+        """
+        Reconstrói os agregados a partir dos segmentos em disco dos últimos `max_age` segundos em
+        uma thread (`rollups.RollupBackfill`), depois da conexão: cada quarto reconstruído é
+        instalado pela thread consumidora na próxima drenagem, somado às leituras recebidas
+        enquanto isso. O tempo acima da referência não é reconstruído.
+
+        Args:
+            reader: SegmentReader exclusivo da reconstrução (não o `cold_store`, usado pela interface)
+
+        Returns:
+            RollupBackfill: Reconstrução em andamento (ver `RollupBackfill.stop`)
+        """
+        segment_writer = getattr(self.history, "segment_writer", None)
+        backfill = RollupBackfill(reader, self.rollups.tiers, max_age,
+                                  lambda *rollup: self._backfilled.append(rollup),
+                                  segment_writer.initial_counts if segment_writer is not None else None)
+        self.metrics.add_gauge("monitor_rollup_backfill_rooms", "Quartos com agregados reconstruídos do histórico",
+                               lambda: backfill.rooms_done)
+        backfill.start()
+        return backfill
+
+    def _install_backfilled(self):
+        """Instala os agregados já reconstruídos pela thread de `start_rollup_backfill`."""
+        backfilled = self._backfilled
+        while backfilled:
+            self.rollups.install(*backfilled.popleft())
+
+    # --- Snapshots ---
+
+    def capture_snapshot(self):
+        """
+        Copia os buffers, as referências vigentes e os estados de alerta de todos os quartos
+        (na thread consumidora; a gravação em disco fica com `snapshot.SnapshotWriter`).
+
+        Returns:
+            StateSnapshot: Estado atual em arrays colunares
+        """
+        room_ids = list(self.store.room_ids())
+        rooms = len(room_ids)
+        all_series = [self.store[room_id] for room_id in room_ids]
+        environment = [series.environment for series in all_series]
+        reference = [series.reference for series in all_series]
+
+        def concatenate(arrays):
+            return np.concatenate(arrays) if arrays else np.empty(0, dtype=np.float64)
+
+        alert_status, alert_fields = StateSnapshot.encode_alert_states(
+            [self.alerts.export_state(room_id) for room_id in room_ids])
+        return StateSnapshot(
+            time.time(),
+            room_ids,
+            np.fromiter(map(len, environment), dtype=np.uint32, count=rooms),
+            concatenate([buffer.timestamps for buffer in environment]),
+            concatenate([buffer.values for buffer in environment]),
+            np.fromiter(map(len, reference), dtype=np.uint32, count=rooms),
+            concatenate([buffer.timestamps for buffer in reference]),
+            concatenate([buffer.values for buffer in reference]),
+            # Com dtype float64, quartos sem referência (None) ficam com NaN
+            np.array([self.reference_timestamps.get(room_id) for room_id in room_ids], dtype=np.float64),
+            alert_status,
+            alert_fields,
+        )
+
+    def restore_snapshot(self, snapshot):
+        """
+        Restaura um snapshot antes de começar a ingestão, notificando os assinantes com todos os
+        quartos restaurados. As leituras não são regravadas no histórico nem nos agregados (que vêm
+        dos segmentos em disco), e o prazo de sem sinal de cada quarto começa a contar agora.
+
+        Returns:
+            EngineUpdate or None: Quartos restaurados
+        """
+        self._applied_at = time.monotonic()
+        changed_rooms = set(snapshot.room_ids)
+        new_rooms = changed_rooms - set(self.store.room_ids())
+        env_ends = np.cumsum(snapshot.env_counts, dtype=np.int64).tolist()
+        ref_ends = np.cumsum(snapshot.ref_counts, dtype=np.int64).tolist()
+        reference_timestamps = snapshot.reference_timestamps.tolist()
+        env_start = ref_start = 0
+        for room_id, env_end, ref_end, reference_timestamp, alert_state in zip(
+                snapshot.room_ids, env_ends, ref_ends, reference_timestamps, snapshot.alert_states()):
+            self.store.restore(room_id,
+                               snapshot.env_timestamps[env_start:env_end], snapshot.env_values[env_start:env_end],
+                               snapshot.ref_timestamps[ref_start:ref_end], snapshot.ref_values[ref_start:ref_end])
+            if env_end > env_start:
+                self._mark_received(room_id, TEMP_TYPE_ENVIRONMENT)
+            if ref_end > ref_start:
+                self._mark_received(room_id, TEMP_TYPE_REFERENCE)
+            env_start, ref_start = env_end, ref_end
+            if reference_timestamp == reference_timestamp:  # NaN: sem referência
+                self._mark_reference(room_id, reference_timestamp)
+            if alert_state is not None:
+                self.alerts.restore_state(room_id, *alert_state)
+        return self._finish_update(changed_rooms, new_rooms)
+
+    # --- Alertas ---
+
+    def get_current_threshold(self, room_id):
+        """
+        Obtém a temperatura de referência atual do quarto.
+
+        Returns:
+            float or None: Temperatura de referência atual ou None
+        """
+        series = self.store.get(room_id)
+        if series is not None:
+            latest_ref = series.reference.latest()
+            if latest_ref is not None:
+                return latest_ref.value  # Última temperatura de referência
+        return None  # Não usa valor padrão
+
+    def should_check_alert(self, room_id, temp_timestamp):
+        """
+        Verifica se uma temperatura ambiente deve ser comparada com a referência atual.
+        Só compara se a temperatura ambiente for posterior à última referência.
+
+        Args:
+            room_id: ID do quarto
+            temp_timestamp: Timestamp da temperatura ambiente (segundos desde a época)
+        """
+        last_ref_time = self.reference_timestamps.get(room_id)
+        if last_ref_time is None:
+            return False  # Sem referência definida ainda
+        return temp_timestamp >= last_ref_time
+
+    def get_status(self, room_id):
+        """
+        Retorna o status atual do quarto, já calculado na ingestão: STATUS_STALE enquanto ele
+        estiver sem leituras dentro do prazo, senão o status de alerta.
+        """
+        if self.staleness.is_stale(room_id):
+            return STATUS_STALE
+        return self.alerts.status(room_id)
+
+    def reading_alert_flags(self, room_id):
+        """
+        Indica quais temperaturas ambiente armazenadas estão acima da referência atual.
+        Só são marcadas leituras posteriores à última referência. A comparação é vetorizada.
+
+        Returns:
+            numpy.ndarray: Array booleano alinhado a `store[room_id].environment.timestamps`
+        """
+        env_temps = self.store[room_id].environment
+        threshold = self.get_current_threshold(room_id)
+        last_ref_time = self.reference_timestamps.get(room_id)
+        if threshold is None or last_ref_time is None:
+            return np.zeros(len(env_temps), dtype=bool)
+        return (env_temps.values > threshold) & (env_temps.timestamps >= last_ref_time)
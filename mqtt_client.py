@@ -1,47 +1,315 @@
 import paho.mqtt.client as mqtt
 import json
-from datetime import datetime
+import logging
+import struct
+import sys
+import time
+from array import array
+from datetime import datetime, timezone
+
+from config import MQTT_PAYLOAD_CODEC, TEMP_TYPE_ENVIRONMENT, TEMP_TYPE_REFERENCE
+from event_log import CategoryLogger
+
+try:
+    import orjson  # Backend JSON opcional e mais rápido
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger("monitor.mqtt")
+errors_logger = CategoryLogger("monitor.mqtt.errors")
+
+
+class JsonCodec:
+    """Payload JSON padrão: {"timestamp": "...", "value": ...}."""
+
+    name = "json"
+
+    def __init__(self):
+        self._loads = json.loads
+
+    def decode(self, payload):
+        # json.loads aceita bytes diretamente, sem precisar de payload.decode()
+        data = self._loads(payload)
+        return data.get("timestamp"), data.get("value")
+
+    def decode_batch(self, payload):
+        """Decodifica um array JSON de leituras: [{"timestamp": ..., "value": ...}, ...]."""
+        data = self._loads(payload)
+        if not isinstance(data, list):
+            raise ValueError("Payload de lote JSON deve ser um array de leituras")
+        return [(item.get("timestamp"), item.get("value")) for item in data]
+
+
+class OrjsonCodec(JsonCodec):
+    """Mesmo esquema JSON, decodificado com o orjson."""
+
+    name = "orjson"
+
+    def __init__(self):
+        if orjson is None:
+            raise ValueError("O codec 'orjson' requer o pacote orjson instalado")
+        self._loads = orjson.loads
+
+
+class StructCodec:
+    """
+    Formato binário compacto de 16 bytes (little-endian): timestamp em segundos desde a
+    época (float64) seguido do valor da temperatura (float64).
+    """
+
+    name = "struct"
+    FORMAT = struct.Struct("<dd")
+
+    def decode(self, payload):
+        if len(payload) != self.FORMAT.size:
+            raise ValueError(f"Payload binário deve ter {self.FORMAT.size} bytes, recebido {len(payload)}")
+        return self.FORMAT.unpack(payload)
+
+    def decode_batch(self, payload):
+        """
+        Decodifica um lote binário: registros de 16 bytes ("<dd") concatenados.
+
+        Returns:
+            tuple: (timestamps, valores) como arrays de float em segundos desde a época
+        """
+        if not payload or len(payload) % self.FORMAT.size:
+            raise ValueError(f"Payload de lote binário deve ter tamanho múltiplo de {self.FORMAT.size} bytes")
+        packed = array("d", payload)
+        if sys.byteorder != "little":
+            packed.byteswap()
+        return packed[0::2], packed[1::2]
+
+
+def _default_json_codec():
+    return OrjsonCodec() if orjson is not None else JsonCodec()
+
+
+def create_codec(name):
+    """
+    Cria o codec de payload pelo nome.
+
+    Args:
+        name: "json", "orjson", "struct" ou "auto" (orjson se disponível; binário detectado pelo tamanho)
+    """
+    if name == "json":
+        return JsonCodec()
+    if name == "orjson":
+        return OrjsonCodec()
+    if name == "struct":
+        return StructCodec()
+    if name == "auto":
+        return _default_json_codec()
+    raise ValueError(f"Codec de payload desconhecido: {name}")
+
+
+class PayloadDecoder:
+    """
+    Decodifica tópicos e payloads das mensagens de temperatura.
+
+    Mantém um cache de tópicos já vistos ("/sensors/X/Y" e "/sensors/X/Y/batch" ->
+    (room_id, temp_type, is_batch), com strings internadas) e um cache de timestamps ISO já convertidos. Timestamps numéricos
+    (segundos ou milissegundos desde a época) são convertidos diretamente. Qualquer payload
+    que o codec configurado não consiga decodificar é tentado novamente como JSON.
+    """
+
+    TOPIC_CACHE_MAX = 100000
+    TIMESTAMP_CACHE_MAX = 4096
+    # Timestamps numéricos acima deste valor são interpretados como milissegundos
+    EPOCH_MILLIS_THRESHOLD = 1e11
+
+    _INVALID_TOPIC = (None, None, False)
+
+    def __init__(self, codec=MQTT_PAYLOAD_CODEC):
+        self.codec_name = codec
+        self.codec = create_codec(codec)
+        self._json_codec = _default_json_codec()
+        self._struct_codec = StructCodec()
+        self._detect_binary = codec == "auto"
+        self._topic_cache = {}
+        self._timestamp_cache = {}
+
+    def parse_topic(self, topic):
+        """
+        Extrai o quarto e o tipo de temperatura de um tópico "/sensors/X/Y" ou "/sensors/X/Y/batch".
+
+        Returns:
+            tuple or None: (room_id, temp_type, is_batch) ou None se o tópico não for de temperatura
+        """
+        cached = self._topic_cache.get(topic)
+        if cached is None:
+            cached = self._INVALID_TOPIC
+            parts = topic.split("/")
+            is_batch = len(parts) == 5 and parts[4] == "batch"
+            if (len(parts) == 4 or is_batch) and parts[1] == "sensors":
+                # Processa tanto Y=0 (ambiente) quanto Y=1 (referência)
+                if parts[3] in (TEMP_TYPE_ENVIRONMENT, TEMP_TYPE_REFERENCE):
+                    cached = (sys.intern(parts[2]), sys.intern(parts[3]), is_batch)
+            if len(self._topic_cache) >= self.TOPIC_CACHE_MAX:
+                self._topic_cache.clear()
+            self._topic_cache[topic] = cached
+        return None if cached is self._INVALID_TOPIC else cached
+
+    def decode_payload(self, payload):
+        """
+        Decodifica um payload de leitura.
+
+        Returns:
+            tuple: (timestamp como datetime, valor como float)
+        """
+        codec = self.codec
+        if self._detect_binary and len(payload) == StructCodec.FORMAT.size and payload[:1] != b"{":
+            codec = self._struct_codec
+
+        try:
+            raw_timestamp, value = codec.decode(payload)
+        except (ValueError, struct.error):
+            if not isinstance(codec, JsonCodec):
+                raw_timestamp, value = self._json_codec.decode(payload)
+            elif self._detect_binary and len(payload) == StructCodec.FORMAT.size:
+                # Registro binário cujo primeiro byte coincide com "{"
+                raw_timestamp, value = self._struct_codec.decode(payload)
+            else:
+                raise
+
+        return self.parse_timestamp(raw_timestamp), float(value)
+
+    def decode_batch(self, payload):
+        """
+        Decodifica um payload de lote (array JSON ou registros binários concatenados).
+
+        Returns:
+            tuple: (timestamps em segundos desde a época, valores) como sequências de float
+        """
+        if self.codec_name == "struct" or (self._detect_binary and payload[:1] != b"["):
+            try:
+                return self._struct_codec.decode_batch(payload)
+            except ValueError:
+                pass
+
+        try:
+            readings = self._json_codec.decode_batch(payload)
+        except ValueError:
+            if self._detect_binary and payload and not len(payload) % StructCodec.FORMAT.size:
+                # Registros binários cujo primeiro byte coincide com "["
+                return self._struct_codec.decode_batch(payload)
+            raise
+        parse_epoch = self.parse_epoch
+        timestamps = [parse_epoch(raw_timestamp) for raw_timestamp, _ in readings]
+        values = [float(value) for _, value in readings]
+        return timestamps, values
+
+    def parse_epoch(self, raw_timestamp):
+        """Converte um timestamp ISO 8601 ou numérico para segundos desde a época (UTC se sem fuso)."""
+        if isinstance(raw_timestamp, (int, float)) and not isinstance(raw_timestamp, bool):
+            if raw_timestamp > self.EPOCH_MILLIS_THRESHOLD:
+                return raw_timestamp / 1000.0
+            return float(raw_timestamp)
+        parsed = self.parse_timestamp(raw_timestamp)
+        if parsed.tzinfo is None:
+            parsed = parsed.replace(tzinfo=timezone.utc)
+        return parsed.timestamp()
+
+    def parse_timestamp(self, raw_timestamp):
+        """Converte um timestamp ISO 8601 ou numérico (época) para datetime."""
+        if isinstance(raw_timestamp, (int, float)) and not isinstance(raw_timestamp, bool):
+            if raw_timestamp > self.EPOCH_MILLIS_THRESHOLD:
+                raw_timestamp = raw_timestamp / 1000.0
+            return datetime.fromtimestamp(raw_timestamp, timezone.utc)
+
+        parsed = self._timestamp_cache.get(raw_timestamp)
+        if parsed is None:
+            # Converte a string de timestamp para objeto datetime
+            parsed = datetime.fromisoformat(raw_timestamp.replace("Z", "+00:00"))
+            if len(self._timestamp_cache) >= self.TIMESTAMP_CACHE_MAX:
+                self._timestamp_cache.clear()
+            self._timestamp_cache[raw_timestamp] = parsed
+        return parsed
+
 
 class MQTTTemperatureClient:
-    def __init__(self, broker, port, topic, on_new_data_callback):
+    def __init__(self, broker, port, topic, on_new_data_callback, codec=MQTT_PAYLOAD_CODEC,
+                 on_new_batch_callback=None, metrics=None, room_filter=None, protocol=mqtt.MQTTv311):
+        """
+        Args:
+            broker: Endereço do broker MQTT
+            port: Porta do broker MQTT
+            topic: Tópico de inscrição
+            on_new_data_callback: Chamado com (room_id, timestamp, valor, temp_type) para cada leitura
+            codec: Codec de payload (ver `create_codec`)
+            on_new_batch_callback: Opcional; chamado com (room_id, temp_type, timestamps, valores)
+                para cada lote recebido em "/sensors/X/Y/batch" (timestamps em segundos desde a
+                época). Sem ele, as leituras do lote são repassadas uma a uma ao on_new_data_callback.
+            metrics: Metrics opcional; conta as mensagens e erros de parse e mede a decodificação
+            room_filter: Função opcional que recebe o ID do quarto; mensagens de quartos para os
+                quais ela retorna False são ignoradas antes da decodificação do payload
+            protocol: Versão do protocolo MQTT (MQTTv5 para assinaturas compartilhadas "$share/...")
+        """
         self.broker = broker
         self.port = port
         self.topic = topic
         self.on_new_data_callback = on_new_data_callback
-        self.client = mqtt.Client()
+        self.on_new_batch_callback = on_new_batch_callback
+        self.decoder = PayloadDecoder(codec)
+        self.metrics = metrics
+        self.room_filter = room_filter
+        self.client = mqtt.Client(protocol=protocol)
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
 
-    def connect_and_loop(self):
+    def connect(self):
+        """Conecta ao broker e assina o tópico, sem iniciar a thread de rede."""
         self.client.connect(self.broker, self.port, 60)
         self.client.subscribe(self.topic)
+
+    def connect_and_loop(self):
+        self.connect()
         self.client.loop_start()  # Importante: não bloqueia a thread principal
 
-    def on_connect(self, client, userdata, flags, rc):
-        print(f"Conectado ao broker MQTT com código: {rc}")
+    def on_connect(self, client, userdata, flags, rc, properties=None):
+        logger.info("Conectado ao broker MQTT com código: %s", rc)
 
     def on_message(self, client, userdata, msg):
+        metrics = self.metrics
+        received_at = None
+        if metrics is not None and metrics.enabled:
+            metrics.messages += 1
+            received_at = time.monotonic()
         try:
-            parts = msg.topic.split("/")
-            if len(parts) == 4 and parts[1] == "sensors":
-                room_id = parts[2]
-                temp_type = parts[3]
+            # Ignora tópicos que não sejam /sensors/X/0 ou /sensors/X/1 (com ou sem /batch)
+            topic_info = self.decoder.parse_topic(msg.topic)
+            if topic_info is None:
+                return
+            room_id, temp_type, is_batch = topic_info
+            if self.room_filter is not None and not self.room_filter(room_id):
+                return
 
-                # Processa tanto Y=0 (ambiente) quanto Y=1 (referência)
-                if temp_type not in ["0", "1"]:
-                    return  # Ignora outros tipos de temperatura
-
-                payload = json.loads(msg.payload.decode())
-                timestamp_str = payload.get("timestamp")
-                value = float(payload.get("value"))
+            if is_batch:
+                self._handle_batch(room_id, temp_type, msg.payload, received_at)
+                return
 
-                # Converte a string de timestamp para objeto datetime
-                timestamp = datetime.fromisoformat(timestamp_str.replace("Z", "+00:00"))
+            timestamp, value = self.decoder.decode_payload(msg.payload)
+            if received_at is not None:
+                metrics.decode.observe(time.monotonic() - received_at)
 
-                # Chama o callback com informação do tipo de temperatura
-                self.on_new_data_callback(room_id, timestamp, value, temp_type)
+            # Chama o callback com informação do tipo de temperatura
+            self.on_new_data_callback(room_id, timestamp, value, temp_type)
         except Exception as e:
-            print(f"Erro ao processar mensagem MQTT: {e}")
+            if metrics is not None:
+                metrics.parse_errors += 1
+            errors_logger.warning("Erro ao processar mensagem MQTT: %s", e)
+
+    def _handle_batch(self, room_id, temp_type, payload, received_at=None):
+        """Repassa um lote de leituras com uma única chamada de callback, quando disponível."""
+        timestamps, values = self.decoder.decode_batch(payload)
+        if received_at is not None:
+            self.metrics.decode.observe(time.monotonic() - received_at)
+        if not len(timestamps):
+            return
+        if self.on_new_batch_callback is not None:
+            self.on_new_batch_callback(room_id, temp_type, timestamps, values)
+            return
+        for timestamp, value in zip(timestamps, values):
+            self.on_new_data_callback(room_id, datetime.fromtimestamp(timestamp, timezone.utc), value, temp_type)
 
     def disconnect(self):
         self.client.loop_stop()
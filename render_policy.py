@@ -0,0 +1,109 @@
+import time
+
+from config import RENDER_POLICY, RENDER_MAX_ROOMS_PER_FRAME, RENDER_ROOM_MIN_INTERVAL_S, RENDER_ALERT_PRIORITY
+
+RENDER_POLICIES = ("coalesce", "rate_limit")
+
+
+class RenderScheduler:
+    """
+    Política de sobrecarga entre o motor e as views: escolhe quais quartos alterados são
+    redesenhados em cada quadro da GUI.
+
+    Todas as leituras continuam sendo armazenadas e avaliadas pelos alertas; apenas a
+    renderização é reduzida:
+        - "coalesce": cada quarto pendente é desenhado uma única vez, com o valor mais recente,
+          não importa quantas leituras tenha recebido desde o último quadro
+        - "rate_limit": além disso, um quarto não é redesenhado mais de uma vez a cada
+          `room_min_interval_s`; as leituras que chegam nesse intervalo ficam pendentes
+
+    Com `max_rooms_per_frame`, cada quadro desenha no máximo esse número de quartos e os demais
+    continuam pendentes, na ordem de chegada, para os quadros seguintes. Com `alert_priority`,
+    quartos em alerta passam à frente dos demais. Os contadores `coalesced_rooms` (atualizações
+    absorvidas por um quarto já pendente) e `deferred_rooms` (quartos que ficaram para um quadro
+    seguinte, contados a cada quadro) são mantidos em `metrics`.
+    """
+
+    def __init__(self, is_alert, metrics, policy=RENDER_POLICY, max_rooms_per_frame=RENDER_MAX_ROOMS_PER_FRAME,
+                 room_min_interval_s=RENDER_ROOM_MIN_INTERVAL_S, alert_priority=RENDER_ALERT_PRIORITY):
+        """
+        Args:
+            is_alert: Função que recebe o ID do quarto e retorna True se ele está em alerta
+            metrics: Metrics com os contadores de sobrecarga
+            policy: "coalesce" ou "rate_limit"
+            max_rooms_per_frame: Máximo de quartos desenhados por quadro (0: sem limite)
+            room_min_interval_s: Intervalo mínimo entre desenhos de um mesmo quarto ("rate_limit")
+            alert_priority: Se True, quartos em alerta são desenhados antes dos demais
+        """
+        if policy not in RENDER_POLICIES:
+            raise ValueError(f"Política de renderização desconhecida: {policy}")
+        self.is_alert = is_alert
+        self.metrics = metrics
+        self.policy = policy
+        self.max_rooms_per_frame = max_rooms_per_frame
+        self.room_min_interval_s = room_min_interval_s
+        self.alert_priority = alert_priority
+
+        self._pending = {}  # room_id -> None; o dicionário preserva a ordem de chegada
+        self._last_render = {}  # room_id -> instante do último desenho ("rate_limit")
+
+    def __len__(self):
+        return len(self._pending)
+
+    def offer(self, room_ids):
+        """Registra quartos que receberam leituras (chamado a cada lote aplicado pelo motor)."""
+        pending = self._pending
+        before = len(pending)
+        for room_id in room_ids:
+            pending[room_id] = None
+        self.metrics.coalesced_rooms += len(room_ids) - (len(pending) - before)
+
+    def take(self, now=None):
+        """
+        Retira os quartos a desenhar neste quadro.
+
+        Returns:
+            list: IDs dos quartos, os em alerta primeiro (com `alert_priority`)
+        """
+        pending = self._pending
+        if not pending:
+            return []
+        now = time.monotonic() if now is None else now
+        limit = self.max_rooms_per_frame or len(pending)
+
+        candidates = list(pending)
+        if self.alert_priority:
+            is_alert = self.is_alert
+            alerts = [room_id for room_id in candidates if is_alert(room_id)]
+            if alerts:
+                alert_set = set(alerts)
+                candidates = alerts + [room_id for room_id in candidates if room_id not in alert_set]
+
+        if self.policy == "rate_limit":
+            last_render = self._last_render
+            earliest = now - self.room_min_interval_s
+            rooms = []
+            for room_id in candidates:
+                if last_render.get(room_id, earliest) <= earliest:
+                    rooms.append(room_id)
+                    last_render[room_id] = now
+                    if len(rooms) >= limit:
+                        break
+        else:
+            rooms = candidates[:limit]
+
+        for room_id in rooms:
+            del pending[room_id]
+        self.metrics.deferred_rooms += len(pending)
+        return rooms
+
+    def requeue(self, room_ids):
+        """Devolve à frente da fila quartos retirados por `take` que não couberam no quadro."""
+        if not room_ids:
+            return
+        for room_id in room_ids:
+            self._last_render.pop(room_id, None)
+        requeued = dict.fromkeys(room_ids)
+        requeued.update(self._pending)
+        self._pending = requeued
+        self.metrics.deferred_rooms += len(room_ids)
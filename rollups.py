@@ -0,0 +1,472 @@
+import logging
+import math
+import threading
+import time
+from array import array
+
+import numpy as np
+
+from config import ROLLUP_TIERS, TEMP_TYPE_ENVIRONMENT, TEMP_TYPE_REFERENCE
+
+logger = logging.getLogger("monitor.rollups")
+
+
+def format_resolution(seconds):
+    """Formata uma duração em segundos como "15 min", "1 h" ou "7 dias"."""
+    if seconds >= 86400 and seconds % 86400 == 0:
+        days = seconds // 86400
+        return f"{days} dia" if days == 1 else f"{days} dias"
+    if seconds >= 3600 and seconds % 3600 == 0:
+        return f"{seconds // 3600} h"
+    if seconds >= 60 and seconds % 60 == 0:
+        return f"{seconds // 60} min"
+    return f"{seconds} s"
+
+
+class RollupRange:
+    """Agregados de um nível de resolução em um intervalo de tempo (arrays alinhados, em ordem de tempo)."""
+
+    __slots__ = ("resolution", "starts", "mins", "maxs", "means", "counts", "above_seconds")
+
+    def __init__(self, resolution, starts, mins, maxs, means, counts, above_seconds):
+        self.resolution = resolution  # Largura de cada intervalo em segundos
+        self.starts = starts  # Início de cada intervalo (segundos desde a época)
+        self.mins = mins
+        self.maxs = maxs
+        self.means = means
+        self.counts = counts
+        self.above_seconds = above_seconds  # Tempo acima da referência em cada intervalo
+
+    def __len__(self):
+        return len(self.starts)
+
+
+class RollupSummary:
+    """Agregado único de um intervalo de tempo (mínimo, máximo, média, contagem e tempo acima da referência)."""
+
+    __slots__ = ("resolution", "min", "max", "mean", "count", "above_seconds")
+
+    def __init__(self, resolution, minimum, maximum, mean, count, above_seconds):
+        self.resolution = resolution  # Resolução do nível usado no cálculo
+        self.min = minimum
+        self.max = maximum
+        self.mean = mean
+        self.count = count
+        self.above_seconds = above_seconds
+
+    def __repr__(self):
+        return (f"RollupSummary(min={self.min!r}, max={self.max!r}, mean={self.mean!r}, "
+                f"count={self.count!r}, above_seconds={self.above_seconds!r})")
+
+
+class RollupTier:
+    """
+    Agregados de uma resolução em um anel de até `retention` intervalos.
+
+    O intervalo de um timestamp é `floor(timestamp / resolution)` e ocupa a posição
+    `intervalo % capacidade`; intervalos mais antigos que os `retention` mais recentes são
+    descartados. Os arrays (do módulo `array`, de acesso escalar rápido, expostos ao NumPy sem
+    cópia nas consultas) começam com `INITIAL_CAPACITY` posições e dobram quando um intervalo
+    retido ocupa a posição de um intervalo novo, até `retention`: um quarto com poucas leituras
+    ocupa poucas posições. Cada leitura custa O(1) amortizado.
+    """
+
+    __slots__ = ("resolution", "retention", "newest", "dropped",
+                 "_buckets", "_mins", "_maxs", "_sums", "_counts", "_above")
+
+    INITIAL_CAPACITY = 4
+
+    def __init__(self, resolution, retention):
+        self.resolution = resolution
+        self.retention = retention
+        self.newest = None  # Intervalo mais recente recebido
+        self.dropped = 0  # Leituras mais antigas que a retenção
+        self._buckets = None
+
+    def _allocate(self, size):
+        self._buckets = array('q', [-1]) * size
+        self._mins = array('d', bytes(8 * size))
+        self._maxs = array('d', bytes(8 * size))
+        self._sums = array('d', bytes(8 * size))
+        self._counts = array('q', bytes(8 * size))
+        self._above = array('d', bytes(8 * size))
+
+    @property
+    def capacity(self):
+        """Posições alocadas no anel."""
+        return 0 if self._buckets is None else len(self._buckets)
+
+    def _grow(self, bucket):
+        """
+        Aumenta o anel até que os intervalos retidos e `bucket` ocupem posições distintas,
+        descartando os que deixam de ser retidos com a chegada de `bucket`.
+        """
+        oldest = max(self.newest, bucket) - self.retention + 1
+        old_buckets = np.frombuffer(self._buckets, dtype=np.int64)
+        old_slots = np.flatnonzero(old_buckets >= oldest)
+        kept = old_buckets[old_slots]
+        wanted = np.append(kept, bucket)
+
+        size = len(old_buckets)
+        while size < self.retention:
+            size = min(size * 2, self.retention)
+            if len(np.unique(wanted % size)) == len(wanted):
+                break
+        columns = [np.frombuffer(column, dtype=column.typecode)[old_slots]
+                   for column in (self._mins, self._maxs, self._sums, self._counts, self._above)]
+        self._allocate(size)
+        slots = kept % size
+        np.frombuffer(self._buckets, dtype=np.int64)[slots] = kept
+        for column, values in zip((self._mins, self._maxs, self._sums, self._counts, self._above), columns):
+            np.frombuffer(column, dtype=column.typecode)[slots] = values
+
+    def oldest_start(self):
+        """Início do intervalo mais antigo ainda retido (segundos desde a época) ou None."""
+        if self.newest is None:
+            return None
+        return (self.newest - self.retention + 1) * self.resolution
+
+    def add(self, timestamp, value, above_seconds=0.0):
+        """Acumula uma leitura no intervalo do seu timestamp."""
+        self.merge(int(timestamp // self.resolution), value, value, value, 1, above_seconds)
+
+    def merge(self, bucket, minimum, maximum, total, count, above_seconds):
+        """Acumula agregados parciais em um intervalo."""
+        if self._buckets is None:
+            self._allocate(min(self.INITIAL_CAPACITY, self.retention))
+        elif self.newest is not None and bucket <= self.newest - self.retention:
+            self.dropped += count  # Mais antigo que a retenção
+            return
+        slot = bucket % len(self._buckets)
+        current = self._buckets[slot]
+        if current != bucket:
+            if current >= 0 and len(self._buckets) < self.retention and \
+                    current > max(self.newest, bucket) - self.retention:
+                # A posição guarda outro intervalo ainda retido: o anel cresce
+                self._grow(bucket)
+                slot = bucket % len(self._buckets)
+            self._buckets[slot] = bucket
+            self._mins[slot] = minimum
+            self._maxs[slot] = maximum
+            self._sums[slot] = total
+            self._counts[slot] = count
+            self._above[slot] = min(above_seconds, self.resolution)
+            if self.newest is None or bucket > self.newest:
+                self.newest = bucket
+            return
+
+        if minimum < self._mins[slot]:
+            self._mins[slot] = minimum
+        if maximum > self._maxs[slot]:
+            self._maxs[slot] = maximum
+        self._sums[slot] += total
+        self._counts[slot] += count
+        if above_seconds:
+            self._above[slot] = min(self._above[slot] + above_seconds, self.resolution)
+
+    def merge_from(self, other):
+        """Acumula os intervalos retidos de outro nível de mesma resolução (custo proporcional à capacidade dele)."""
+        if other._buckets is None:
+            return
+        oldest = other.newest - other.retention + 1
+        for slot, bucket in enumerate(other._buckets):
+            if bucket >= oldest:
+                self.merge(bucket, other._mins[slot], other._maxs[slot], other._sums[slot],
+                           other._counts[slot], other._above[slot])
+        self.dropped += other.dropped
+
+    def add_many(self, timestamps, values, above_seconds):
+        """Acumula um lote de leituras: agrega por intervalo com o NumPy e mescla cada intervalo."""
+        buckets = np.floor_divide(timestamps, self.resolution).astype(np.int64)
+        if len(buckets) > 1 and np.any(buckets[1:] < buckets[:-1]):
+            order = np.argsort(buckets, kind="stable")
+            buckets, values, above_seconds = buckets[order], values[order], above_seconds[order]
+
+        unique, starts = np.unique(buckets, return_index=True)
+        counts = np.diff(np.append(starts, len(buckets)))
+        mins = np.minimum.reduceat(values, starts)
+        maxs = np.maximum.reduceat(values, starts)
+        sums = np.add.reduceat(values, starts)
+        above = np.add.reduceat(np.minimum(above_seconds, self.resolution), starts)
+        for i in range(len(unique)):
+            self.merge(int(unique[i]), float(mins[i]), float(maxs[i]), float(sums[i]),
+                       int(counts[i]), float(above[i]))
+
+    def range(self, start, end):
+        """
+        Retorna os intervalos retidos que se sobrepõem a [start, end].
+
+        Returns:
+            RollupRange: Agregados em ordem de tempo (vazio se não há dados no intervalo)
+        """
+        if self.newest is None:
+            return RollupRange(self.resolution, *(np.empty(0),) * 6)
+        first = max(math.floor(start / self.resolution), self.newest - self.retention + 1)
+        last = min(math.floor(end / self.resolution), self.newest)
+        wanted = np.arange(first, last + 1, dtype=np.int64)
+        slots = wanted % len(self._buckets)
+
+        buckets = np.frombuffer(self._buckets, dtype=np.int64)[slots]
+        present = buckets == wanted
+        slots = slots[present]
+        counts = np.frombuffer(self._counts, dtype=np.int64)[slots]
+        return RollupRange(
+            self.resolution,
+            wanted[present] * float(self.resolution),
+            np.frombuffer(self._mins, dtype=np.float64)[slots],
+            np.frombuffer(self._maxs, dtype=np.float64)[slots],
+            np.frombuffer(self._sums, dtype=np.float64)[slots] / counts,
+            counts,
+            np.frombuffer(self._above, dtype=np.float64)[slots],
+        )
+
+
+class RollupSet:
+    """
+    Agregados de uma série (quarto e tipo) em vários níveis de resolução (ex.: 1 min, 15 min, 1 h).
+
+    Também acumula o tempo acima da referência: a duração entre duas leituras consecutivas
+    conta como "acima" quando a leitura anterior estava acima da referência vigente (amostra e
+    retenção), e é atribuída ao intervalo da leitura seguinte, limitada à resolução do nível.
+    """
+
+    __slots__ = ("tiers", "_last_timestamp", "_last_above")
+
+    # Lotes menores que isto são acumulados leitura a leitura (mais rápido que o NumPy)
+    SCALAR_BATCH_MAX = 32
+
+    def __init__(self, tiers=ROLLUP_TIERS):
+        """
+        Args:
+            tiers: Sequência de (resolução em segundos, número de intervalos retidos), da mais fina à mais grossa
+        """
+        self.tiers = [RollupTier(resolution, retention) for resolution, retention in tiers]
+        self._last_timestamp = None
+        self._last_above = False
+
+    def add(self, timestamp, value, reference=None):
+        """Acumula uma leitura em todos os níveis (O(1) por nível)."""
+        above_seconds = 0.0
+        if self._last_timestamp is not None and timestamp >= self._last_timestamp:
+            if self._last_above:
+                above_seconds = timestamp - self._last_timestamp
+            self._last_timestamp = timestamp
+            self._last_above = reference is not None and value > reference
+        elif self._last_timestamp is None:
+            self._last_timestamp = timestamp
+            self._last_above = reference is not None and value > reference
+
+        for tier in self.tiers:
+            tier.add(timestamp, value, above_seconds)
+
+    def add_many(self, timestamps, values, reference=None):
+        """Acumula um lote de leituras em todos os níveis."""
+        if len(timestamps) < self.SCALAR_BATCH_MAX:
+            for timestamp, value in zip(timestamps, values):
+                self.add(float(timestamp), float(value), reference)
+            return
+
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+
+        above = (values > reference) if reference is not None else np.zeros(len(values), dtype=bool)
+        previous_timestamps = np.empty_like(timestamps)
+        previous_timestamps[1:] = timestamps[:-1]
+        previous_above = np.empty_like(above)
+        previous_above[1:] = above[:-1]
+        if self._last_timestamp is not None:
+            previous_timestamps[0] = self._last_timestamp
+            previous_above[0] = self._last_above
+        else:
+            previous_timestamps[0] = timestamps[0]
+            previous_above[0] = False
+        gaps = timestamps - previous_timestamps
+        above_seconds = np.where(previous_above & (gaps > 0), gaps, 0.0)
+
+        if self._last_timestamp is None or timestamps[-1] >= self._last_timestamp:
+            self._last_timestamp = float(timestamps[-1])
+            self._last_above = bool(above[-1])
+
+        for tier in self.tiers:
+            tier.add_many(timestamps, values, above_seconds)
+
+    def merge_from(self, other):
+        """Acumula os agregados de outro conjunto com os mesmos níveis (ex.: leituras recebidas durante a reconstrução)."""
+        for tier, other_tier in zip(self.tiers, other.tiers):
+            tier.merge_from(other_tier)
+        if other._last_timestamp is not None and (self._last_timestamp is None
+                                                  or other._last_timestamp >= self._last_timestamp):
+            self._last_timestamp = other._last_timestamp
+            self._last_above = other._last_above
+
+    def select_tier(self, start, end, max_buckets):
+        """
+        Escolhe o nível para o intervalo [start, end]: o de resolução mais fina que cubra o
+        intervalo com no máximo `max_buckets` intervalos e cuja retenção alcance `start`.
+        Se nenhum atender, usa o mais grosso.
+        """
+        span = max(end - start, 0.0)
+        for tier in self.tiers:
+            oldest = tier.oldest_start()
+            if oldest is None:
+                continue
+            if span / tier.resolution <= max_buckets and oldest <= start:
+                return tier
+        return self.tiers[-1]
+
+    def query(self, start, end, max_buckets):
+        """Retorna os agregados do nível escolhido por `select_tier` no intervalo [start, end]."""
+        return self.select_tier(start, end, max_buckets).range(start, end)
+
+    def summary(self, start, end, max_buckets):
+        """
+        Agrega o intervalo [start, end] em um único resultado, a partir do nível escolhido.
+
+        Returns:
+            RollupSummary or None: None se não há leituras no intervalo
+        """
+        rollup = self.query(start, end, max_buckets)
+        if not len(rollup):
+            return None
+        count = int(rollup.counts.sum())
+        mean = float((rollup.means * rollup.counts).sum() / count)
+        return RollupSummary(rollup.resolution, float(rollup.mins.min()), float(rollup.maxs.max()),
+                             mean, count, float(rollup.above_seconds.sum()))
+
+
+class RoomRollups:
+    """Agregados de temperatura ambiente e de referência de um quarto."""
+
+    __slots__ = ("environment", "reference")
+
+    def __init__(self, tiers):
+        self.environment = RollupSet(tiers)
+        self.reference = RollupSet(tiers)
+
+    def get(self, temp_type):
+        """Retorna os agregados correspondentes ao tipo de temperatura ("0" ou "1")."""
+        if temp_type == TEMP_TYPE_ENVIRONMENT:
+            return self.environment
+        if temp_type == TEMP_TYPE_REFERENCE:
+            return self.reference
+        raise KeyError(temp_type)
+
+    def replace(self, temp_type, rollup_set):
+        """Substitui os agregados de um tipo de temperatura."""
+        if temp_type == TEMP_TYPE_ENVIRONMENT:
+            self.environment = rollup_set
+        elif temp_type == TEMP_TYPE_REFERENCE:
+            self.reference = rollup_set
+        else:
+            raise KeyError(temp_type)
+
+
+class RollupStore:
+    """Agregados em vários níveis de resolução de todos os quartos."""
+
+    def __init__(self, tiers=ROLLUP_TIERS):
+        self.tiers = tuple(tiers)
+        self._rooms = {}
+
+    def __contains__(self, room_id):
+        return room_id in self._rooms
+
+    def get(self, room_id):
+        """Retorna os agregados do quarto ou None."""
+        return self._rooms.get(room_id)
+
+    def _room(self, room_id):
+        rollups = self._rooms.get(room_id)
+        if rollups is None:
+            rollups = self._rooms[room_id] = RoomRollups(self.tiers)
+        return rollups
+
+    def add(self, room_id, temp_type, timestamp, value, reference=None):
+        """Acumula uma leitura; `reference` é a referência vigente (para o tempo acima dela)."""
+        self._room(room_id).get(temp_type).add(timestamp, value, reference)
+
+    def add_many(self, room_id, temp_type, timestamps, values, reference=None):
+        """Acumula um lote de leituras de um mesmo quarto e tipo."""
+        self._room(room_id).get(temp_type).add_many(timestamps, values, reference)
+
+    def install(self, room_id, temp_type, rollup_set):
+        """
+        Instala agregados reconstruídos fora da thread consumidora, acumulando neles os agregados
+        já recebidos desse quarto e tipo (deve ser chamado na thread consumidora).
+        """
+        rollups = self._room(room_id)
+        rollup_set.merge_from(rollups.get(temp_type))
+        rollups.replace(temp_type, rollup_set)
+
+
+class RollupBackfill:
+    """
+    Reconstrói em uma thread os agregados a partir do histórico em segmentos.
+
+    Cada quarto e tipo é agregado em um RollupSet próprio, entregue a `deliver(room_id, temp_type,
+    rollup_set)` ao terminar; o motor o instala na thread consumidora (`RollupStore.install`),
+    somando as leituras recebidas enquanto isso. Com `prior_counts` (ver
+    `SegmentWriter.initial_counts`) só são lidas as leituras gravadas antes de este processo
+    começar a escrever em cada segmento, pois as novas já foram agregadas ao chegar.
+    """
+
+    def __init__(self, reader, tiers, max_age, deliver, prior_counts=None):
+        """
+        Args:
+            reader: SegmentReader exclusivo desta thread (fechado ao terminar)
+            tiers: Níveis dos agregados (os mesmos do RollupStore do motor)
+            max_age: Segundos de histórico lidos, contados a partir do último dia de cada quarto
+            deliver: Função chamada com (room_id, temp_type, RollupSet) a cada série reconstruída
+            prior_counts: {(room_id, temp_type, dia): leituras já gravadas antes deste processo}
+        """
+        self.reader = reader
+        self.tiers = tuple(tiers)
+        self.max_age = max_age
+        self.deliver = deliver
+        self.prior_counts = prior_counts
+        self.rooms_done = 0
+        self.readings = 0
+        self._stopping = False
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="RollupBackfill", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=5.0):
+        """Interrompe a reconstrução (os quartos já entregues permanecem)."""
+        if self._thread is None:
+            return
+        self._stopping = True
+        self._thread.join(timeout)
+        self._thread = None
+
+    def _run(self):
+        started_at = time.perf_counter()
+        try:
+            for room_id in self.reader.room_ids():
+                for temp_type in (TEMP_TYPE_REFERENCE, TEMP_TYPE_ENVIRONMENT):
+                    if self._stopping:
+                        return
+                    self._backfill(room_id, temp_type)
+                self.rooms_done += 1
+        except Exception:
+            logger.exception("Falha ao reconstruir os agregados a partir do histórico em disco")
+            return
+        finally:
+            self.reader.close()
+        if self.readings:
+            logger.info("Agregados de %d quartos reconstruídos a partir de %d leituras do histórico em %.1f s.",
+                        self.rooms_done, self.readings, time.perf_counter() - started_at)
+
+    def _backfill(self, room_id, temp_type):
+        days = self.reader.days(room_id, temp_type)
+        if not days:
+            return
+        start = (days[-1] + 1) * 86400 - self.max_age
+        rollup_set = RollupSet(self.tiers)
+        for timestamps_ns, values in self.reader.iter_range(room_id, temp_type, start,
+                                                             prior_counts=self.prior_counts):
+            rollup_set.add_many(timestamps_ns / 1e9, values)
+            self.readings += len(values)
+        self.deliver(room_id, temp_type, rollup_set)
@@ -0,0 +1,353 @@
+import tkinter as tk
+from tkinter import ttk
+from datetime import datetime, timezone
+
+import matplotlib.dates as mdates
+import numpy as np
+from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg, NavigationToolbar2Tk
+from matplotlib.figure import Figure
+
+from config import ALARM_TEMP_THRESHOLD, CHART_DOWNSAMPLING, CHART_MARKER_MAX_POINTS, CHART_RANGE_OPTIONS
+from config import CHART_HISTORY_MAX_RANGE_S, TEMP_TYPE_ENVIRONMENT, TEMP_TYPE_REFERENCE
+from downsample import MinMaxDownsampler, lttb, minmax_downsample
+from rollups import format_resolution
+
+SECONDS_PER_DAY = 86400.0
+
+# Valor do Matplotlib para 1970-01-01 (depende da época configurada em rcParams)
+_EPOCH_DATENUM = mdates.date2num(datetime(1970, 1, 1, tzinfo=timezone.utc))
+
+
+def epoch_to_datenum(timestamps):
+    """Converte um array de segundos desde a época para datas do Matplotlib (novo array)."""
+    return timestamps / SECONDS_PER_DAY + _EPOCH_DATENUM
+
+
+def datenum_to_epoch(datenum):
+    """Converte uma data do Matplotlib para segundos desde a época."""
+    return (datenum - _EPOCH_DATENUM) * SECONDS_PER_DAY
+
+
+class _ChartToolbar(NavigationToolbar2Tk):
+    """Barra de navegação cujo botão "Home" volta a acompanhar os dados mais recentes."""
+
+    def __init__(self, canvas, window, chart):
+        self._chart = chart
+        super().__init__(canvas, window, pack_toolbar=False)
+
+    def home(self, *args):
+        self._chart.reset_zoom()
+
+
+class RoomChart:
+    """
+    Gráfico persistente de um quarto.
+
+    A figura, o canvas e as linhas são criados uma única vez; a cada novo lote de leituras
+    apenas os dados das linhas e a linha de limite são atualizados, e o redesenho é agendado
+    com `draw_idle`, evitando recriar a figura e o widget do Tk a cada amostra.
+
+    Séries longas são reduzidas antes de chegar às linhas para no máximo um ponto por pixel da
+    largura dos eixos (`CHART_DOWNSAMPLING`: "minmax" incremental ou "lttb"). Ao aproximar um
+    intervalo pela barra de navegação, apenas as leituras visíveis são reduzidas novamente.
+    Períodos que vão além das leituras em memória (seletor de período ou aproximação) são
+    desenhados com as leituras do histórico em disco, se curtos, ou a partir do nível de
+    agregados com no máximo um intervalo por pixel.
+    """
+
+    def __init__(self, master, room_id):
+        self.room_id = room_id
+
+        self.figure = Figure(figsize=(9, 5))
+        self.ax = self.figure.add_subplot()
+        self.ax.xaxis_date(tz=timezone.utc)
+
+        # Temperaturas do ambiente (Y=0)
+        self.env_line, = self.ax.plot([], [], marker='o', linestyle='-', color='#2E86AB',
+                                      linewidth=2, markersize=6, label='🌡️ Temperatura Ambiente')
+        # Temperaturas de referência (Y=1)
+        self.ref_line, = self.ax.plot([], [], marker='s', linestyle='--', color='#A23B72',
+                                      linewidth=2, markersize=6, label='🎯 Temperatura Referência')
+        # Faixa mínimo-máximo de cada intervalo quando o gráfico usa agregados
+        self.env_range_line, = self.ax.plot([], [], linestyle='-', color='#2E86AB', alpha=0.3,
+                                            linewidth=4, label='Faixa mín–máx Ambiente')
+        self.env_range_line.set_visible(False)
+        # Linha de limite de alerta (referência atual do quarto ou valor padrão)
+        self.threshold_line = self.ax.axhline(y=ALARM_TEMP_THRESHOLD, linestyle=':')
+
+        self.ax.set_xlabel('Data/Hora')
+        self.ax.set_ylabel('Temperatura (°C)')
+        self.ax.grid(True, alpha=0.3)
+        self.ax.tick_params(axis='x', labelrotation=30)
+        self.figure.subplots_adjust(bottom=0.2)
+
+        self._legend_key = None
+        self._threshold = object()  # Força a configuração da linha de limite na primeira atualização
+
+        # Redução de pontos: um redutor incremental por linha e o intervalo aproximado pelo usuário
+        self._series = None
+        self._rollups = None
+        self._history = None
+        self._downsamplers = {}
+        self._range_seconds = None  # Período do seletor (None: leituras em memória)
+        self._range_label = CHART_RANGE_OPTIONS[0][0]
+        self._view_range = None  # (início, fim) em segundos desde a época ou None (acompanha os dados)
+        self._autoscaling = False
+
+        self.canvas = FigureCanvasTkAgg(self.figure, master=master)
+        self.widget = self.canvas.get_tk_widget()
+        self.toolbar = _ChartToolbar(self.canvas, master, self)
+        self.toolbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self._build_range_selector()
+        self.widget.pack(fill=tk.BOTH, expand=True)
+
+        self.ax.callbacks.connect('xlim_changed', self._on_xlim_changed)
+        self.canvas.mpl_connect('resize_event', lambda event: self._redraw_lines())
+
+    def update(self, series, threshold, rollups=None, history=None):
+        """
+        Atualiza as linhas com os dados atuais do quarto e agenda o redesenho.
+
+        Args:
+            series: RoomSeries com os buffers de ambiente e referência
+            threshold: Temperatura de referência atual ou None
+            rollups: RoomRollups com os agregados do quarto, usados quando o período pedido
+                vai além das leituras em memória
+            history: SegmentReader com o histórico em disco, usado no lugar dos agregados para
+                períodos de até `CHART_HISTORY_MAX_RANGE_S`
+        """
+        self._series = series
+        self._rollups = rollups
+        self._history = history
+        env_temps = series.environment
+        ref_temps = series.reference
+
+        view = self._requested_range(series)
+        beyond_memory = view is not None and not self._covers(series, view[0])
+        if beyond_memory and history is not None and view[1] - view[0] <= CHART_HISTORY_MAX_RANGE_S:
+            # Período curto além das leituras em memória: leituras brutas dos segmentos em disco
+            shown = self._set_history_data(self.env_line, history, TEMP_TYPE_ENVIRONMENT, view)
+            shown += self._set_history_data(self.ref_line, history, TEMP_TYPE_REFERENCE, view)
+            self.env_range_line.set_visible(False)
+            label = 'Intervalo aproximado' if self._view_range is not None else self._range_label
+            title = f'{label} - Quarto {self.room_id} (histórico em disco, {shown} pontos exibidos)'
+        elif beyond_memory and rollups is not None:
+            # Período maior que as leituras em memória: usa o nível de agregados adequado
+            resolution = self._set_rollup_data(self.env_line, rollups.environment, view, self.env_range_line)
+            self._set_rollup_data(self.ref_line, rollups.reference, view)
+            label = 'Intervalo aproximado' if self._view_range is not None else self._range_label
+            title = f'{label} - Quarto {self.room_id} (médias de {format_resolution(resolution)})'
+        else:
+            shown = self._set_line_data(self.env_line, env_temps, view)
+            shown += self._set_line_data(self.ref_line, ref_temps, view)
+            self.env_range_line.set_visible(False)
+
+            total_readings = len(env_temps) + len(ref_temps)
+            title = f'Últimas {total_readings} Leituras - Quarto {self.room_id}'
+            if shown < total_readings:
+                title += f' ({shown} pontos exibidos)'
+
+        if threshold != self._threshold:
+            self._set_threshold(threshold)
+
+        lines = (self.env_line, self.env_range_line, self.ref_line)
+        legend_key = tuple(line.get_visible() for line in lines) + (self.threshold_line.get_label(),)
+        if legend_key != self._legend_key:
+            self._legend_key = legend_key
+            handles = [line for line in lines if line.get_visible()]
+            handles.append(self.threshold_line)
+            self.ax.legend(handles=handles)
+
+        self.ax.set_title(title)
+
+        if self._view_range is None:
+            self._autoscale()
+        self.canvas.draw_idle()
+
+    def set_range(self, seconds, label=None):
+        """
+        Define o período exibido: os últimos `seconds` segundos até a leitura mais recente,
+        ou as leituras em memória se `seconds` for None.
+        """
+        self._range_seconds = seconds
+        if label is None:
+            label = CHART_RANGE_OPTIONS[0][0] if seconds is None else f'Período de {format_resolution(seconds)}'
+        self._range_label = label
+        self.reset_zoom()
+
+    def reset_zoom(self):
+        """Sai do intervalo aproximado e volta a acompanhar os dados mais recentes."""
+        self._view_range = None
+        self.ax.set_autoscale_on(True)  # A aproximação desativa o ajuste automático dos limites
+        self.toolbar.update()  # Limpa o histórico de navegação da barra
+        self._redraw_lines()
+
+    def _build_range_selector(self):
+        """Cria o seletor de período na barra de navegação."""
+        labels = [label for label, _ in CHART_RANGE_OPTIONS]
+        self.range_var = tk.StringVar(self.toolbar, value=labels[0])
+        selector = ttk.Combobox(self.toolbar, textvariable=self.range_var, values=labels,
+                                state='readonly', width=18)
+        selector.pack(side=tk.RIGHT, padx=5)
+        selector.bind('<<ComboboxSelected>>', lambda event: self._on_range_selected())
+
+    def _on_range_selected(self):
+        label = self.range_var.get()
+        self.set_range(dict(CHART_RANGE_OPTIONS)[label], label)
+
+    def _requested_range(self, series):
+        """
+        Período pedido: o intervalo aproximado pelo usuário ou os últimos `_range_seconds`
+        segundos até a leitura mais recente.
+
+        Returns:
+            tuple or None: (início, fim) em segundos desde a época, ou None para todas as leituras em memória
+        """
+        if self._view_range is not None:
+            return self._view_range
+        if self._range_seconds is None:
+            return None
+        latest = [reading.timestamp for reading in (series.environment.latest(), series.reference.latest())
+                  if reading is not None]
+        if not latest:
+            return None
+        end = max(latest)
+        return end - self._range_seconds, end
+
+    @staticmethod
+    def _covers(series, start):
+        """Verifica se as leituras em memória alcançam `start` (ou se nenhuma foi descartada ainda)."""
+        for buffer in (series.environment, series.reference):
+            if len(buffer) >= buffer.capacity and buffer.timestamps[0] > start:
+                return False
+        return True
+
+    def _max_points(self):
+        """Número máximo de pontos por linha: a largura dos eixos em pixels."""
+        return max(int(self.ax.bbox.width), 16)
+
+    def _set_rollup_data(self, line, rollup_set, view, range_line=None):
+        """
+        Atualiza uma linha com as médias do nível de agregados com no máximo um intervalo por pixel
+        e, opcionalmente, `range_line` com barras verticais do mínimo ao máximo de cada intervalo.
+
+        Returns:
+            int: Resolução (segundos) do nível usado
+        """
+        start, end = view
+        rollup = rollup_set.query(start, end, self._max_points())
+        centers = epoch_to_datenum(rollup.starts + rollup.resolution / 2.0)
+
+        line.set_data(centers, rollup.means)
+        line.set_visible(len(rollup) > 0)
+        line.set_markevery(None if len(rollup) <= CHART_MARKER_MAX_POINTS else [])
+
+        if range_line is not None:
+            # Segmentos (x, mín) -> (x, máx) separados por NaN em uma única linha
+            xs = np.repeat(centers, 3)
+            ys = np.column_stack((rollup.mins, rollup.maxs, np.full(len(rollup), np.nan))).ravel()
+            xs[2::3] = np.nan
+            range_line.set_data(xs, ys)
+            range_line.set_visible(len(rollup) > 0)
+        return rollup.resolution
+
+    def _set_history_data(self, line, history, temp_type, view):
+        """
+        Atualiza uma linha com as leituras do histórico em disco no intervalo `view`, reduzidas à
+        largura dos eixos. A redução é feita sobre as views dos segmentos; só os pontos exibidos
+        são convertidos.
+
+        Returns:
+            int: Número de pontos exibidos
+        """
+        timestamps_ns, values = history.load_range(self.room_id, temp_type, *view)
+        if CHART_DOWNSAMPLING == 'lttb':
+            timestamps_ns, values = lttb(timestamps_ns, values, self._max_points())
+        else:
+            timestamps_ns, values = minmax_downsample(timestamps_ns, values, self._max_points())
+
+        line.set_data(epoch_to_datenum(timestamps_ns / 1e9), values.astype(np.float64))
+        line.set_visible(len(timestamps_ns) > 0)
+        line.set_markevery(None if len(timestamps_ns) <= CHART_MARKER_MAX_POINTS else [])
+        return len(timestamps_ns)
+
+    def _set_line_data(self, line, buffer, view=None):
+        """
+        Atualiza uma linha com as leituras do buffer reduzidas à largura dos eixos.
+
+        Args:
+            view: (início, fim) em segundos desde a época para exibir apenas esse intervalo, ou None
+
+        Returns:
+            int: Número de pontos exibidos
+        """
+        timestamps = buffer.timestamps
+        values = buffer.values  # O armazenamento já mantém as leituras ordenadas por tempo
+
+        max_points = self._max_points()
+        if view is not None:
+            # Reduz apenas as leituras do intervalo pedido (mais um ponto de cada lado)
+            start, end = np.searchsorted(timestamps, view)
+            start, end = max(start - 1, 0), min(end + 1, len(timestamps))
+            timestamps, values = timestamps[start:end], values[start:end]
+            if CHART_DOWNSAMPLING == 'lttb':
+                timestamps, values = lttb(timestamps, values, max_points)
+            else:
+                timestamps, values = minmax_downsample(timestamps, values, max_points)
+        elif CHART_DOWNSAMPLING == 'lttb':
+            timestamps, values = lttb(timestamps, values, max_points)
+        else:
+            downsampler = self._downsamplers.get(line)
+            if downsampler is None or downsampler.max_points != max_points:
+                downsampler = self._downsamplers[line] = MinMaxDownsampler(max_points)
+            timestamps, values = downsampler(timestamps, values)
+
+        line.set_data(epoch_to_datenum(timestamps), values.copy())
+        line.set_visible(len(buffer) > 0)
+        line.set_markevery(None if len(timestamps) <= CHART_MARKER_MAX_POINTS else [])
+        return len(timestamps)
+
+    def _autoscale(self):
+        self._autoscaling = True
+        try:
+            self.ax.relim(visible_only=True)
+            self.ax.autoscale_view()
+        finally:
+            self._autoscaling = False
+
+    def _redraw_lines(self):
+        """Recalcula os pontos exibidos (após aproximação, troca de período ou redimensionamento)."""
+        if self._series is not None:
+            self.update(self._series, self._threshold, self._rollups, self._history)
+
+    def _on_xlim_changed(self, ax):
+        if self._autoscaling:
+            return
+        # Aproximação/deslocamento pela barra de navegação: reduz só o intervalo visível
+        start, end = (datenum_to_epoch(limit) for limit in ax.get_xlim())
+        self._view_range = (start, end)
+        self._redraw_lines()
+
+    def _set_threshold(self, threshold):
+        """Reconfigura a linha de limite de alerta."""
+        self._threshold = threshold
+        line = self.threshold_line
+        if threshold is not None:
+            line.set_ydata([threshold, threshold])
+            line.set_color('red')
+            line.set_alpha(0.8)
+            line.set_linewidth(2)
+            line.set_label(f'Limite Referência ({threshold:.1f}°C)')
+        else:
+            # Mostra a linha padrão quando não há referência
+            line.set_ydata([ALARM_TEMP_THRESHOLD, ALARM_TEMP_THRESHOLD])
+            line.set_color('gray')
+            line.set_alpha(0.5)
+            line.set_linewidth(1)
+            line.set_label(f'Limite Padrão ({ALARM_TEMP_THRESHOLD}°C) - Sem Referência')
+
+    def destroy(self):
+        """Remove o widget do canvas e a barra de navegação e libera a figura."""
+        self.toolbar.destroy()
+        self.widget.destroy()
+        self.figure.clear()
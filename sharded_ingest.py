@@ -0,0 +1,287 @@
+"""
+Ingestão em vários processos para frotas grandes de sensores.
+
+Cada worker é um processo com o seu próprio `MQTTTemperatureClient` (e a sua própria thread de
+rede), de modo que a decodificação dos payloads deixa de disputar o GIL do processo da interface.
+A distribuição das mensagens entre os workers pode ser feita de duas formas:
+
+- "hash": todos os workers assinam o tópico e cada um decodifica apenas os quartos da sua
+  partição (crc32 do ID do quarto). Como cada quarto pertence a um único worker, os alertas
+  também são avaliados no worker, que envia os estados e as transições já calculados. Ao iniciar,
+  cada worker recebe o estado de alerta que o motor já tem dos seus quartos (ex.: restaurado de
+  um snapshot), para que a primeira leitura não apague a referência conhecida.
+- "shared": assinatura compartilhada do MQTT 5 ("$share/<grupo>/<tópico>"): o broker reparte as
+  mensagens entre os workers, que apenas decodificam; como as leituras de um quarto podem chegar a
+  workers diferentes, os alertas são avaliados no processo principal.
+
+A cada `flush_interval` o worker envia ao processo principal, por uma `multiprocessing.Queue`,
+um único item compacto com as leituras agrupadas por quarto e tipo (arrays de float), os estados
+de alerta finais e as transições do período. No processo principal o item passa pela fila de
+ingestão do motor como qualquer outro lote.
+"""
+
+import logging
+import multiprocessing
+import queue
+import threading
+import zlib
+from array import array
+
+import paho.mqtt.client as mqtt
+
+from config import MQTT_BROKER, MQTT_PORT, MQTT_TOPIC, MQTT_PAYLOAD_CODEC, TEMP_TYPE_REFERENCE
+from config import INGEST_WORKERS, INGEST_SHARD_MODE, INGEST_SHARED_GROUP, INGEST_WORKER_FLUSH_MS
+from config import INGEST_WORKER_QUEUE_MAXSIZE
+from alert_state import AlertTracker
+from metrics import Metrics
+from mqtt_client import MQTTTemperatureClient
+from temperature_store import to_epoch
+
+SHARD_MODES = ("hash", "shared")
+
+logger = logging.getLogger("monitor.ingest")
+
+
+def shard_of(room_id, workers):
+    """Worker responsável por um quarto: partição estável entre processos e execuções."""
+    return zlib.crc32(room_id.encode("utf-8")) % workers
+
+
+def shared_subscription(topic, group):
+    """Filtro de assinatura compartilhada do MQTT 5 para `topic`."""
+    return f"$share/{group}/{topic}"
+
+
+class ShardWorker:
+    """
+    Lado do worker: decodifica as mensagens do seu shard, avalia os alertas dos seus quartos
+    (modo "hash") e acumula as leituras por quarto e tipo até o próximo envio.
+
+    Os callbacks rodam na thread de rede do paho e `flush` na thread principal do processo;
+    um lock protege as leituras acumuladas.
+    """
+
+    def __init__(self, index, workers, mode="hash", broker=MQTT_BROKER, port=MQTT_PORT, topic=MQTT_TOPIC,
+                 codec=MQTT_PAYLOAD_CODEC, shared_group=INGEST_SHARED_GROUP, alert_states=()):
+        """
+        Args:
+            alert_states: Estados de alerta iniciais dos quartos do shard (`AlertTracker.export_state`),
+                usados apenas no modo "hash"
+        """
+        if mode not in SHARD_MODES:
+            raise ValueError(f"Modo de distribuição desconhecido: {mode}")
+        self.index = index
+        self.workers = workers
+        self.alerts = AlertTracker() if mode == "hash" else None
+        if self.alerts is not None:
+            for state in alert_states:
+                self.alerts.restore_state(*state)
+        self.metrics = Metrics(enabled=True)
+
+        self._owned_rooms = {}  # room_id -> bool, evita recalcular o hash a cada mensagem
+        room_filter = self._owns if mode == "hash" and workers > 1 else None
+        self.client = MQTTTemperatureClient(
+            broker=broker,
+            port=port,
+            topic=shared_subscription(topic, shared_group) if mode == "shared" else topic,
+            on_new_data_callback=self._on_reading,
+            on_new_batch_callback=self._on_batch,
+            codec=codec,
+            metrics=self.metrics,
+            room_filter=room_filter,
+            protocol=mqtt.MQTTv5 if mode == "shared" else mqtt.MQTTv311,
+        )
+
+        self._lock = threading.Lock()
+        self._readings = {}  # (room_id, temp_type) -> (array de timestamps, array de valores)
+        self._events = []
+        self._sent_messages = 0
+        self._sent_errors = 0
+
+    def _owns(self, room_id):
+        owned = self._owned_rooms.get(room_id)
+        if owned is None:
+            owned = self._owned_rooms[room_id] = shard_of(room_id, self.workers) == self.index
+        return owned
+
+    def _pending(self, room_id, temp_type):
+        key = (room_id, temp_type)
+        pending = self._readings.get(key)
+        if pending is None:
+            pending = self._readings[key] = (array("d"), array("d"))
+        return pending
+
+    def _on_reading(self, room_id, timestamp, value, temp_type):
+        epoch_timestamp = to_epoch(timestamp)
+        with self._lock:
+            timestamps, values = self._pending(room_id, temp_type)
+            timestamps.append(epoch_timestamp)
+            values.append(value)
+            if self.alerts is not None:
+                self._evaluate(room_id, temp_type, epoch_timestamp, value)
+
+    def _on_batch(self, room_id, temp_type, timestamps, values):
+        with self._lock:
+            pending_timestamps, pending_values = self._pending(room_id, temp_type)
+            pending_timestamps.extend(timestamps)
+            pending_values.extend(values)
+            if self.alerts is not None:
+                for timestamp, value in zip(timestamps, values):
+                    self._evaluate(room_id, temp_type, timestamp, value)
+
+    def _evaluate(self, room_id, temp_type, timestamp, value):
+        if temp_type == TEMP_TYPE_REFERENCE:
+            event = self.alerts.on_reference(room_id, timestamp, value)
+        else:
+            event = self.alerts.on_environment(room_id, timestamp, value)
+        if event is not None:
+            self._events.append((event.room_id, event.previous_status, event.status, event.value,
+                                 event.threshold, event.timestamp))
+
+    def flush(self):
+        """
+        Retira as leituras acumuladas desde o último envio.
+
+        Returns:
+            tuple or None: (índice do worker, leituras, estados de alerta, transições, mensagens
+                recebidas, erros de parse) ou None se não há nada a enviar
+        """
+        with self._lock:
+            pending, self._readings = self._readings, {}
+            events, self._events = self._events, []
+            alert_states = None
+            if self.alerts is not None:
+                rooms = {room_id for room_id, _ in pending}
+                alert_states = [self.alerts.export_state(room_id) for room_id in rooms]
+
+        messages = self.metrics.messages - self._sent_messages
+        errors = self.metrics.parse_errors - self._sent_errors
+        if not pending and not events and not messages and not errors:
+            return None
+        self._sent_messages += messages
+        self._sent_errors += errors
+        readings = [(room_id, temp_type, timestamps, values)
+                    for (room_id, temp_type), (timestamps, values) in pending.items()]
+        return self.index, readings, alert_states, events, messages, errors
+
+
+def run_worker(index, workers, mode, output, stop_event, broker, port, topic, codec, shared_group, flush_interval,
+               alert_states=()):
+    """Ponto de entrada do processo worker: conecta, recebe e envia os lotes até `stop_event`."""
+    worker = ShardWorker(index, workers, mode, broker, port, topic, codec, shared_group, alert_states)
+    try:
+        worker.client.connect_and_loop()
+    except Exception as e:
+        logger.error("Worker de ingestão %d falhou ao conectar ao broker MQTT: %s", index, e)
+        return
+    try:
+        while not stop_event.wait(flush_interval):
+            delta = worker.flush()
+            if delta is not None:
+                # Bloqueia se o processo principal estiver atrasado: a pressão volta ao broker
+                output.put(delta)
+    except KeyboardInterrupt:
+        pass  # O Ctrl+C também chega aos workers; o encerramento é conduzido pelo processo principal
+    finally:
+        worker.client.disconnect()
+
+
+class ShardedIngest:
+    """
+    Lado do processo principal: inicia os workers e repassa os lotes recebidos ao motor.
+
+    Tem a mesma interface de ciclo de vida de `MQTTTemperatureClient` (`connect_and_loop` e
+    `disconnect`), podendo substituí-lo em `main.py`.
+    """
+
+    def __init__(self, engine, workers=INGEST_WORKERS, mode=INGEST_SHARD_MODE, broker=MQTT_BROKER,
+                 port=MQTT_PORT, topic=MQTT_TOPIC, codec=MQTT_PAYLOAD_CODEC, shared_group=INGEST_SHARED_GROUP,
+                 flush_interval_ms=INGEST_WORKER_FLUSH_MS, queue_maxsize=INGEST_WORKER_QUEUE_MAXSIZE):
+        """
+        Args:
+            engine: MonitorEngine que recebe os lotes
+            workers: Número de processos worker
+            mode: "hash" (partição dos quartos entre os workers) ou "shared" (assinatura compartilhada)
+            broker, port, topic, codec: Parâmetros do MQTTTemperatureClient de cada worker
+            shared_group: Nome do grupo da assinatura compartilhada (modo "shared")
+            flush_interval_ms: Intervalo entre os envios de cada worker
+            queue_maxsize: Máximo de lotes em trânsito entre os workers e o processo principal
+        """
+        if mode not in SHARD_MODES:
+            raise ValueError(f"Modo de distribuição desconhecido: {mode}")
+        if workers < 1:
+            raise ValueError("A ingestão em vários processos precisa de ao menos um worker")
+        self.engine = engine
+        self.workers = workers
+        self.mode = mode
+        self._worker_args = (broker, port, topic, codec, shared_group, flush_interval_ms / 1000.0)
+
+        # "spawn": os workers não herdam o estado do Tk nem as threads do processo principal
+        self._context = multiprocessing.get_context("spawn")
+        self._output = self._context.Queue(queue_maxsize)
+        self._stop_event = self._context.Event()
+        self._processes = []
+        self._receiver = None
+        self._running = False
+        self.batches_received = 0
+
+    def connect_and_loop(self):
+        """
+        Inicia os workers e a thread que repassa os lotes ao motor. Deve ser chamado depois de
+        restaurar o estado do motor (snapshot), que é repassado aos workers no modo "hash".
+        """
+        self._running = True
+        alert_states = self.worker_alert_states()
+        for index in range(self.workers):
+            process = self._context.Process(
+                target=run_worker,
+                args=(index, self.workers, self.mode, self._output, self._stop_event) + self._worker_args
+                     + (alert_states[index],),
+                name=f"IngestWorker-{index}",
+                daemon=True,
+            )
+            process.start()
+            self._processes.append(process)
+        self._receiver = threading.Thread(target=self._receive, name="ShardedIngestReceiver", daemon=True)
+        self._receiver.start()
+
+    def worker_alert_states(self):
+        """
+        Estados de alerta do motor repartidos entre os workers pelo shard de cada quarto
+        (listas vazias no modo "shared", em que os alertas são avaliados no processo principal).
+        """
+        alert_states = [[] for _ in range(self.workers)]
+        if self.mode == "hash":
+            for state in self.engine.alerts.export_states():
+                alert_states[shard_of(state[0], self.workers)].append(state)
+        return alert_states
+
+    def alive_workers(self):
+        """Número de workers em execução."""
+        return sum(process.is_alive() for process in self._processes)
+
+    def _receive(self):
+        metrics = self.engine.metrics
+        while self._running:
+            try:
+                _, readings, alert_states, alert_events, messages, errors = self._output.get(timeout=0.2)
+            except queue.Empty:
+                continue
+            except (EOFError, OSError):
+                break
+            self.batches_received += 1
+            metrics.messages += messages
+            metrics.parse_errors += errors
+            self.engine.enqueue_delta(readings, alert_states, alert_events)
+
+    def disconnect(self):
+        """Encerra os workers e a thread de repasse."""
+        self._stop_event.set()
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self._running = False
+        if self._receiver is not None:
+            self._receiver.join()
+        self._processes = []
@@ -0,0 +1,248 @@
+"""
+Snapshots do estado do monitor para reinícios com os dados já na tela.
+
+Um snapshot guarda os buffers em memória de cada quarto, o timestamp da referência vigente e o
+estado de alerta, em um arquivo binário colunar:
+
+    cabeçalho (64 bytes): magic, quartos, leituras ambiente, leituras de referência,
+                          instante da captura, tamanho dos IDs
+    float64: timestamps e valores ambiente, timestamps e valores de referência (todos os quartos,
+             concatenados na ordem dos IDs), timestamp da referência vigente por quarto e os cinco
+             campos numéricos do estado de alerta por quarto (NaN representa None)
+    uint32:  leituras ambiente e de referência por quarto
+    uint8:   status de alerta por quarto (ALERT_STATUS_CODES; NO_ALERT_STATE se não há estado)
+    UTF-8:   IDs dos quartos separados por "\\0" (caractere proibido em tópicos MQTT)
+
+A captura (cópia dos arrays) acontece na thread que aplica as leituras, junto com uma atualização
+do motor; a serialização e a gravação ficam em uma thread própria, com arquivo temporário e
+rename para que um snapshot interrompido nunca substitua o anterior. A leitura é uma única
+leitura do arquivo seguida de views do NumPy sobre ele.
+"""
+
+import logging
+import os
+import struct
+import threading
+import time
+
+import numpy as np
+
+from config import SNAPSHOT_PATH, SNAPSHOT_INTERVAL_S
+from alert_state import STATUS_OK, STATUS_ALERT, STATUS_NO_REFERENCE
+
+MAGIC = b"TSNAP001"
+_HEADER = struct.Struct("<8sQQQdQ")
+HEADER_SIZE = 64
+
+ALERT_STATUS_CODES = (STATUS_OK, STATUS_ALERT, STATUS_NO_REFERENCE)
+NO_ALERT_STATE = 255
+ALERT_FIELDS = 5  # reference_value, reference_timestamp, last_value, last_timestamp, pending_since
+
+logger = logging.getLogger("monitor.snapshot")
+
+
+class StateSnapshot:
+    """Estado capturado do motor em arrays colunares (ver `MonitorEngine.capture_snapshot`)."""
+
+    __slots__ = ("created_at", "room_ids", "env_counts", "env_timestamps", "env_values", "ref_counts",
+                 "ref_timestamps", "ref_values", "reference_timestamps", "alert_status", "alert_fields")
+
+    def __init__(self, created_at, room_ids, env_counts, env_timestamps, env_values, ref_counts,
+                 ref_timestamps, ref_values, reference_timestamps, alert_status, alert_fields):
+        self.created_at = created_at  # Segundos desde a época
+        self.room_ids = room_ids
+        self.env_counts = env_counts
+        self.env_timestamps = env_timestamps
+        self.env_values = env_values
+        self.ref_counts = ref_counts
+        self.ref_timestamps = ref_timestamps
+        self.ref_values = ref_values
+        self.reference_timestamps = reference_timestamps
+        self.alert_status = alert_status
+        self.alert_fields = alert_fields  # Array (quartos, ALERT_FIELDS)
+
+    def __len__(self):
+        return len(self.room_ids)
+
+    @staticmethod
+    def encode_alert_states(states):
+        """
+        Converte tuplas de `AlertTracker.export_state` (ou None) nas colunas do snapshot.
+
+        Returns:
+            tuple: (array uint8 dos códigos de status, array (quartos, ALERT_FIELDS) dos campos)
+        """
+        codes = {status: code for code, status in enumerate(ALERT_STATUS_CODES)}
+        empty = (None,) * ALERT_FIELDS
+        alert_status = np.array([NO_ALERT_STATE if state is None else codes[state[1]] for state in states],
+                                dtype=np.uint8)
+        # Com dtype float64, None vira NaN
+        alert_fields = np.array([empty if state is None else state[2:] for state in states], dtype=np.float64)
+        return alert_status, alert_fields.reshape(len(states), ALERT_FIELDS)
+
+    def alert_states(self):
+        """
+        Estados de alerta de todos os quartos, na ordem de `room_ids`.
+
+        Returns:
+            list: Argumentos de `AlertTracker.restore_state` após o ID do quarto, ou None
+        """
+        states = []
+        for code, fields in zip(self.alert_status.tolist(), self.alert_fields.tolist()):
+            if code == NO_ALERT_STATE:
+                states.append(None)
+            else:
+                fields = tuple(None if field != field else field for field in fields)  # NaN -> None
+                states.append((ALERT_STATUS_CODES[code],) + fields)
+        return states
+
+
+def write_snapshot(path, snapshot):
+    """Grava um snapshot de forma atômica: arquivo temporário, fsync e rename."""
+    ids_blob = "\0".join(snapshot.room_ids).encode("utf-8")
+    header = _HEADER.pack(MAGIC, len(snapshot), len(snapshot.env_timestamps), len(snapshot.ref_timestamps),
+                          snapshot.created_at, len(ids_blob))
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header.ljust(HEADER_SIZE, b"\0"))
+        for column in (snapshot.env_timestamps, snapshot.env_values, snapshot.ref_timestamps,
+                       snapshot.ref_values, snapshot.reference_timestamps, snapshot.alert_fields):
+            f.write(np.ascontiguousarray(column, dtype="<f8").tobytes())
+        for column in (snapshot.env_counts, snapshot.ref_counts):
+            f.write(np.ascontiguousarray(column, dtype="<u4").tobytes())
+        f.write(np.ascontiguousarray(snapshot.alert_status, dtype=np.uint8).tobytes())
+        f.write(ids_blob)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path):
+    """
+    Lê um snapshot gravado por `write_snapshot`.
+
+    Returns:
+        StateSnapshot or None: None se o arquivo não existe
+
+    Raises:
+        ValueError: Se o arquivo não é um snapshot válido
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except FileNotFoundError:
+        return None
+    if len(data) < HEADER_SIZE:
+        raise ValueError(f"Snapshot inválido: {path}")
+    magic, rooms, env_total, ref_total, created_at, ids_size = _HEADER.unpack_from(data, 0)
+    expected_size = HEADER_SIZE + 8 * (2 * env_total + 2 * ref_total + rooms * (1 + ALERT_FIELDS)) + 9 * rooms + ids_size
+    if magic != MAGIC or len(data) != expected_size:
+        raise ValueError(f"Snapshot inválido: {path}")
+
+    offset = HEADER_SIZE
+
+    def column(dtype, count):
+        nonlocal offset
+        array = np.frombuffer(data, dtype=dtype, count=count, offset=offset)
+        offset += array.nbytes
+        return array
+
+    env_timestamps, env_values = column("<f8", env_total), column("<f8", env_total)
+    ref_timestamps, ref_values = column("<f8", ref_total), column("<f8", ref_total)
+    reference_timestamps = column("<f8", rooms)
+    alert_fields = column("<f8", rooms * ALERT_FIELDS).reshape(rooms, ALERT_FIELDS)
+    env_counts, ref_counts = column("<u4", rooms), column("<u4", rooms)
+    alert_status = column(np.uint8, rooms)
+    room_ids = data[offset:offset + ids_size].decode("utf-8").split("\0") if rooms else []
+    return StateSnapshot(created_at, room_ids, env_counts, env_timestamps, env_values, ref_counts,
+                         ref_timestamps, ref_values, reference_timestamps, alert_status, alert_fields)
+
+
+class SnapshotWriter:
+    """
+    Grava snapshots periódicos do motor a partir de uma thread dedicada.
+
+    Inscrito no motor, captura o estado a cada `interval_s` segundos dentro de uma atualização
+    (na thread que aplica as leituras, então a cópia é consistente); sem leituras novas o estado
+    não muda e nada é gravado. Se a gravação anterior ainda não terminou, apenas a captura mais
+    recente é mantida. `stop` captura e grava o estado final.
+    """
+
+    def __init__(self, engine, path=SNAPSHOT_PATH, interval_s=SNAPSHOT_INTERVAL_S):
+        self.engine = engine
+        self.path = path
+        self.interval = interval_s
+        self.snapshots_written = 0
+        self.last_write_ms = 0.0
+
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._pending = None
+        self._running = False
+        self._thread = None
+        self._unsubscribe = None
+        self._next_capture = 0.0
+
+    def start(self):
+        """Inscreve-se no motor e inicia a thread de gravação."""
+        self._next_capture = time.monotonic() + self.interval
+        self._unsubscribe = self.engine.subscribe(self._on_engine_update)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="SnapshotWriter", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout=10.0):
+        """
+        Grava o estado final e encerra a thread. Deve ser chamado depois que a ingestão parou,
+        na thread que aplicava as leituras ou após ela terminar.
+        """
+        if self._thread is None:
+            return
+        self._unsubscribe()
+        self._submit(self.engine.capture_snapshot())
+        self._running = False
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def register_metrics(self, metrics):
+        metrics.add_gauge("monitor_snapshots_written_total", "Snapshots de estado gravados",
+                          lambda: self.snapshots_written, kind="counter")
+        metrics.add_gauge("monitor_snapshot_write_seconds", "Duração da última gravação de snapshot",
+                          lambda: self.last_write_ms / 1000.0)
+
+    def _on_engine_update(self, update):
+        now = time.monotonic()
+        if now < self._next_capture:
+            return
+        self._next_capture = now + self.interval
+        self._submit(self.engine.capture_snapshot())
+
+    def _submit(self, snapshot):
+        with self._lock:
+            self._pending = snapshot
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            self._wakeup.wait()
+            self._wakeup.clear()
+            with self._lock:
+                snapshot, self._pending = self._pending, None
+            if snapshot is not None:
+                self._write(snapshot)
+            # Só termina depois de gravar a captura final de `stop`, mesmo que ela tenha chegado
+            # durante a gravação anterior
+            with self._lock:
+                if not self._running and self._pending is None:
+                    return
+
+    def _write(self, snapshot):
+        started_at = time.perf_counter()
+        try:
+            write_snapshot(self.path, snapshot)
+        except OSError as e:
+            logger.warning("Falha ao gravar o snapshot de estado em %s: %s", self.path, e)
+            return
+        self.last_write_ms = (time.perf_counter() - started_at) * 1000.0
+        self.snapshots_written += 1
@@ -0,0 +1,87 @@
+from heapq import heappop, heappush
+
+
+class StalenessTracker:
+    """
+    Detecta quartos que pararam de enviar leituras, com prazos por quarto e tipo em um min-heap.
+
+    Cada leitura apenas renova o prazo do quarto no dicionário (O(1), sem mexer no heap). O heap
+    guarda uma entrada por quarto e tipo; `expire` retira somente as entradas cujo prazo já
+    passou: se o prazo foi renovado nesse meio tempo, a entrada volta ao heap com o prazo atual,
+    senão o quarto fica sem sinal. O custo de cada verificação é proporcional às entradas
+    vencidas, não ao número de quartos.
+
+    Os prazos usam o instante de chegada das leituras (`time.monotonic()`), não os timestamps
+    enviados pelos sensores.
+    """
+
+    def __init__(self, timeouts):
+        """
+        Args:
+            timeouts: Dicionário {temp_type: segundos sem leituras até o quarto ficar sem sinal};
+                tipos ausentes ou com None/0 não são monitorados
+        """
+        self.timeouts = {temp_type: timeout for temp_type, timeout in timeouts.items() if timeout}
+        self._deadlines = {temp_type: {} for temp_type in self.timeouts}  # temp_type -> {room_id: prazo}
+        self._heap = []  # (prazo, room_id, temp_type)
+        self._stale = {}  # room_id -> conjunto dos tipos sem sinal
+
+    def __len__(self):
+        """Número de quartos sem sinal."""
+        return len(self._stale)
+
+    def touch(self, room_id, temp_type, now):
+        """
+        Renova o prazo de um quarto ao receber leituras.
+
+        Returns:
+            bool: True se o quarto estava sem sinal e voltou a ter todos os tipos em dia
+        """
+        deadlines = self._deadlines.get(temp_type)
+        if deadlines is None:
+            return False
+        if room_id not in deadlines:
+            # Quarto novo ou cujo prazo já venceu: volta a ter uma entrada no heap
+            heappush(self._heap, (now + self.timeouts[temp_type], room_id, temp_type))
+        deadlines[room_id] = now + self.timeouts[temp_type]
+
+        stale_types = self._stale.get(room_id)
+        if stale_types is None or temp_type not in stale_types:
+            return False
+        stale_types.discard(temp_type)
+        if stale_types:
+            return False
+        del self._stale[room_id]
+        return True
+
+    def expire(self, now):
+        """
+        Processa os prazos vencidos até `now`.
+
+        Returns:
+            list: Quartos que acabaram de ficar sem sinal
+        """
+        heap = self._heap
+        expired_rooms = []
+        while heap and heap[0][0] <= now:
+            _, room_id, temp_type = heappop(heap)
+            deadlines = self._deadlines[temp_type]
+            deadline = deadlines[room_id]
+            if deadline > now:
+                heappush(heap, (deadline, room_id, temp_type))  # Renovado depois de entrar no heap
+                continue
+            del deadlines[room_id]
+            stale_types = self._stale.get(room_id)
+            if stale_types is None:
+                self._stale[room_id] = {temp_type}
+                expired_rooms.append(room_id)
+            else:
+                stale_types.add(temp_type)
+        return expired_rooms
+
+    def is_stale(self, room_id):
+        return room_id in self._stale
+
+    def stale_types(self, room_id):
+        """Tipos de temperatura sem leituras dentro do prazo (conjunto vazio se o quarto está em dia)."""
+        return frozenset(self._stale.get(room_id, ()))
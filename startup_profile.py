@@ -0,0 +1,148 @@
+"""
+Relatório de tempo de inicialização (`python main.py --profile-startup`).
+
+Mede as etapas da inicialização (Tk, motor, snapshot, interface, conexão MQTT, primeiro desenho,
+primeira leitura) e o tempo de importação de cada módulo carregado na thread principal, no estilo
+de `python -X importtime`: tempo próprio do módulo e tempo acumulado com os módulos que ele importa.
+
+Sem `install()`, `phase` e `mark` não fazem nada, então as chamadas podem ficar no código de
+inicialização sem custo.
+"""
+
+import contextlib
+import logging
+import sys
+import threading
+import time
+
+logger = logging.getLogger("monitor.startup")
+
+_profiler = None
+
+
+class _ImportTimer:
+    """
+    Finder do `sys.meta_path` que não encontra módulos: apenas envolve o `exec_module` do loader
+    encontrado pelos demais finders para medir a execução de cada módulo importado.
+    """
+
+    def __init__(self):
+        self.records = []  # (módulo, tempo próprio, tempo acumulado, profundidade), em ordem de término
+        self._stack = []  # Tempo acumulado dos imports aninhados de cada módulo em execução
+        self._finding = False
+        self._thread_id = threading.get_ident()
+
+    def find_spec(self, name, path=None, target=None):
+        if self._finding or threading.get_ident() != self._thread_id:
+            return None
+        self._finding = True
+        try:
+            for finder in sys.meta_path:
+                if finder is self or not hasattr(finder, "find_spec"):
+                    continue
+                spec = finder.find_spec(name, path, target)
+                if spec is not None:
+                    break
+            else:
+                return None
+        finally:
+            self._finding = False
+        loader = spec.loader
+        # Loaders de módulos embutidos e congelados são classes compartilhadas: não são envolvidos
+        if loader is not None and not isinstance(loader, type) and hasattr(loader, "exec_module"):
+            loader.exec_module = self._timed(name, loader.exec_module)
+        return spec
+
+    def _timed(self, name, exec_module):
+        def timed_exec_module(module):
+            depth = len(self._stack)
+            self._stack.append(0.0)
+            started_at = time.perf_counter()
+            try:
+                exec_module(module)
+            finally:
+                elapsed = time.perf_counter() - started_at
+                nested = self._stack.pop()
+                if self._stack:
+                    self._stack[-1] += elapsed
+                self.records.append((name, elapsed - nested, elapsed, depth))
+        return timed_exec_module
+
+
+class StartupProfiler:
+    """Etapas da inicialização e tempos de importação desde `install()`."""
+
+    def __init__(self):
+        self.started_at = time.perf_counter()
+        self.phases = []  # (nome, início relativo, duração)
+        self.marks = []  # (nome, instante relativo)
+        self.imports = _ImportTimer()
+        self.reported = False
+
+    def start(self):
+        sys.meta_path.insert(0, self.imports)
+
+    def stop(self):
+        if self.imports in sys.meta_path:
+            sys.meta_path.remove(self.imports)
+
+    def elapsed(self):
+        return time.perf_counter() - self.started_at
+
+    def report(self, top=25):
+        """Texto do relatório: etapas, marcos e os imports de maior tempo acumulado."""
+        lines = ["Tempo de inicialização (desde o início de main.py):", ""]
+        lines.append(f"  {'etapa':<32} {'início':>10} {'duração':>10}")
+        for name, start, duration in self.phases:
+            lines.append(f"  {name:<32} {start * 1000:>8.1f}ms {duration * 1000:>8.1f}ms")
+        for name, instant in self.marks:
+            lines.append(f"  {name:<32} {instant * 1000:>8.1f}ms")
+
+        records = self.imports.records
+        total = sum(own for _, own, _, _ in records)
+        lines += ["", f"Imports na thread principal: {len(records)} módulos, {total * 1000:.1f} ms no total", ""]
+        lines.append(f"  {'próprio [us]':>12} | {'acumulado [us]':>14} | módulo")
+        for name, own, cumulative, depth in sorted(records, key=lambda record: record[2], reverse=True)[:top]:
+            lines.append(f"  {own * 1e6:>12.0f} | {cumulative * 1e6:>14.0f} | {'  ' * depth}{name}")
+        return "\n".join(lines)
+
+
+def install():
+    """Começa a medir a inicialização; deve ser chamado antes dos imports da aplicação."""
+    global _profiler
+    if _profiler is None:
+        _profiler = StartupProfiler()
+        _profiler.start()
+    return _profiler
+
+
+def active():
+    return _profiler is not None
+
+
+@contextlib.contextmanager
+def phase(name):
+    """Mede uma etapa da inicialização."""
+    if _profiler is None:
+        yield
+        return
+    started_at = _profiler.elapsed()
+    try:
+        yield
+    finally:
+        _profiler.phases.append((name, started_at, _profiler.elapsed() - started_at))
+
+
+def mark(name):
+    """Registra o instante de um marco (primeiro desenho, primeira leitura)."""
+    if _profiler is not None:
+        _profiler.marks.append((name, _profiler.elapsed()))
+
+
+def finish():
+    """Encerra a medição dos imports e registra o relatório (uma única vez)."""
+    if _profiler is None or _profiler.reported:
+        return
+    _profiler.reported = True
+    _profiler.stop()
+    logger.info("%s", _profiler.report())
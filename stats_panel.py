@@ -0,0 +1,78 @@
+import time
+import tkinter as tk
+from tkinter import ttk
+
+from config import METRICS_PANEL_INTERVAL_MS
+from metrics import format_latency
+
+
+class StatsPanel:
+    """
+    Painel "Desempenho" com os contadores e os percentis de latência de cada etapa.
+
+    O texto é recalculado a cada `interval_ms` a partir dos histogramas (custo independente do
+    número de mensagens); a caixa de seleção liga e desliga a instrumentação em tempo de execução.
+    """
+
+    def __init__(self, master, metrics, ingest_queue, interval_ms=METRICS_PANEL_INTERVAL_MS):
+        self.metrics = metrics
+        self.ingest_queue = ingest_queue
+        self.interval_ms = interval_ms
+
+        self.frame = ttk.LabelFrame(master, text="⏱ Desempenho", padding="10")
+
+        self.enabled_var = tk.BooleanVar(self.frame, value=metrics.enabled)
+        self.toggle = ttk.Checkbutton(
+            self.frame,
+            text="Instrumentação ativa",
+            variable=self.enabled_var,
+            command=self._on_toggle
+        )
+        self.toggle.grid(row=0, column=0, rowspan=2, sticky="nw", padx=(0, 15))
+
+        self.counters_label = ttk.Label(self.frame, font=("Consolas", 10))
+        self.counters_label.grid(row=0, column=1, sticky="w")
+        self.latency_label = ttk.Label(self.frame, font=("Consolas", 10))
+        self.latency_label.grid(row=1, column=1, sticky="w")
+
+        self._last_messages = metrics.messages
+        self._last_refresh = time.monotonic()
+        self._after_id = None
+        self.refresh()
+
+    def _on_toggle(self):
+        self.metrics.enabled = self.enabled_var.get()
+
+    def refresh(self):
+        """Atualiza os textos do painel e agenda a próxima atualização."""
+        metrics = self.metrics
+        now = time.monotonic()
+        messages = metrics.messages
+        elapsed = now - self._last_refresh
+        rate = (messages - self._last_messages) / elapsed if elapsed > 0 else 0.0
+        self._last_messages = messages
+        self._last_refresh = now
+
+        # Reflete alterações feitas por outro caminho (por exemplo, pelo endpoint HTTP)
+        if self.enabled_var.get() != metrics.enabled:
+            self.enabled_var.set(metrics.enabled)
+
+        queue = self.ingest_queue
+        self.counters_label.config(text=(
+            f"Mensagens: {messages} ({rate:.0f}/s) | Fila: {len(queue)} (descartes: {queue.dropped}) | "
+            f"Erros de parse: {metrics.parse_errors} | Atualizações agrupadas: {metrics.coalesced_updates} | "
+            f"Renderizações: {metrics.renders} | Quartos agrupados: {metrics.coalesced_rooms} "
+            f"(adiados: {metrics.deferred_rooms})"
+        ))
+        self.latency_label.config(text=" | ".join(
+            f"{metrics.STAGE_DESCRIPTIONS[stage]} p50 {format_latency(histogram.quantile(0.5))} "
+            f"p99 {format_latency(histogram.quantile(0.99))}"
+            for stage, histogram in metrics.histograms().items()
+        ))
+        self._after_id = self.frame.after(self.interval_ms, self.refresh)
+
+    def destroy(self):
+        if self._after_id is not None:
+            self.frame.after_cancel(self._after_id)
+            self._after_id = None
+        self.frame.destroy()
@@ -0,0 +1,71 @@
+from bisect import bisect_left
+from tkinter import ttk
+
+
+class SummaryTableView:
+    """
+    Tabela do painel "Resumo Atual" com uma linha estável por quarto.
+
+    As linhas são indexadas pelo ID do quarto e guardam os valores exibidos; uma atualização
+    só chega ao Tk quando algum valor da linha mudou. Quartos novos são inseridos diretamente
+    na posição ordenada.
+    """
+
+    COLUMNS = (
+        ("room", "🏠 Quarto", 90),
+        ("environment", "🌡 Ambiente", 120),
+        ("reference", "🎯 Referência", 120),
+        ("status", "📊 Status", 140),
+    )
+    PLACEHOLDER_IID = "placeholder"
+
+    def __init__(self, master, height=6):
+        self.tree = ttk.Treeview(
+            master,
+            columns=[column for column, _, _ in self.COLUMNS],
+            show="headings",
+            height=height,
+            selectmode="none"
+        )
+        for column, heading, width in self.COLUMNS:
+            self.tree.heading(column, text=heading, anchor="w")
+            self.tree.column(column, width=width, anchor="w")
+        self.tree.tag_configure("alert", foreground="#c0392b")
+
+        scrollbar = ttk.Scrollbar(master, orient="vertical", command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        self._room_order = []  # IDs dos quartos em ordem
+        self._rows = {}  # room_id -> (valores, tags) exibidos atualmente
+
+        self.tree.insert("", "end", iid=self.PLACEHOLDER_IID, values=("Nenhum dado recebido ainda.", "", "", ""))
+
+    @staticmethod
+    def _iid(room_id):
+        return f"room:{room_id}"
+
+    def update_row(self, room_id, env_text, ref_text, status_text, is_alert=False):
+        """
+        Atualiza (ou insere) a linha de um quarto, tocando no widget apenas se algo mudou.
+
+        Returns:
+            bool: True se a linha foi inserida ou alterada
+        """
+        row = ((room_id, env_text, ref_text, status_text), ("alert",) if is_alert else ())
+        current = self._rows.get(room_id)
+        if current == row:
+            return False
+
+        values, tags = row
+        if current is None:
+            if not self._rows:
+                self.tree.delete(self.PLACEHOLDER_IID)
+            index = bisect_left(self._room_order, room_id)
+            self._room_order.insert(index, room_id)
+            self.tree.insert("", index, iid=self._iid(room_id), values=values, tags=tags)
+        else:
+            self.tree.item(self._iid(room_id), values=values, tags=tags)
+        self._rows[room_id] = row
+        return True
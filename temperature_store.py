@@ -0,0 +1,375 @@
+from datetime import datetime, timezone
+
+import numpy as np
+
+from config import TEMP_TYPE_ENVIRONMENT, TEMP_TYPE_REFERENCE, STORE_LATENESS_WINDOW_S
+
+
+def to_epoch(timestamp):
+    """
+    Converte um timestamp para segundos desde a época (float).
+    Datetimes sem fuso horário são interpretados como UTC, assim como os timestamps "Z" do MQTT.
+    """
+    if isinstance(timestamp, datetime):
+        if timestamp.tzinfo is None:
+            timestamp = timestamp.replace(tzinfo=timezone.utc)
+        return timestamp.timestamp()
+    return float(timestamp)
+
+
+def from_epoch(epoch_seconds):
+    """Converte segundos desde a época para um datetime em UTC."""
+    return datetime.fromtimestamp(float(epoch_seconds), timezone.utc)
+
+
+class TemperatureReading:
+    """Leitura individual de temperatura (timestamp em segundos desde a época)."""
+
+    __slots__ = ("timestamp", "value")
+
+    def __init__(self, timestamp, value):
+        self.timestamp = timestamp
+        self.value = value
+
+    @property
+    def datetime(self):
+        """Timestamp da leitura como datetime em UTC."""
+        return from_epoch(self.timestamp)
+
+    def __repr__(self):
+        return f"TemperatureReading(timestamp={self.timestamp!r}, value={self.value!r})"
+
+
+class TimeSeriesBuffer:
+    """
+    Buffer circular de capacidade fixa com timestamps e valores em arrays contíguos do NumPy.
+
+    Os dados ficam em arrays com o dobro da capacidade: as leituras são escritas em sequência
+    e, quando o fim do array é atingido, as `capacity` leituras mais recentes são copiadas de
+    volta para o início. Assim a janela atual é sempre uma fatia contígua, exposta como view
+    (sem cópia), e o custo de inserção continua O(1) amortizado. Os arrays crescem sob demanda
+    até esse tamanho máximo, então quartos com poucas leituras ocupam pouca memória.
+
+    As leituras ficam sempre em ordem de timestamp: as que chegam em ordem são apenas escritas no
+    fim; as atrasadas são inseridas na posição certa (busca binária e deslocamento do trecho
+    seguinte). Leituras mais antigas que `lateness_window` segundos antes da mais recente são
+    descartadas e contadas em `late_dropped`. Assim a última leitura é sempre a mais recente e
+    os caminhos de exibição percorrem os arrays sem ordenar.
+    """
+
+    __slots__ = ("capacity", "lateness_window", "late_dropped", "_timestamps", "_values", "_start", "_end")
+
+    INITIAL_SIZE = 16
+
+    def __init__(self, capacity, lateness_window=STORE_LATENESS_WINDOW_S):
+        """
+        Args:
+            capacity: Máximo de leituras armazenadas
+            lateness_window: Atraso máximo (s) em relação à leitura mais recente; None aceita qualquer atraso
+        """
+        if capacity < 1:
+            raise ValueError("A capacidade do buffer deve ser positiva")
+        self.capacity = capacity
+        self.lateness_window = lateness_window
+        self.late_dropped = 0
+        size = min(self.INITIAL_SIZE, 2 * capacity)
+        self._timestamps = np.empty(size, dtype=np.float64)
+        self._values = np.empty(size, dtype=np.float64)
+        self._start = 0
+        self._end = 0
+
+    def __len__(self):
+        return self._end - self._start
+
+    def __bool__(self):
+        return self._end > self._start
+
+    def _make_room(self, extra=1):
+        """Garante espaço para `extra` escritas no fim do array (`extra` <= espaço livre na capacidade)."""
+        size = len(self._timestamps)
+        count = self._end - self._start
+        max_size = 2 * self.capacity
+        required = count + extra
+
+        if size < max_size and required > size // 2:
+            # Cresce o array (dobrando) até o tamanho máximo
+            new_size = size
+            while new_size < 2 * required:
+                new_size *= 2
+            new_size = min(new_size, max_size)
+            timestamps = np.empty(new_size, dtype=np.float64)
+            values = np.empty(new_size, dtype=np.float64)
+            timestamps[:count] = self._timestamps[self._start:self._end]
+            values[:count] = self._values[self._start:self._end]
+            self._timestamps = timestamps
+            self._values = values
+        else:
+            # Compacta: move a janela atual para o início do array
+            self._timestamps[:count] = self._timestamps[self._start:self._end]
+            self._values[:count] = self._values[self._start:self._end]
+        self._start = 0
+        self._end = count
+
+    def append(self, timestamp, value):
+        """
+        Adiciona uma leitura na posição do seu timestamp, descartando a mais antiga se a
+        capacidade foi atingida.
+
+        Returns:
+            bool: False se a leitura foi descartada por chegar atrasada demais
+        """
+        end = self._end
+        if end > self._start and timestamp < self._timestamps[end - 1]:
+            return self._insert_late(timestamp, value)
+        if end == len(self._timestamps):
+            self._make_room()
+        self._timestamps[self._end] = timestamp
+        self._values[self._end] = value
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+        return True
+
+    def _insert_late(self, timestamp, value):
+        """Insere uma leitura anterior à mais recente, deslocando as posteriores uma posição."""
+        if self.lateness_window is not None and timestamp < self._timestamps[self._end - 1] - self.lateness_window:
+            self.late_dropped += 1
+            return False
+        if self._end == len(self._timestamps):
+            self._make_room()
+        start, end = self._start, self._end
+        # "right": leituras com o mesmo timestamp mantêm a ordem de chegada
+        position = start + int(np.searchsorted(self._timestamps[start:end], timestamp, "right"))
+        self._timestamps[position + 1:end + 1] = self._timestamps[position:end]
+        self._values[position + 1:end + 1] = self._values[position:end]
+        self._timestamps[position] = timestamp
+        self._values[position] = value
+        self._end += 1
+        if self._end - self._start > self.capacity:
+            self._start += 1
+        return True
+
+    def extend(self, timestamps, values):
+        """
+        Adiciona um lote de leituras com cópias vetorizadas, mantendo apenas as
+        `capacity` mais recentes.
+
+        Returns:
+            int: Número de leituras descartadas por chegarem atrasadas demais
+        """
+        timestamps = np.asarray(timestamps, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+        count = len(timestamps)
+        if count == 0:
+            return 0
+        in_order = count == 1 or not np.any(timestamps[1:] < timestamps[:-1])
+        if not in_order or (self._end > self._start and timestamps[0] < self._timestamps[self._end - 1]):
+            return self._merge_late(timestamps, values)
+        if count > self.capacity:
+            timestamps = timestamps[-self.capacity:]
+            values = values[-self.capacity:]
+            count = self.capacity
+
+        # Descarta as leituras mais antigas que excederiam a capacidade
+        keep = min(self._end - self._start, self.capacity - count)
+        self._start = self._end - keep
+        if self._end + count > len(self._timestamps):
+            self._make_room(count)
+        self._timestamps[self._end:self._end + count] = timestamps
+        self._values[self._end:self._end + count] = values
+        self._end += count
+        return 0
+
+    def _merge_late(self, timestamps, values):
+        """Caminho lento de `extend`: lote fora de ordem ou com leituras anteriores às armazenadas."""
+        newest = timestamps.max()
+        if self._end > self._start:
+            newest = max(newest, self._timestamps[self._end - 1])
+        dropped = 0
+        if self.lateness_window is not None:
+            on_time = timestamps >= newest - self.lateness_window
+            dropped = len(timestamps) - int(np.count_nonzero(on_time))
+            timestamps, values = timestamps[on_time], values[on_time]
+            self.late_dropped += dropped
+
+        # Ordena o lote e intercala com as leituras armazenadas (estável: empates mantêm a chegada)
+        order = np.argsort(timestamps, kind="stable")
+        merged_timestamps = np.concatenate((self.timestamps, timestamps[order]))
+        merged_values = np.concatenate((self.values, values[order]))
+        order = np.argsort(merged_timestamps, kind="stable")[-self.capacity:]
+        self._start = self._end = 0
+        self.extend(merged_timestamps[order], merged_values[order])
+        return dropped
+
+    def restore(self, timestamps, values):
+        """
+        Substitui o conteúdo por leituras já ordenadas por timestamp (snapshot de estado), sem as
+        verificações de ordem de `extend`. Apenas as `capacity` mais recentes são mantidas.
+        """
+        count = min(len(timestamps), self.capacity)
+        self._start = self._end = 0
+        if count > len(self._timestamps):
+            self._make_room(count)
+        if count:
+            self._timestamps[:count] = timestamps[-count:]
+            self._values[:count] = values[-count:]
+        self._end = count
+
+    @property
+    def timestamps(self):
+        """View (sem cópia) dos timestamps armazenados, do mais antigo para o mais recente."""
+        return self._timestamps[self._start:self._end]
+
+    @property
+    def values(self):
+        """View (sem cópia) dos valores armazenados, do mais antigo para o mais recente."""
+        return self._values[self._start:self._end]
+
+    def latest(self):
+        """
+        Retorna a leitura mais recente.
+
+        Returns:
+            TemperatureReading or None: Última leitura ou None se o buffer estiver vazio
+        """
+        if self._end == self._start:
+            return None
+        last = self._end - 1
+        return TemperatureReading(float(self._timestamps[last]), float(self._values[last]))
+
+    def window(self, count=None):
+        """
+        Retorna as últimas `count` leituras (todas, se `count` for None).
+
+        Returns:
+            tuple: (timestamps, valores) como views dos arrays internos
+        """
+        start = self._start
+        if count is not None:
+            start = max(self._start, self._end - count)
+        return self._timestamps[start:self._end], self._values[start:self._end]
+
+    def since(self, timestamp):
+        """
+        Retorna as leituras com timestamp maior ou igual a `timestamp`.
+
+        Returns:
+            tuple: (timestamps, valores) como views dos arrays internos
+        """
+        start = self._start + int(np.searchsorted(self.timestamps, to_epoch(timestamp), "left"))
+        return self._timestamps[start:self._end], self._values[start:self._end]
+
+
+class RoomSeries:
+    """Séries de temperatura ambiente e de referência de um quarto."""
+
+    __slots__ = ("environment", "reference")
+
+    def __init__(self, capacity, lateness_window=STORE_LATENESS_WINDOW_S):
+        self.environment = TimeSeriesBuffer(capacity, lateness_window)
+        self.reference = TimeSeriesBuffer(capacity, lateness_window)
+
+    def get(self, temp_type):
+        """Retorna o buffer correspondente ao tipo de temperatura ("0" ou "1")."""
+        if temp_type == TEMP_TYPE_ENVIRONMENT:
+            return self.environment
+        if temp_type == TEMP_TYPE_REFERENCE:
+            return self.reference
+        raise KeyError(temp_type)
+
+
+class TemperatureStore:
+    """Armazena as séries de temperatura de todos os quartos, em ordem de timestamp."""
+
+    def __init__(self, capacity, lateness_window=STORE_LATENESS_WINDOW_S):
+        """
+        Args:
+            capacity: Máximo de leituras de cada tipo por quarto
+            lateness_window: Atraso máximo (s) aceito em relação à leitura mais recente do quarto e tipo
+        """
+        self.capacity = capacity
+        self.lateness_window = lateness_window
+        self.late_dropped = 0  # Leituras descartadas por chegarem atrasadas demais (todos os quartos)
+        self._rooms = {}
+
+    def __contains__(self, room_id):
+        return room_id in self._rooms
+
+    def __len__(self):
+        return len(self._rooms)
+
+    def __bool__(self):
+        return bool(self._rooms)
+
+    def __getitem__(self, room_id):
+        return self._rooms[room_id]
+
+    def get(self, room_id):
+        """Retorna as séries do quarto ou None se ele ainda não recebeu leituras."""
+        return self._rooms.get(room_id)
+
+    def room_ids(self):
+        """Retorna os IDs dos quartos conhecidos."""
+        return self._rooms.keys()
+
+    def add(self, room_id, temp_type, timestamp, value):
+        """
+        Armazena uma leitura.
+
+        Args:
+            room_id: ID do quarto
+            temp_type: "0" para ambiente, "1" para referência
+            timestamp: datetime ou segundos desde a época
+            value: Valor da temperatura
+
+        Returns:
+            bool: True se o quarto ainda não existia
+        """
+        if temp_type != TEMP_TYPE_ENVIRONMENT and temp_type != TEMP_TYPE_REFERENCE:
+            raise KeyError(temp_type)
+
+        series = self._rooms.get(room_id)
+        is_new_room = series is None
+        if is_new_room:
+            series = self._rooms[room_id] = RoomSeries(self.capacity, self.lateness_window)
+        if not series.get(temp_type).append(to_epoch(timestamp), value):
+            self.late_dropped += 1
+        return is_new_room
+
+    def restore(self, room_id, env_timestamps, env_values, ref_timestamps, ref_values):
+        """
+        Substitui as séries de um quarto pelas de um snapshot de estado (leituras já ordenadas).
+
+        Returns:
+            bool: True se o quarto ainda não existia
+        """
+        series = self._rooms.get(room_id)
+        is_new_room = series is None
+        if is_new_room:
+            series = self._rooms[room_id] = RoomSeries(self.capacity, self.lateness_window)
+        series.environment.restore(env_timestamps, env_values)
+        series.reference.restore(ref_timestamps, ref_values)
+        return is_new_room
+
+    def add_many(self, room_id, temp_type, timestamps, values):
+        """
+        Armazena um lote de leituras de um mesmo quarto e tipo.
+
+        Args:
+            room_id: ID do quarto
+            temp_type: "0" para ambiente, "1" para referência
+            timestamps: Sequência de timestamps em segundos desde a época
+            values: Sequência de valores de temperatura
+
+        Returns:
+            bool: True se o quarto ainda não existia
+        """
+        if temp_type != TEMP_TYPE_ENVIRONMENT and temp_type != TEMP_TYPE_REFERENCE:
+            raise KeyError(temp_type)
+
+        series = self._rooms.get(room_id)
+        is_new_room = series is None
+        if is_new_room:
+            series = self._rooms[room_id] = RoomSeries(self.capacity, self.lateness_window)
+        self.late_dropped += series.get(temp_type).extend(timestamps, values)
+        return is_new_room
@@ -4,6 +4,7 @@ Script de teste para temperatura de referência dinâmica
 Simula mudanças na temperatura de referência e ambiente para demonstrar o sistema
 """
 
+import argparse
 import json
 import time
 import random
@@ -31,8 +32,32 @@ def send_temperature_data(client, room_id, temp_type, value):
     print(f"📤 Quarto {room_id} ({type_name}): {value:.1f}°C")
     return result
 
+def send_temperature_batch(client, room_id, temp_type, readings):
+    """Envia várias leituras (lista de (timestamp, valor)) em uma única publicação no tópico de lote"""
+    topic = f"/sensors/{room_id}/{temp_type}/batch"
+    payload = [{"timestamp": timestamp, "value": round(value, 1)} for timestamp, value in readings]
+
+    message = json.dumps(payload)
+    result = client.publish(topic, message)
+
+    type_name = "🌡️ ambiente" if temp_type == "0" else "🎯 referência"
+    print(f"📦 Lote enviado para Quarto {room_id} ({type_name}): {len(readings)} leituras")
+    return result
+
+def parse_args():
+    """Lê as opções de linha de comando"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Leituras ambiente acumuladas por quarto antes de publicar em /sensors/X/0/batch (1 = sem lote)"
+    )
+    return parser.parse_args()
+
 def main():
     """Teste com temperatura de referência mudando dinamicamente"""
+    args = parse_args()
     client = mqtt.Client()
     
     try:
@@ -64,6 +89,7 @@ def main():
         
         cycle_count = 0
         
+        pending_readings = {}  # room_id -> leituras ambiente aguardando envio em lote
         try:
             while True:
                 cycle_count += 1
@@ -98,7 +124,15 @@ def main():
                     # Garante temperatura positiva
                     env_temp = max(15.0, env_temp)
                     
-                    send_temperature_data(client, room_id, "0", env_temp)
+                    if args.batch_size > 1:
+                        # Acumula as leituras do quarto e publica todas de uma vez no tópico de lote
+                        pending = pending_readings.setdefault(room_id, [])
+                        pending.append((datetime.now().isoformat() + "Z", env_temp))
+                        if len(pending) >= args.batch_size:
+                            send_temperature_batch(client, room_id, "0", pending)
+                            pending_readings[room_id] = []
+                    else:
+                        send_temperature_data(client, room_id, "0", env_temp)
                     time.sleep(0.3)
                 
                 print(f"⏱️ Aguardando próximo ciclo... (3s)")
@@ -4,6 +4,7 @@ Script de teste para enviar dados de temperatura via MQTT
 Simula temperaturas ambiente e de referência para múltiplos quartos
 """
 
+import argparse
 import json
 import time
 import random
@@ -30,8 +31,31 @@ def send_temperature_data(client, room_id, temp_type, value):
     type_name = "ambiente" if temp_type == "0" else "referência"
     print(f"Enviado para Quarto {room_id} ({type_name}): {value:.1f}°C")
 
+def send_temperature_batch(client, room_id, temp_type, readings):
+    """Envia várias leituras (lista de (timestamp, valor)) em uma única publicação no tópico de lote"""
+    topic = f"/sensors/{room_id}/{temp_type}/batch"
+    payload = [{"timestamp": timestamp, "value": value} for timestamp, value in readings]
+
+    message = json.dumps(payload)
+    client.publish(topic, message)
+
+    type_name = "ambiente" if temp_type == "0" else "referência"
+    print(f"Lote enviado para Quarto {room_id} ({type_name}): {len(readings)} leituras")
+
+def parse_args():
+    """Lê as opções de linha de comando"""
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Leituras ambiente acumuladas por quarto antes de publicar em /sensors/X/0/batch (1 = sem lote)"
+    )
+    return parser.parse_args()
+
 def main():
     """Função principal do script de teste"""
+    args = parse_args()
     client = mqtt.Client()
     
     try:
@@ -55,6 +79,7 @@ def main():
         print("Pressione Ctrl+C para parar\n")
         
         # Simula temperaturas ambiente em tempo real
+        pending_readings = {}  # room_id -> leituras ambiente aguardando envio em lote
         try:
             while True:
                 for room_id, data in rooms.items():
@@ -65,7 +90,15 @@ def main():
                     # Garante que a temperatura não seja negativa
                     current_temp = max(0.0, current_temp)
                     
-                    send_temperature_data(client, room_id, "0", current_temp)
+                    if args.batch_size > 1:
+                        # Acumula as leituras do quarto e publica todas de uma vez no tópico de lote
+                        pending = pending_readings.setdefault(room_id, [])
+                        pending.append((datetime.now().isoformat() + "Z", current_temp))
+                        if len(pending) >= args.batch_size:
+                            send_temperature_batch(client, room_id, "0", pending)
+                            pending_readings[room_id] = []
+                    else:
+                        send_temperature_data(client, room_id, "0", current_temp)
                     time.sleep(0.3)  # Pequena pausa entre quartos
                 
                 time.sleep(2)  # Pausa entre ciclos completos